@@ -0,0 +1,122 @@
+"""
+Archive benchmark: bytes per finished match and scan throughput at scale.
+
+Builds an archive of --matches synthetic best-of-five matches (point winners
+from a pool of simulated matches, random players out of --players and
+finish times spread over a year), then reports
+
+  - bytes per match, in total and per column, written to a directory
+  - build rate (MatchArchive.add_result) and flush time
+  - scan throughput: every row decoded (MatchArchive.scan), and a pure
+    column scan (wins per player straight from the arrays)
+  - query latency: one player's matches, one week of matches, and both
+  - point decoding: one match's winners unpacked from its bit array
+
+    python -m benchmarks.bench_archive --matches 1000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from tennis_backend.archive import MatchArchive
+from tennis_backend.match_registry import Match
+from tennis_backend.match_state import NO_PLAYER
+
+START = 1_700_000_000
+YEAR = 365 * 24 * 3600
+WEEK = 7 * 24 * 3600
+
+
+def simulated(count: int, rng: random.Random):
+    """(winner, first_server, sets, point winners) of whole matches, serve winning 64% of points"""
+    results = []
+    for _ in range(count):
+        match = Match("bench", ["A", "B"], first_server=rng.choice(["A", "B"]), history_depth=0)
+        while match.state.winner == NO_PLAYER:
+            server = match.state.server(match.first_server)
+            match.score(server if rng.random() < 0.64 else 1 - server)
+        results.append((match.state.winner, match.first_server, bytes(match.state.sets), match.timeline.winners()))
+    return results
+
+
+def timed(run):
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def per_call(run, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        run()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=1_000_000)
+    parser.add_argument("--players", type=int, default=2000, help="Distinct player names")
+    parser.add_argument("--pool", type=int, default=200, help="Simulated matches the rows reuse")
+    args = parser.parse_args()
+    rng = random.Random(0)
+    pool = simulated(args.pool, rng)
+    names = [f"Player {number}" for number in range(args.players)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive = MatchArchive(directory)
+
+        def build():
+            step = YEAR / args.matches
+            for row in range(args.matches):
+                winner, first_server, sets, winners = pool[row % len(pool)]
+                archive.add_result(f"match-{row}", rng.sample(names, 2), winner, first_server, "best_of_5", sets,
+                                   START + row * step, winners)
+
+        _, build_seconds = timed(build)
+        _, flush_seconds = timed(archive.flush)
+        on_disk = {name: os.path.getsize(os.path.join(directory, name)) for name in sorted(os.listdir(directory))}
+        total = sum(on_disk.values())
+        count = len(archive)
+        print(f"{count:,} matches, {sum(len(w) for *_, w in pool) / len(pool):.0f} points each on average")
+        print(f"  on disk {total / 1e6:8.1f} MB  {total / count:6.1f} bytes/match")
+        for name, size in on_disk.items():
+            print(f"    {name:18} {size / count:6.2f} bytes/match")
+        print(f"  build   {count / build_seconds:10,.0f} matches/s   flush {flush_seconds:.2f} s")
+
+        _, reopen_seconds = timed(lambda: MatchArchive(directory))
+        print(f"  reopen  {reopen_seconds:8.2f} s")
+
+        decoded, scan_seconds = timed(lambda: sum(1 for _ in archive.scan(lambda match: match.winner == 0)))
+        print(f"  scan, every row decoded   {count / scan_seconds:12,.0f} matches/s")
+
+        def column_wins():
+            wins = [0] * len(archive.names)
+            for player0, player1, flags in zip(archive.columns["player0"], archive.columns["player1"],
+                                               archive.columns["flags"]):
+                wins[player1 if flags & 1 else player0] += 1
+            return wins
+
+        _, column_seconds = timed(column_wins)
+        print(f"  scan, wins per player     {count / column_seconds:12,.0f} matches/s")
+
+        queries = [rng.choice(names) for _ in range(200)]
+        weeks = [START + rng.random() * (YEAR - WEEK) for _ in range(200)]
+        player_us = per_call(lambda: list(archive.query(rng.choice(queries))), 200)
+        week_us = per_call(lambda: list(archive.query(since=(since := rng.choice(weeks)), until=since + WEEK)), 50)
+        both_us = per_call(lambda: list(archive.query(rng.choice(queries), since := rng.choice(weeks),
+                                                      since + WEEK)), 2000)
+        per_player = count * 2 / len(names)
+        print(f"  query one player (~{per_player:,.0f} matches)       {player_us / 1000:8.2f} ms")
+        print(f"  query one week (~{count * WEEK / YEAR:,.0f} matches)        {week_us / 1000:8.2f} ms")
+        print(f"  query one player, one week             {both_us:8.1f} us")
+
+        rows = [rng.randrange(count) for _ in range(1000)]
+        print(f"  point winners of one match             {per_call(lambda: archive.point_winners(rng.choice(rows)), 10_000):8.1f} us")
+        print(f"  find by ID (bytes search)              {per_call(lambda: archive.find(f'match-{rng.choice(rows)}'), 20):8.0f} us")
+
+
+if __name__ == "__main__":
+    main()
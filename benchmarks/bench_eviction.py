@@ -0,0 +1,84 @@
+"""
+Bounded registry benchmark: memory held and cost per operation under a budget.
+
+Streams --matches matches through a BoundedMatchRegistry capped at
+--max-bytes (each match gets a random number of points, like courts
+finishing at different times), and reports the peak traced memory of the
+matches against the cap, how close the registry's own byte estimate is,
+and the evictions. Then times scoring and lookups against a plain
+MatchRegistry to show what the recency and size bookkeeping costs.
+
+    python -m benchmarks.bench_eviction --matches 20000 --max-bytes 50000000
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from tennis_backend.bounded_registry import BoundedMatchRegistry
+from tennis_backend.match_registry import MatchRegistry
+
+
+def stream(registry, matches: int, rng: random.Random) -> None:
+    for number in range(matches):
+        match = registry.create(["Alcaraz", "Sinner"], match_id=f"m{number}")
+        for _ in range(rng.randint(50, 400)):
+            match.score(rng.randint(0, 1))
+
+
+def scoring_ns(matches, winners) -> float:
+    """Points scored round-robin over the matches, resetting each once won"""
+    best = float("inf")
+    count = len(matches)
+    for _ in range(3):
+        start = time.perf_counter()
+        for index, winner in enumerate(winners):
+            match = matches[index % count]
+            match.score(winner)
+            if match.state.winner != -1:
+                match.reset()
+        best = min(best, (time.perf_counter() - start) / len(winners))
+    return best * 1e9
+
+
+def lookup_ns(registry, ids) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(100):
+            for match_id in ids:
+                registry.get(match_id)
+        best = min(best, (time.perf_counter() - start) / (100 * len(ids)))
+    return best * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=20_000)
+    parser.add_argument("--max-bytes", type=int, default=50_000_000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    tracemalloc.start()
+    registry = BoundedMatchRegistry(max_bytes=args.max_bytes, evict_live=True)  # as with a store to reload from
+    start = time.perf_counter()
+    stream(registry, args.matches, rng)
+    elapsed = time.perf_counter() - start
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = registry.stats()
+    print(f"{args.matches:,} matches streamed in {elapsed:.1f} s through a {args.max_bytes / 1e6:.0f} MB budget")
+    print(f"  held {stats['matches']:,} matches, estimated {stats['bytes'] / 1e6:.1f} MB, "
+          f"traced {held / 1e6:.1f} MB now, {peak / 1e6:.1f} MB peak")
+    print(f"  evictions {stats['evictions']}")
+
+    winners = [rng.randint(0, 1) for _ in range(100_000)]
+    for name, factory in (("MatchRegistry", MatchRegistry), ("BoundedMatchRegistry", BoundedMatchRegistry)):
+        registry = factory()
+        matches = [registry.create(["Alcaraz", "Sinner"]) for _ in range(1000)]
+        ids = [match.match_id for match in matches]
+        print(f"  {name:22} score {scoring_ns(matches, winners):6.0f} ns/point   get {lookup_ns(registry, ids):5.0f} ns")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Idempotency-Key benchmark: what deduplication adds to the scoring hot path.
+
+  * cache: IdempotencyCache.get for a new key (the usual case, a miss) on
+    an empty match and on a match holding --keys keys, a retry (a hit) and
+    put, in nanoseconds per call;
+  * http: in-process POST /matches/{id}/players/{name}/increment with no
+    key, with a fresh key per request and with every request a retry, in
+    requests/second and p50, best of --rounds interleaved rounds.
+
+    python -m benchmarks.bench_idempotency --requests 5000
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+import tennis_backend.main as main
+from tennis_backend.idempotency import IdempotencyCache
+
+
+def _per_call(run, calls: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(calls):
+            run()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best * 1e9
+
+
+def cache_costs(keys: int, calls: int) -> None:
+    cache = IdempotencyCache(keys_per_match=keys)
+    for number in range(keys):
+        cache.put("full", f"tablet-1:{number}", ("increment", "Alcaraz"), {"points": 15})
+    fingerprint = ("increment", "Alcaraz")
+    counter = iter(range(10 ** 9))
+    runs = {
+        "get, new key, empty match": lambda: cache.get("empty", "tablet-1:x", fingerprint),
+        f"get, new key, {keys} keys held": lambda: cache.get("full", "tablet-1:x", fingerprint),
+        "get, retried key (hit)": lambda: cache.get("full", "tablet-1:7", fingerprint),
+        "put (at the cap)": lambda: cache.put("full", f"new:{next(counter)}", fingerprint, {"points": 15}),
+    }
+    for label, run in runs.items():
+        print(f"{label:32} {_per_call(run, calls):7.0f} ns")
+
+
+async def _round(client: httpx.AsyncClient, mode: str, requests: int) -> tuple:
+    match_id = (await client.post("/matches", json={"players": ["Alcaraz", "Sinner"]})).json()["id"]
+    url = f"/matches/{match_id}/players/Alcaraz/increment"
+    latencies = []
+    start = time.perf_counter()
+    for number in range(requests):
+        headers = {} if mode == "no key" else {"Idempotency-Key": "retry" if mode == "retries" else f"k{number}"}
+        sent = time.perf_counter()
+        response = await client.post(url, headers=headers)
+        latencies.append(time.perf_counter() - sent)
+        if response.json()["winner"]:
+            await client.post(f"/matches/{match_id}/reset")
+    elapsed = time.perf_counter() - start
+    await client.delete(f"/matches/{match_id}")
+    latencies.sort()
+    return requests / elapsed, latencies[len(latencies) // 2] * 1e6
+
+
+async def http(requests: int, rounds: int) -> None:
+    transport = httpx.ASGITransport(app=main.app)
+    best = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(rounds):
+            for mode in ("no key", "fresh keys", "retries"):
+                rate, p50 = await _round(client, mode, requests)
+                if rate > best.get(mode, (0,))[0]:
+                    best[mode] = (rate, p50)
+    for mode, (rate, p50) in best.items():
+        print(f"increment, {mode:12} {rate:8,.0f} req/s   p50 {p50:6.0f} us")
+
+
+def main_() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=256, help="Keys held per match")
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    cache_costs(args.keys, args.calls)
+    if main.idempotency is None:
+        print("IDEMPOTENCY_TTL=0: skipping the http rounds")
+        return
+    asyncio.run(http(args.requests, args.rounds))
+
+
+if __name__ == "__main__":
+    main_()
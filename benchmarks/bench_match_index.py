@@ -0,0 +1,96 @@
+"""
+Match listing benchmark: indexed pages against scanning every match.
+
+Builds --matches matches with random play (some won, some in a tiebreak,
+players drawn from --players names), then times one 50-match page of each
+GET /matches filter through MatchIndex, next to the scan it replaces (check
+every match's state, sort by last change). Also reports the index's cost
+per point scored.
+
+    python -m benchmarks.bench_match_index --matches 5000
+"""
+
+import argparse
+import random
+import time
+
+from tennis_backend.match_index import MatchIndex
+from tennis_backend.match_registry import MatchRegistry
+
+
+def per_call(run, calls: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(calls):
+            run()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best * 1e6
+
+
+def scan(registry, index, status=None, player=None, tiebreak=None, limit=50):
+    """GET /matches without indexes"""
+    matches = [match for match in registry
+               if (status is None or (match.state.winner == -1) == (status == "live"))
+               and (player is None or player in match.player_index)
+               and (tiebreak is None or match.state.tiebreak == tiebreak)]
+    matches.sort(key=lambda match: index.seq[match.match_id], reverse=True)
+    return matches[:limit]
+
+
+def scoring_ns(matches, winners) -> float:
+    start = time.perf_counter()
+    for position, winner in enumerate(winners):
+        match = matches[position % len(matches)]
+        match.score(winner)
+        if match.state.winner != -1:
+            match.reset()
+    return (time.perf_counter() - start) / len(winners) * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=5000)
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    names = [f"Player {number}" for number in range(args.players)]
+
+    registry = MatchRegistry(history_depth=0, checkpoint_every=0)
+    index = MatchIndex()
+    registry.add_listener(index)
+    for number in range(args.matches):
+        match = registry.create(rng.sample(names, 2), match_id=f"court-{number}",
+                                match_format=rng.choice([None, "best_of_3", "short_sets"]))
+        for _ in range(rng.randint(0, 250)):
+            if match.state.winner != -1:
+                break
+            match.score(rng.randint(0, 1))
+    print(f"{len(index):,} matches: {len(index.live):,} live, {len(index.finished):,} finished, "
+          f"{len(index.tiebreak):,} in a tiebreak")
+
+    print(f"{'filter':34} {'indexed us':>11} {'scan us':>9}")
+    for label, filters in (("all", {}), ("status=live", {"status": "live"}),
+                           ("status=finished", {"status": "finished"}), ("tiebreak=true", {"tiebreak": True}),
+                           ("player", {"player": names[7]}), ("status=live&tiebreak=false",
+                                                              {"status": "live", "tiebreak": False})):
+            indexed = per_call(lambda: index.page(limit=50, **filters), args.calls)
+            scanned = per_call(lambda: scan(registry, index, limit=50, **filters), max(5, args.calls // 20))
+            print(f"{label:34} {indexed:11.1f} {scanned:9.0f}")
+    _, cursor = index.page(limit=50)
+    for _ in range(20):
+        _, cursor = index.page(before=cursor, limit=50)
+    print(f"{'all, page 22':34} {per_call(lambda: index.page(before=cursor, limit=50), args.calls):11.1f}")
+
+    winners = [rng.randint(0, 1) for _ in range(200_000)]
+    plain = MatchRegistry(history_depth=0, checkpoint_every=0)
+    indexed_registry = MatchRegistry(history_depth=0, checkpoint_every=0)
+    indexed_registry.add_listener(MatchIndex())
+    for label, target in (("no index", plain), ("MatchIndex", indexed_registry)):
+        matches = [target.create(["Alcaraz", "Sinner"]) for _ in range(1000)]
+        print(f"score, {label:10} {min(scoring_ns(matches, winners) for _ in range(3)):6.0f} ns/point")
+
+
+if __name__ == "__main__":
+    main()
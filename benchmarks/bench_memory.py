@@ -0,0 +1,89 @@
+"""
+Memory benchmark: per-player dicts vs the compact MatchState.
+
+Holds N mid-match states in memory in each representation and reports the
+bytes allocated per match, plus points/second for each scoring engine.
+
+    python -m benchmarks.bench_memory --matches 100000
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from tennis_backend.match_state import MATCH_WON, MatchState, score_point
+from tennis_backend.tennis_game import award_point_to_player
+from tennis_backend.transition_table import score_point_table
+
+
+def sample_match(seed: int = 0, points: int = 200) -> MatchState:
+    """A representative mid-match state: a couple of sets in, games in progress"""
+    rng = random.Random(seed)
+    state = MatchState(("Alcaraz", "Sinner"))
+    for _ in range(points):
+        score_point(state, rng.randint(0, 1))
+    return state
+
+
+def measure(build, count: int) -> float:
+    """Bytes allocated per item while holding count items built by build()"""
+    tracemalloc.start()
+    held = [build() for _ in range(count)]
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return allocated / count
+
+
+def points_per_second(engine, points: int) -> float:
+    rng = random.Random(1)
+    winners = [rng.randint(0, 1) for _ in range(points)]
+    start = time.perf_counter()
+    engine(winners)
+    return points / (time.perf_counter() - start)
+
+
+# Both runners start a new match once one is won, like a court would
+def run_dicts(winners):
+    fresh = MatchState(("Alcaraz", "Sinner")).to_players()
+    players = [dict(p) for p in fresh]
+    for winner in winners:
+        players[winner], players[1 - winner] = award_point_to_player(players[winner], players[1 - winner])
+        if players[winner]["winner"]:
+            players = [{**p, "sets": []} for p in fresh]
+
+
+def run_engine(engine):
+    def run(winners):
+        state = MatchState(("Alcaraz", "Sinner"))
+        for winner in winners:
+            if engine(state, winner) & MATCH_WON:
+                state.reset()
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=100_000)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    template = sample_match()
+    players = template.to_players()
+    dict_bytes = measure(lambda: {p["name"]: {**p, "sets": list(p["sets"])} for p in players}, args.matches)
+    compact_bytes = measure(lambda: MatchState.from_players(*players), args.matches)
+
+    print(f"{args.matches:,} matches at {template.to_player(0)['sets']} / {template.to_player(1)['sets']}")
+    print(f"  dict per player : {dict_bytes:8.0f} bytes/match  {dict_bytes * args.matches / 2**20:8.1f} MiB")
+    print(f"  MatchState      : {compact_bytes:8.0f} bytes/match  {compact_bytes * args.matches / 2**20:8.1f} MiB")
+    print(f"  ratio           : {dict_bytes / compact_bytes:8.1f}x")
+    print()
+    print(f"{args.points:,} points")
+    print(f"  award_point_to_player : {points_per_second(run_dicts, args.points):12,.0f} points/s")
+    print(f"  score_point           : {points_per_second(run_engine(score_point), args.points):12,.0f} points/s")
+    print(f"  score_point_table     : {points_per_second(run_engine(score_point_table), args.points):12,.0f} points/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Cost of the metrics subsystem.
+
+  * middleware: a minimal ASGI app called directly, bare and wrapped in
+    MetricsMiddleware, in microseconds per request; the difference is what
+    every request pays;
+  * routes: GET /players through the full app in-process, which puts that
+    difference next to a real request;
+  * scoring: Match.score with and without the MatchMetrics listener, in
+    nanoseconds per point.
+
+    python -m benchmarks.bench_metrics
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from tennis_backend.match_registry import Match
+from tennis_backend.metrics import Metrics, MetricsMiddleware
+
+
+class _Route:
+    path = "/players"
+
+
+async def _tiny_app(scope, receive, send):
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    pass
+
+
+async def _per_call(app, calls: int) -> float:
+    """Best of five, microseconds per call"""
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(calls):
+            await app({"type": "http", "method": "GET", "path": "/players"}, _receive, _send)
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best * 1e6
+
+
+async def middleware_overhead(calls: int) -> None:
+    bare = await _per_call(_tiny_app, calls)
+    wrapped = await _per_call(MetricsMiddleware(_tiny_app, Metrics()), calls)
+    print(f"middleware: bare app {bare:6.2f} us, with metrics {wrapped:6.2f} us -> {wrapped - bare:5.2f} us/request")
+
+
+async def route_cost(requests: int) -> None:
+    import httpx
+
+    from tennis_backend.main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(100):
+            await client.get("/players")
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/players")
+        elapsed = time.perf_counter() - start
+    print(f"GET /players in-process (metrics on): {elapsed / requests * 1e6:8.1f} us/request")
+
+
+def scoring_overhead(points: int) -> None:
+    rng = random.Random(0)
+    winners = [rng.randint(0, 1) for _ in range(points)]
+    for label, listeners in (("without listener", []), ("with MatchMetrics", [Metrics().scoring])):
+        match = Match("bench", ["Alcaraz", "Sinner"], listeners=listeners, history_depth=0)
+        start = time.perf_counter()
+        for winner in winners:
+            if match.state.winner >= 0:
+                match.state.reset()
+            match.score(winner)
+        print(f"Match.score {label:18}: {(time.perf_counter() - start) / points * 1e9:7.0f} ns/point")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    args = parser.parse_args()
+    asyncio.run(middleware_overhead(args.calls))
+    asyncio.run(route_cost(args.requests))
+    scoring_overhead(args.points)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Recovery benchmark for the point log.
+
+Writes a log of N points spread over many interleaved matches (straight to
+disk in the log's record format, so writing is not what is measured), then
+times a cold recovery from the full log and from a snapshot plus a short tail.
+
+    python -m benchmarks.bench_recovery --points 10000000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from tennis_backend.match_registry import MatchRegistry
+from tennis_backend.point_log import CATALOG_FILE, CREATE, POINT, RECORD, SEGMENT_PREFIX, PointLog, recover_registry
+
+
+def write_log(directory: str, points: int, matches: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    with open(os.path.join(directory, CATALOG_FILE), "w", encoding="utf-8") as catalog:
+        for number in range(1, matches + 1):
+            catalog.write(json.dumps({"number": number, "id": f"court-{number}",
+                                      "players": ["Alcaraz", "Sinner"], "first_server": 0}) + "\n")
+
+    seq = 0
+    with open(os.path.join(directory, f"{SEGMENT_PREFIX}{1:020d}.log"), "wb") as segment:
+        for number in range(1, matches + 1):
+            seq += 1
+            segment.write(RECORD.pack(seq, number, CREATE, 0))
+        # Written in chunks so the whole log never sits in memory at once
+        remaining = points
+        while remaining:
+            chunk = min(remaining, 1_000_000)
+            records = bytearray()
+            for _ in range(chunk):
+                seq += 1
+                records += RECORD.pack(seq, rng.randint(1, matches), POINT, rng.getrandbits(1))
+            segment.write(records)
+            remaining -= chunk
+
+
+def timed(action):
+    start = time.perf_counter()
+    result = action()
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=10_000_000)
+    parser.add_argument("--matches", type=int, default=40_000)
+    parser.add_argument("--tail", type=int, default=100_000, help="points after the snapshot")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        _, elapsed = timed(lambda: write_log(directory, args.points, args.matches))
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        print(f"log: {args.points:,} points over {args.matches:,} matches, {size / 1e6:.0f} MB "
+              f"(written in {elapsed:.1f}s)")
+
+        (_, replayed), elapsed = timed(lambda: recover_registry(directory))
+        print(f"full replay:      {elapsed:7.2f}s  {replayed / elapsed:12,.0f} records/s")
+
+        # Snapshot the recovered registry, score a tail on top and recover again
+        registry = MatchRegistry()
+        log = PointLog.open(directory, registry, snapshot_every=args.points + args.matches + args.tail + 1)
+        _, elapsed = timed(log.snapshot)
+        print(f"snapshot write:   {elapsed:7.2f}s")
+        rng = random.Random(1)
+        matches = list(registry)
+        for _ in range(args.tail):
+            rng.choice(matches).score(rng.getrandbits(1))
+        log.close()
+
+        (_, replayed), elapsed = timed(lambda: recover_registry(directory))
+        print(f"snapshot + tail:  {elapsed:7.2f}s  ({replayed:,} records replayed)")
+
+
+if __name__ == "__main__":
+    main()
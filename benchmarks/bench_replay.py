@@ -0,0 +1,69 @@
+"""
+Bulk replay benchmark.
+
+Writes --matches random best-of-five matches (the server winning
+--serve-win of points) as a JSONL point-by-point file, then replays it
+with each --workers count and engine, reporting matches/second and
+points/second. The file is generated once and reused.
+
+    python -m benchmarks.bench_replay --matches 200000 --workers 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from tennis_backend.match_state import NO_PLAYER, MatchState, score_point
+from tennis_backend.replay import ReplayStats, format_points, replay_file
+
+
+def random_match(rng: random.Random, serve_win: float) -> str:
+    state = MatchState(("", ""))
+    winners = []
+    while state.winner == NO_PLAYER:
+        server = state.server()
+        winner = server if rng.random() < serve_win else 1 - server
+        score_point(state, winner)
+        winners.append(winner)
+    return format_points(winners)
+
+
+def write_matches(path: str, matches: int, serve_win: float, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as out:
+        for number in range(matches):
+            out.write(json.dumps({"id": number, "server1": "Alcaraz", "server2": "Sinner",
+                                  "pbp": random_match(rng, serve_win)}) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=50_000)
+    parser.add_argument("--serve-win", type=float, default=0.64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--engines", nargs="+", default=["compact", "table"])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "matches.jsonl")
+        start = time.perf_counter()
+        write_matches(path, args.matches, args.serve_win)
+        size = os.path.getsize(path)
+        print(f"wrote {args.matches:,} matches ({size / 1e6:.1f} MB) in {time.perf_counter() - start:.1f} s")
+
+        for engine in args.engines:
+            for workers in args.workers:
+                stats = ReplayStats()
+                for result in replay_file(path, workers, args.chunk_size, engine):
+                    stats.add(result)
+                stats.stop()
+                print(f"{engine:8} {workers:2} workers: {stats.matches_per_second:9,.0f} matches/s "
+                      f"{stats.points / stats.elapsed:12,.0f} points/s")
+
+
+if __name__ == "__main__":
+    main()
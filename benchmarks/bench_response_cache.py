@@ -0,0 +1,116 @@
+"""
+Read-heavy traffic with and without the pre-encoded response cache.
+
+  * encoding: one player list through FastAPI's path (jsonable_encoder +
+    json.dumps), the standard json module, orjson (if installed) and a cache
+    hit, in microseconds per read;
+  * http: in-process requests over --matches matches, --read-share of them
+    GET /matches/{id}/players and the rest increments, in requests/second
+    and p50, best of --rounds interleaved rounds, in three modes:
+      - generic: no cache, every read through jsonable_encoder (as before
+        the cache existed);
+      - encode: no cache, every read encoded by the fast encoder;
+      - cache: bytes encoded once per match version.
+
+    python -m benchmarks.bench_response_cache --requests 20000 --read-share 0.95
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+
+import tennis_backend.main as main
+from tennis_backend.match_registry import Match
+from tennis_backend.response_cache import ResponseCache, orjson
+
+
+def _per_call(run, calls: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(calls):
+            run()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best * 1e6
+
+
+def encoding(calls: int) -> None:
+    match = Match("bench", ["Alcaraz", "Sinner"])
+    match.award_points([0, 1] * 30 + [0, 0])
+    cache = ResponseCache()
+    runs = {
+        "jsonable_encoder + json.dumps": lambda: json.dumps(jsonable_encoder(match.player_list()),
+                                                             ensure_ascii=False, separators=(",", ":")).encode(),
+        "json.dumps": lambda: json.dumps(match.player_list(), ensure_ascii=False, separators=(",", ":")).encode(),
+    }
+    if orjson is not None:
+        runs["orjson.dumps"] = lambda: orjson.dumps(match.player_list())
+    runs["cache hit"] = lambda: cache.players(match)
+    for label, run in runs.items():
+        print(f"{label:30} {_per_call(run, calls):7.2f} us/read")
+
+
+def _generic(value) -> bytes:
+    return json.dumps(jsonable_encoder(value), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+async def http(requests: int, matches: int, read_share: float, mode: str):
+    """(req/s, p50 us) for one round"""
+    saved_cache, saved_encode = main.response_cache, main.encode
+    if mode != "cache":
+        main.response_cache = None
+    if mode == "generic":
+        main.encode = _generic
+    rng = random.Random(0)
+    latencies = []
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+            ids = [(await client.post("/matches", json={"players": ["Alcaraz", "Sinner"]})).json()["id"]
+                   for _ in range(matches)]
+            start = time.perf_counter()
+            for _ in range(requests):
+                match_id = rng.choice(ids)
+                sent = time.perf_counter()
+                if rng.random() < read_share:
+                    await client.get(f"/matches/{match_id}/players")
+                else:
+                    await client.post(f"/matches/{match_id}/players/{rng.choice(['Alcaraz', 'Sinner'])}/increment")
+                latencies.append(time.perf_counter() - sent)
+            elapsed = time.perf_counter() - start
+            for match_id in ids:
+                await client.delete(f"/matches/{match_id}")
+    finally:
+        main.response_cache, main.encode = saved_cache, saved_encode
+    latencies.sort()
+    return requests / elapsed, latencies[len(latencies) // 2] * 1e6
+
+
+def main_() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--matches", type=int, default=100)
+    parser.add_argument("--read-share", type=float, default=0.95)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    encoding(args.calls)
+    if main.response_cache is None:
+        raise SystemExit("RESPONSE_CACHE is off; unset it to compare")
+
+    best = {}
+    for _ in range(args.rounds):
+        for mode in ("generic", "encode", "cache"):
+            throughput, p50 = asyncio.run(http(args.requests, args.matches, args.read_share, mode))
+            if throughput > best.get(mode, (0, 0))[0]:
+                best[mode] = (throughput, p50)
+    for mode, (throughput, p50) in best.items():
+        print(f"{mode:8} {throughput:8,.0f} req/s, p50 {p50:5.0f} us")
+
+
+if __name__ == "__main__":
+    main_()
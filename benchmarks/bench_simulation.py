@@ -0,0 +1,38 @@
+"""
+Monte Carlo benchmark: vectorized NumPy simulator vs the point-by-point loop.
+
+    python -m benchmarks.bench_simulation --matches 1000000
+"""
+
+import argparse
+import time
+
+from tennis_backend.match_state import MatchState
+from tennis_backend.simulation import simulate_match, simulate_match_loop
+
+
+def timed(simulate, state, matches):
+    start = time.perf_counter()
+    result = simulate(state, (0.65, 0.62), matches=matches, seed=1)
+    return result, matches / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=1_000_000, help="matches for the NumPy simulator")
+    parser.add_argument("--loop-matches", type=int, default=20_000, help="matches for the Python loop")
+    args = parser.parse_args()
+
+    state = MatchState(("Alcaraz", "Sinner"))
+    looped, loop_rate = timed(simulate_match_loop, state, args.loop_matches)
+    vectorized, numpy_rate = timed(simulate_match, state, args.matches)
+
+    print("From 0-0, serve points won 65% / 62%")
+    print(f"  Python loop : {loop_rate:12,.0f} matches/s  P(win) = {looped.win_probability:.4f}  ({args.loop_matches:,} matches)")
+    print(f"  NumPy       : {numpy_rate:12,.0f} matches/s  P(win) = {vectorized.win_probability:.4f}  ({args.matches:,} matches)")
+    print(f"  speed-up    : {numpy_rate / loop_rate:12.1f}x")
+    print("  set scores  : " + ", ".join(f"{sets} {p:.3f}" for sets, p in sorted(vectorized.set_scores.items())))
+
+
+if __name__ == "__main__":
+    main()
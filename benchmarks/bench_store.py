@@ -0,0 +1,75 @@
+"""
+SQLite store benchmark: a commit per request vs group commit.
+
+Runs N concurrent scorers, each on its own court, against the real
+/matches/{id}/players/{name}/increment endpoint in-process, with the API
+backed by a fresh SQLite database, and reports requests/second and how many
+transactions were committed.
+
+    python -m benchmarks.bench_store --seconds 3 --scorers 1 10 100
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+from tennis_backend import main
+from tennis_backend.match_store import SQLiteStore
+
+
+async def run(group_commit: bool, scorers: int, seconds: float, interval: float, directory: str) -> None:
+    path = os.path.join(directory, f"bench-{group_commit}-{scorers}.db")
+    store = SQLiteStore(path, group_commit=group_commit, commit_interval=interval)
+    main.store = store
+    main.registry.add_listener(store)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        courts = []
+        for _ in range(scorers):
+            response = await client.post("/matches", json={"players": ["Alcaraz", "Sinner"]})
+            courts.append(response.json()["id"])
+        commits_before = store.commits
+        deadline = time.perf_counter() + seconds
+        done = [0]
+
+        async def scorer(court: str) -> None:
+            while time.perf_counter() < deadline:
+                await client.post(f"/matches/{court}/players/Alcaraz/increment")
+                await client.post(f"/matches/{court}/players/Sinner/increment")
+                done[0] += 2
+
+        start = time.perf_counter()
+        await asyncio.gather(*[scorer(court) for court in courts])
+        elapsed = time.perf_counter() - start
+
+    commits = store.commits - commits_before
+    mode = "group commit" if group_commit else "per request"
+    print(f"{mode:13} {scorers:4} scorers: {done[0] / elapsed:9,.0f} req/s  "
+          f"{commits:7,} commits ({done[0] / max(commits, 1):6.1f} points/commit)")
+
+    main.registry.listeners.remove(store)
+    for court in courts:
+        main.registry.remove(court)
+    await store.close()
+
+
+def main_() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--scorers", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--interval", type=float, default=0.0, help="minimum seconds between group commits")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for scorers in args.scorers:
+            for group_commit in (False, True):
+                asyncio.run(run(group_commit, scorers, args.seconds, args.interval, directory))
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,243 @@
+"""
+Benchmark suite with a regression gate.
+
+Two groups of metrics:
+  * scoring: award_point_to_player (and the compact and table engines) over
+    representative point sequences: love games, long deuce battles,
+    tiebreaks and a full five-setter, in nanoseconds per point (setting up
+    the start score included);
+  * http: every main.py route called through an in-process ASGI transport,
+    in requests/second and p50/p99 latency.
+
+    python -m benchmarks.bench_suite                              # print results
+    python -m benchmarks.bench_suite --save baseline.json          # store them
+    python -m benchmarks.bench_suite --compare baseline.json       # exit 1 on regression
+
+A tracked metric regresses when it is worse than the baseline by more than
+--threshold (default 15%); p99 latencies are reported but not tracked, as
+they are too noisy on a shared machine.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from tennis_backend.match_state import MatchState, score_point
+from tennis_backend.tennis_game import award_point_to_player
+from tennis_backend.transition_table import score_point_table
+
+DEFAULT_THRESHOLD = 0.15
+
+
+class Metric(NamedTuple):
+    value: float
+    unit: str
+    higher_is_better: bool
+    tracked: bool = True
+
+
+# Scoring scenarios: (start score, point winners)
+
+def _five_setter() -> List[int]:
+    """A seeded even match that goes the full five sets"""
+    for seed in range(1000):
+        rng = random.Random(seed)
+        state = MatchState(("Alcaraz", "Sinner"))
+        winners = []
+        while state.winner < 0:
+            winner = rng.randint(0, 1)
+            winners.append(winner)
+            score_point(state, winner)
+        if len(state.sets) == 10:
+            return winners
+    raise RuntimeError("no five-setter found")
+
+
+SCENARIOS: Dict[str, Tuple[List[int], List[int]]] = {
+    "love_game": ([0, 0, 0, 0, 0, 0], [0, 0, 0, 0]),
+    "deuce_battle": ([0, 0, 0, 0, 0, 0], [0, 1, 0, 1, 0, 1] + [0, 1] * 20 + [0, 0]),
+    "tiebreak": ([0, 0, 6, 6, 0, 0], [0, 1] * 8 + [1, 1]),
+    "five_setter": ([0, 0, 0, 0, 0, 0], _five_setter()),
+}
+
+
+def _start_state(score: Sequence[int]) -> MatchState:
+    state = MatchState(("Alcaraz", "Sinner"))
+    state.score = list(score)
+    return state
+
+
+def _time_per_point(run: Callable[[], None], points: int, budget: float) -> float:
+    """Best-of-five nanoseconds per point, each round repeating run() for about budget/5 seconds"""
+    start = time.perf_counter()
+    run()
+    repeats = max(1, int(budget / 5 / max(time.perf_counter() - start, 1e-7)))
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            run()
+        best = min(best, (time.perf_counter() - start) / repeats)
+    return best / points * 1e9
+
+
+def scoring_metrics(budget: float = 0.5) -> Dict[str, Metric]:
+    metrics = {}
+    for name, (score, winners) in SCENARIOS.items():
+        template = _start_state(score)
+        players = template.to_players()
+
+        def run_dicts(players=players, winners=winners):
+            current = [dict(players[0], sets=list(players[0]["sets"])), dict(players[1], sets=list(players[1]["sets"]))]
+            for winner in winners:
+                current[winner], current[1 - winner] = award_point_to_player(current[winner], current[1 - winner])
+
+        def engine_runner(engine, template=template, winners=winners):
+            def run():
+                state = template.copy()
+                for winner in winners:
+                    engine(state, winner)
+            return run
+
+        for engine_name, run in (("award_point_to_player", run_dicts),
+                                 ("score_point", engine_runner(score_point)),
+                                 ("score_point_table", engine_runner(score_point_table))):
+            ns = _time_per_point(run, len(winners), budget)
+            metrics[f"scoring.{engine_name}.{name}"] = Metric(ns, "ns/point", higher_is_better=False)
+    return metrics
+
+
+# HTTP routes: (name, method, path, JSON body); {match} is a fresh match per route
+
+ROUTES: List[Tuple[str, str, str, Optional[dict]]] = [
+    ("root", "GET", "/", None),
+    ("get_players", "GET", "/players", None),
+    ("get_player", "GET", "/players/Alcaraz", None),
+    ("increment", "POST", "/players/Alcaraz/increment", None),
+    ("add_points", "POST", "/players/points", {"winners": "ABAB"}),
+    ("reset", "POST", "/players/reset", None),
+    ("create_match", "POST", "/matches", {"players": ["Alcaraz", "Sinner"]}),
+    ("get_match", "GET", "/matches/{match}", None),
+    ("get_match_players", "GET", "/matches/{match}/players", None),
+    ("get_match_player", "GET", "/matches/{match}/players/Sinner", None),
+    ("increment_match", "POST", "/matches/{match}/players/Sinner/increment", None),
+    ("add_match_points", "POST", "/matches/{match}/points", {"winners": "ABAB"}),
+    ("reset_match", "POST", "/matches/{match}/reset", None),
+    ("undo_match", "POST", "/matches/{match}/undo", None),
+    ("win_probability", "GET", "/matches/{match}/win-probability", None),
+]
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def _http_metrics(requests: int) -> Dict[str, Metric]:
+    import httpx
+
+    from tennis_backend.main import app, registry
+
+    metrics = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, method, path, body in ROUTES:
+            match = (await client.post("/matches", json={"players": ["Alcaraz", "Sinner"]})).json()["id"]
+            url = path.format(match=match)
+            if name == "undo_match":
+                # Something to undo for every request
+                await client.post(f"/matches/{match}/points", json={"winners": "AB" * (requests // 2 + 60)})
+
+            for _ in range(min(50, requests)):  # warm-up
+                await client.request(method, url, json=body)
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(requests):
+                sent = time.perf_counter()
+                response = await client.request(method, url, json=body)
+                latencies.append(time.perf_counter() - sent)
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{method} {url} answered {response.status_code}")
+            elapsed = time.perf_counter() - start
+
+            latencies.sort()
+            metrics[f"http.{name}.throughput"] = Metric(requests / elapsed, "req/s", higher_is_better=True)
+            metrics[f"http.{name}.p50"] = Metric(_percentile(latencies, 0.5) * 1e6, "us", higher_is_better=False)
+            metrics[f"http.{name}.p99"] = Metric(_percentile(latencies, 0.99) * 1e6, "us", higher_is_better=False,
+                                                 tracked=False)
+            # Don't let created matches pile up between routes
+            for created in list(registry):
+                if created.match_id != "default":
+                    registry.remove(created.match_id)
+    return metrics
+
+
+def http_metrics(requests: int = 500) -> Dict[str, Metric]:
+    return asyncio.run(_http_metrics(requests))
+
+
+# Results files and the regression gate
+
+def to_json(metrics: Dict[str, Metric]) -> Dict:
+    return {"metrics": {name: metric._asdict() for name, metric in sorted(metrics.items())}}
+
+
+def from_json(data: Dict) -> Dict[str, Metric]:
+    return {name: Metric(**fields) for name, fields in data["metrics"].items()}
+
+
+def compare(baseline: Dict[str, Metric], current: Dict[str, Metric],
+            threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """One line per tracked metric that got worse than baseline by more than threshold"""
+    regressions = []
+    for name, old in sorted(baseline.items()):
+        new = current.get(name)
+        if new is None or not old.tracked or old.value <= 0:
+            continue
+        change = (new.value - old.value) / old.value
+        worse = -change if old.higher_is_better else change
+        if worse > threshold:
+            regressions.append(f"{name}: {old.value:,.1f} -> {new.value:,.1f} {new.unit} ({worse:+.0%} worse)")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", choices=["scoring", "http"], help="run one group of benchmarks")
+    parser.add_argument("--requests", type=int, default=500, help="requests per route")
+    parser.add_argument("--budget", type=float, default=0.5, help="seconds per scoring benchmark")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    metrics: Dict[str, Metric] = {}
+    if args.only in (None, "scoring"):
+        metrics.update(scoring_metrics(args.budget))
+    if args.only in (None, "http"):
+        metrics.update(http_metrics(args.requests))
+
+    width = max(len(name) for name in metrics)
+    for name, metric in sorted(metrics.items()):
+        print(f"{name:{width}}  {metric.value:12,.1f} {metric.unit}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as handle:
+            json.dump(to_json(metrics), handle, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            regressions = compare(from_json(json.load(handle)), metrics, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Timeline benchmark: latency of "score after point N" queries against match
+length and checkpoint spacing.
+
+For each match length (points scored in one match; past the end of a real
+match scoring carries on into further sets) and each --every spacing,
+times Match.state_at at random earlier points, next to a full replay from
+0-0 (what answering the query cost without a timeline). Also reports the
+timeline's memory per match and its cost per point scored (over whole
+matches, reset once won).
+
+    python -m benchmarks.bench_timeline --lengths 100 300 1000 10000 --every 8 32 128
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from tennis_backend.match_registry import Match
+from tennis_backend.match_state import NO_PLAYER, MatchState, score_point
+
+
+def per_call(run, calls: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(calls):
+            run()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best * 1e6
+
+
+def timeline_bytes(match: Match) -> int:
+    winners, checkpoints, _ = match.timeline.buffers
+    size = sys.getsizeof(winners) + sys.getsizeof(checkpoints)
+    for score, _, _, sets, _ in checkpoints[1:]:
+        size += sys.getsizeof(score) + sys.getsizeof(sets) + 5 * 8 + 56  # tuple header and slots
+    return size
+
+
+def scoring_cost(every: int, points: int, rng: random.Random) -> float:
+    winners = [rng.randint(0, 1) for _ in range(points)]
+    match = Match("bench", ["Alcaraz", "Sinner"], checkpoint_every=every, history_depth=0)
+    start = time.perf_counter()
+    for winner in winners:
+        match.score(winner)
+        if match.state.winner != NO_PLAYER:
+            match.reset()
+    return (time.perf_counter() - start) / points * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 300, 1000, 10_000])
+    parser.add_argument("--every", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    print(f"{'points':>7} {'every':>6} {'query us':>9} {'replay us':>10} {'timeline bytes':>15}")
+    for length in args.lengths:
+        winners = [rng.randint(0, 1) for _ in range(length)]
+        queries = [rng.randint(0, length) for _ in range(args.queries)]
+
+        def full_replay():
+            state = MatchState(("Alcaraz", "Sinner"))
+            for winner in winners[:rng.choice(queries)]:
+                score_point(state, winner)
+
+        replay = per_call(full_replay, max(20, args.queries // max(1, length // 100)))
+        for every in args.every:
+            match = Match("bench", ["Alcaraz", "Sinner"], checkpoint_every=every, history_depth=0)
+            for winner in winners:
+                match.score(winner)
+            query = per_call(lambda: match.state_at(rng.choice(queries)), args.queries)
+            print(f"{length:7} {every:6} {query:9.2f} {replay:10.1f} {timeline_bytes(match):15,}")
+
+    print()
+    for every in args.every:
+        print(f"every {every:4}: {scoring_cost(every, 100_000, rng):6.0f} ns per point scored (Match.score)")
+    print(f"no timeline: {scoring_cost(0, 100_000, rng):6.0f} ns per point scored (Match.score)")
+
+
+if __name__ == "__main__":
+    main()
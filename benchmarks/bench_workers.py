@@ -0,0 +1,119 @@
+"""
+Multi-worker benchmark for the shared-memory backend.
+
+Starts uvicorn with --workers N (N = 1, 2, 4, 8) and SHARED_STATE set, has
+several client processes hammer POST /matches/{id}/players/{name}/increment
+and GET /matches/{id}/players over a set of courts, and reports
+requests/second per worker count. Afterwards it checks that every worker
+sees the same version of every court.
+
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --seconds 5
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+from tennis_backend.shared_state import SharedMatchTable
+
+PORT = 8765
+
+
+def wait_until_up(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("uvicorn did not start")
+
+
+async def client_loop(base_url: str, courts, seconds: float, connections: int, seed: int) -> int:
+    rng = random.Random(seed)
+    done = 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=connections)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        async def worker():
+            nonlocal done
+            while time.perf_counter() < deadline:
+                court = rng.choice(courts)
+                if rng.random() < 0.5:
+                    await client.post(f"/matches/{court}/players/{rng.choice(['Alcaraz', 'Sinner'])}/increment")
+                else:
+                    await client.get(f"/matches/{court}/players")
+                done += 1
+
+        await asyncio.gather(*[worker() for _ in range(connections)])
+    return done
+
+
+def client_process(base_url, courts, seconds, connections, seed, results):
+    results.put(asyncio.run(client_loop(base_url, courts, seconds, connections, seed)))
+
+
+def run(workers: int, seconds: float, clients: int, connections: int, courts_count: int) -> None:
+    name = f"tennis-bench-{uuid.uuid4().hex[:8]}"
+    env = dict(os.environ, SHARED_STATE=name)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "tennis_backend.main:app", "--port", str(PORT),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{PORT}"
+    try:
+        wait_until_up(base_url + "/")
+        courts = []
+        for _ in range(courts_count):
+            courts.append(httpx.post(base_url + "/matches", json={"players": ["Alcaraz", "Sinner"]}).json()["id"])
+
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=client_process,
+                                             args=(base_url, courts, seconds, connections, seed, results))
+                     for seed in range(clients)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        total = sum(results.get() for _ in processes)
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+
+        # Every worker must answer with the same version for a court
+        versions = {httpx.get(f"{base_url}/matches/{courts[0]}/players").headers["x-match-version"]
+                    for _ in range(4 * workers)}
+        print(f"{workers} workers: {total / elapsed:9,.0f} req/s  (versions seen for one court: {sorted(versions)})")
+    finally:
+        server.terminate()
+        server.wait()
+        table = SharedMatchTable(name)
+        table.unlink()
+        table.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--clients", type=int, default=4, help="load-generating processes")
+    parser.add_argument("--connections", type=int, default=16, help="concurrent requests per client process")
+    parser.add_argument("--courts", type=int, default=32)
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} CPUs available")
+    for workers in args.workers:
+        run(workers, args.seconds, args.clients, args.connections, args.courts)
+
+
+if __name__ == "__main__":
+    main()
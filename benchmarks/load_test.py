@@ -0,0 +1,206 @@
+"""
+Load generator: many courtside scorers and spectators at once.
+
+Spawns N virtual scorers spread over M matches. Each scorer awards points
+at --rate points/second through the increment endpoint and resets its match
+once somebody wins it; --spectators virtual spectators poll their match's
+players at --poll-rate. At the end it prints, per route, the number of
+requests, error rate, throughput and latency percentiles.
+
+    python -m benchmarks.load_test --in-process --scorers 1000 --matches 250 --duration 30
+    python -m benchmarks.load_test --url http://localhost:8000 --scorers 200 --matches 50
+
+--legacy drives the original single-match routes instead (POST
+/players/{name}/increment, POST /players/reset, GET /players).
+"""
+
+import argparse
+import asyncio
+import importlib
+import random
+import sys
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import httpx
+
+PLAYERS = ("Alcaraz", "Sinner")
+
+
+class RouteStats(NamedTuple):
+    route: str
+    requests: int
+    errors: int
+    throughput: float   # requests/second over the whole run
+    p50: float          # milliseconds
+    p90: float
+    p99: float
+    max: float
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+
+class Recorder:
+    """Latencies and errors per route template"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    async def call(self, client: httpx.AsyncClient, route: str, method: str, url: str,
+                   headers: Optional[Dict[str, str]] = None) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, headers=headers)
+        except httpx.HTTPError:
+            response = None
+        self.latencies.setdefault(route, []).append(time.perf_counter() - start)
+        if response is None or response.status_code >= 400:
+            self.errors[route] = self.errors.get(route, 0) + 1
+        return response
+
+    def report(self, duration: float) -> List[RouteStats]:
+        stats = []
+        for route, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            count = len(latencies)
+
+            def percentile(fraction: float) -> float:
+                return latencies[min(count - 1, int(fraction * count))] * 1000
+
+            stats.append(RouteStats(route, count, self.errors.get(route, 0), count / duration,
+                                    percentile(0.5), percentile(0.9), percentile(0.99), latencies[-1] * 1000))
+        return stats
+
+
+def _routes(legacy: bool) -> Dict[str, str]:
+    if legacy:
+        return {"increment": "/players/{player}/increment", "reset": "/players/reset", "players": "/players"}
+    return {"increment": "/matches/{match}/players/{player}/increment", "reset": "/matches/{match}/reset",
+            "players": "/matches/{match}/players"}
+
+
+async def _paced(rate: float, deadline: float, rng: random.Random, action) -> None:
+    """Call action about rate times a second until deadline, starting at a random offset"""
+    interval = 1.0 / rate
+    next_at = time.perf_counter() + rng.random() * interval
+    while True:
+        now = time.perf_counter()
+        if next_at >= deadline:
+            return
+        if next_at > now:
+            await asyncio.sleep(next_at - now)
+        await action()
+        # Fixed schedule: a slow response does not push later requests back
+        next_at = max(next_at + interval, time.perf_counter() - interval)
+
+
+async def scorer(client, recorder, routes, match, rate, deadline, rng) -> None:
+    async def award():
+        player = rng.choice(PLAYERS)
+        response = await recorder.call(client, routes["increment"], "POST",
+                                       routes["increment"].format(match=match, player=player))
+        if response is not None and response.status_code == 200 and response.json().get("winner"):
+            await recorder.call(client, routes["reset"], "POST", routes["reset"].format(match=match))
+
+    await _paced(rate, deadline, rng, award)
+
+
+async def spectator(client, recorder, routes, match, rate, deadline, rng, etag: bool) -> None:
+    headers: Dict[str, str] = {}
+
+    async def poll():
+        response = await recorder.call(client, routes["players"], "GET", routes["players"].format(match=match),
+                                       headers=headers)
+        if etag and response is not None and "etag" in response.headers:
+            headers["If-None-Match"] = response.headers["etag"]
+
+    await _paced(rate, deadline, rng, poll)
+
+
+async def run(client: httpx.AsyncClient, scorers: int, matches: int, spectators: int, rate: float,
+              poll_rate: float, duration: float, legacy: bool = False, etag: bool = False,
+              seed: int = 0) -> List[RouteStats]:
+    """Drive the load through client and return per-route statistics"""
+    rng = random.Random(seed)
+    routes = _routes(legacy)
+    recorder = Recorder()
+
+    if legacy:
+        match_ids = ["default"]
+    else:
+        match_ids = []
+        for _ in range(matches):
+            response = await client.post("/matches", json={"players": list(PLAYERS)})
+            response.raise_for_status()
+            match_ids.append(response.json()["id"])
+
+    start = time.perf_counter()
+    deadline = start + duration
+    tasks = [scorer(client, recorder, routes, match_ids[i % len(match_ids)], rate, deadline,
+                    random.Random(rng.random())) for i in range(scorers)]
+    tasks += [spectator(client, recorder, routes, match_ids[i % len(match_ids)], poll_rate, deadline,
+                        random.Random(rng.random()), etag) for i in range(spectators)]
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    if not legacy:
+        for match_id in match_ids:
+            await client.delete(f"/matches/{match_id}")
+    return recorder.report(elapsed)
+
+
+def load_app(path: str):
+    module, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module), attribute or "app")
+
+
+def print_report(stats: Sequence[RouteStats]) -> None:
+    print(f"{'route':46} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p90 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8}")
+    for row in stats:
+        print(f"{row.route:46} {row.requests:9,} {row.error_rate:7.2%} {row.throughput:9,.0f} {row.p50:8.2f} "
+              f"{row.p90:8.2f} {row.p99:8.2f} {row.max:8.2f}")
+    total = sum(row.requests for row in stats)
+    errors = sum(row.errors for row in stats)
+    print(f"{'total':46} {total:9,} {errors / max(total, 1):7.2%} {sum(row.throughput for row in stats):9,.0f}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://localhost:8000", help="server to load")
+    target.add_argument("--in-process", action="store_true", help="call the ASGI app directly, no network")
+    parser.add_argument("--app", default="tennis_backend.main:app", help="ASGI app for --in-process")
+    parser.add_argument("--scorers", type=int, default=100)
+    parser.add_argument("--matches", type=int, default=25)
+    parser.add_argument("--spectators", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=0.5, help="points per second per scorer")
+    parser.add_argument("--poll-rate", type=float, default=1.0, help="polls per second per spectator")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--legacy", action="store_true", help="use the single-match /players routes")
+    parser.add_argument("--etag", action="store_true", help="spectators send If-None-Match")
+    parser.add_argument("--connections", type=int, default=100, help="HTTP connection pool size (--url)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.in_process:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=load_app(args.app)), base_url="http://load")
+    else:
+        limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30.0)
+
+    async def go():
+        async with client:
+            return await run(client, args.scorers, args.matches, args.spectators, args.rate, args.poll_rate,
+                             args.duration, args.legacy, args.etag, args.seed)
+
+    stats = asyncio.run(go())
+    print_report(stats)
+    return 1 if any(row.errors for row in stats) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
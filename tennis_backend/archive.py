@@ -0,0 +1,466 @@
+"""
+Columnar archive for finished matches.
+
+A won match in the registry carries its whole live machinery (state, undo
+history, stats, timeline, lock). Once nobody is scoring it any more,
+MatchArchiver moves it into a MatchArchive, where it is one row across a
+set of fixed-width columns:
+
+    player0, player1   u32  index into the player name table (dictionary encoded)
+    finished           u32  unix seconds the match was won
+    flags              u8   winner, first server, points known, number of sets
+    format             u8   index into the match format table
+    sets               u64  up to 7 sets, one byte per set: games of each player in a nibble
+    point_count        u16  points played
+
+plus two variable-width blobs: the match IDs (length-prefixed) and the
+point winners, one bit per point, from the match's timeline. A
+best-of-five match takes about 80 bytes in all.
+
+Queries by player read a per-player list of row numbers, and queries by
+date bisect the finished column (rows are appended in the order matches
+finish), so neither decodes rows outside the answer; point winners are only
+unpacked for the match asked for.
+
+With a directory, every column is a file that rows are appended to
+(native byte order) and flush() makes them durable. A torn write at the
+end is cut back to the last complete row on load.
+"""
+
+import bisect
+import json
+import os
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from tennis_backend.match_format import parse_format
+from tennis_backend.match_registry import Match, MatchListener, MatchRegistry
+from tennis_backend.match_state import MATCH_WON, NO_PLAYER
+
+MAX_ARCHIVED_SETS = 7     # a u64 of one-byte sets
+MAX_ID_BYTES = 255        # length prefix is one byte
+MAX_POINTS = 0xFFFF
+
+_WINNER = 1               # flags: player 1 won (else player 0)
+_FIRST_SERVER = 2         # flags: player 1 served first
+_POINTS_KNOWN = 4         # flags: point winners recorded from 0-0
+_SETS_SHIFT = 3           # flags: number of sets in bits 3-5
+
+# Point winners as bytes of 0/1 <-> ASCII bits, for packing with int()
+_TO_BITS = bytes.maketrans(b"\x00\x01", b"01")
+_FROM_BITS = bytes.maketrans(b"01", b"\x00\x01")
+
+# (file name, array typecode) of each fixed-width column
+_COLUMNS = (
+    ("player0", "I"), ("player1", "I"), ("finished", "I"), ("flags", "B"), ("format", "B"), ("sets", "Q"),
+    ("point_count", "H"),
+)
+
+
+class ArchivedMatch(NamedTuple):
+    row: int
+    id: str
+    players: Tuple[str, str]
+    winner: int
+    first_server: int
+    format: str                        # MatchFormat key
+    sets: List[Tuple[int, int]]
+    finished_at: int                   # unix seconds
+    point_count: int
+    points_known: bool                 # False if the match was loaded mid-way and its first points are unknown
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "players": list(self.players),
+            "winner": self.players[self.winner],
+            "first_server": self.players[self.first_server],
+            "format": parse_format(self.format).to_dict(),
+            "sets": [list(games) for games in self.sets],
+            "finished_at": datetime.fromtimestamp(self.finished_at, timezone.utc).isoformat(),
+            "points": self.point_count if self.points_known else None,
+        }
+
+
+def pack_points(winners: bytes) -> bytes:
+    """Point winners (bytes of 0/1) as a bit array, first point in the highest bit"""
+    if not winners:
+        return b""
+    return int(winners.translate(_TO_BITS), 2).to_bytes((len(winners) + 7) // 8, "big")
+
+
+def unpack_points(packed: bytes, count: int) -> bytes:
+    if not count:
+        return b""
+    return format(int.from_bytes(packed, "big"), f"0{count}b").encode().translate(_FROM_BITS)
+
+
+def pack_sets(sets: bytes) -> int:
+    """Finished sets (player 0 games, player 1 games, ...) as one byte per set, two nibbles"""
+    packed = 0
+    for index in range(0, len(sets), 2):
+        packed |= (sets[index] << 4 | sets[index + 1]) << (index * 4)
+    return packed
+
+
+def unpack_sets(packed: int, count: int) -> List[Tuple[int, int]]:
+    return [((packed >> (index * 8 + 4)) & 15, (packed >> (index * 8)) & 15) for index in range(count)]
+
+
+class MatchArchive:
+    """Finished matches as rows of fixed-width columns; in memory only without a directory"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.columns: Dict[str, array] = {name: array(code) for name, code in _COLUMNS}
+        self.ids = bytearray()              # length-prefixed match IDs
+        self.id_ends = array("Q")           # end of each row's ID in ids
+        self.points = bytearray()           # bit-packed point winners
+        self.point_ends = array("Q")        # end of each row's points in points
+        self.names: List[str] = []          # player name table
+        self.name_index: Dict[str, int] = {}
+        self.formats: List[str] = []        # format key table
+        self.format_index: Dict[str, int] = {}
+        self.rows_by_player: Dict[int, array] = {}
+        self.in_order = True                # finished is non-decreasing, so date ranges can bisect it
+        self._saved = 0                     # rows already written to the directory
+        self._saved_names = 0
+        self._saved_formats = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.columns["flags"])
+
+    # Adding
+
+    def add(self, match: Match, finished_at: float) -> int:
+        """Append a won match; returns its row. Raises ValueError if it does not fit the columns"""
+        state = match.state
+        if state.winner == NO_PLAYER:
+            raise ValueError(f"Match {match.match_id} has no winner yet")
+        timeline = match.timeline
+        known = timeline is not None and timeline.from_start
+        return self.add_result(match.match_id, state.names, state.winner, match.first_server, match.format.key,
+                               state.sets, finished_at, timeline.winners() if known else None)
+
+    def add_result(self, match_id: str, players: Sequence[str], winner: int, first_server: int, format_key: str,
+                   sets: bytes, finished_at: float, winners: Optional[bytes] = None) -> int:
+        """Append one finished match from its parts; winners are the point winners (0/1 bytes) if known"""
+        encoded_id = match_id.encode()
+        if len(encoded_id) > MAX_ID_BYTES:
+            raise ValueError(f"Archived match IDs are limited to {MAX_ID_BYTES} bytes")
+        if len(sets) > 2 * MAX_ARCHIVED_SETS or any(games > 15 for games in sets):
+            raise ValueError(f"Archived matches hold at most {MAX_ARCHIVED_SETS} sets of at most 15 games")
+        if winners is not None and len(winners) > MAX_POINTS:
+            winners = None  # too long to count in a u16: keep the score, drop the points
+
+        row = len(self)
+        columns = self.columns
+        finished = int(finished_at)
+        if row and finished < columns["finished"][-1]:
+            self.in_order = False
+        for side, name in enumerate(players):
+            index = self._intern(name)
+            columns["player0" if side == 0 else "player1"].append(index)
+            rows = self.rows_by_player.setdefault(index, array("I"))
+            if not rows or rows[-1] != row:  # a player can't meet themselves, but be safe
+                rows.append(row)
+        columns["finished"].append(finished)
+        columns["flags"].append(winner * _WINNER | first_server * _FIRST_SERVER
+                                | (_POINTS_KNOWN if winners is not None else 0)
+                                | (len(sets) // 2) << _SETS_SHIFT)
+        format_index = self.format_index.get(format_key)
+        if format_index is None:
+            format_index = self.format_index[format_key] = len(self.formats)
+            self.formats.append(format_key)
+        columns["format"].append(format_index)
+        columns["sets"].append(pack_sets(sets))
+        columns["point_count"].append(len(winners) if winners is not None else 0)
+        self.ids += bytes([len(encoded_id)]) + encoded_id
+        self.id_ends.append(len(self.ids))
+        self.points += pack_points(winners or b"")
+        self.point_ends.append(len(self.points))
+        return row
+
+    def _intern(self, name: str) -> int:
+        index = self.name_index.get(name)
+        if index is None:
+            index = self.name_index[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    # Reading
+
+    def row(self, row: int) -> ArchivedMatch:
+        """One row's fixed columns and ID (not its points)"""
+        columns = self.columns
+        flags = columns["flags"][row]
+        id_end = self.id_ends[row]
+        id_start = self.id_ends[row - 1] if row else 0
+        names = self.names
+        return ArchivedMatch(
+            row, self.ids[id_start + 1:id_end].decode(),
+            (names[columns["player0"][row]], names[columns["player1"][row]]),
+            flags & _WINNER, (flags & _FIRST_SERVER) >> 1, self.formats[columns["format"][row]],
+            unpack_sets(columns["sets"][row], flags >> _SETS_SHIFT), columns["finished"][row],
+            columns["point_count"][row], bool(flags & _POINTS_KNOWN))
+
+    def point_winners(self, row: int) -> Optional[bytes]:
+        """Every point's winner (bytes of 0/1) of a row, None if they were not recorded"""
+        if not self.columns["flags"][row] & _POINTS_KNOWN:
+            return None
+        start = self.point_ends[row - 1] if row else 0
+        return unpack_points(self.points[start:self.point_ends[row]], self.columns["point_count"][row])
+
+    def find(self, match_id: str) -> Optional[int]:
+        """Row of match_id (the newest, if archived more than once)"""
+        needle = bytes([len(match_id.encode())]) + match_id.encode()
+        ids, ends = self.ids, self.id_ends
+        position = ids.rfind(needle)
+        while position >= 0:
+            row = bisect.bisect_right(ends, position)
+            start = ends[row - 1] if row else 0
+            # A real hit starts at a row's length prefix and covers the whole ID
+            if start == position and ends[row] == position + len(needle):
+                return row
+            position = ids.rfind(needle, 0, position + len(needle) - 1)
+        return None
+
+    def query(self, player: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None) -> Iterator[ArchivedMatch]:
+        """Matches with player that finished in [since, until), oldest first"""
+        finished = self.columns["finished"]
+        start, stop = 0, len(self)
+        if self.in_order:
+            if since is not None:
+                start = bisect.bisect_left(finished, int(since))
+            if until is not None:
+                stop = bisect.bisect_left(finished, _ceil(until))
+        if player is not None:
+            index = self.name_index.get(player)
+            if index is None:
+                return
+            rows = self.rows_by_player[index]
+            candidates = rows[bisect.bisect_left(rows, start):bisect.bisect_left(rows, stop)]
+        else:
+            candidates = range(start, stop)
+        for row in candidates:
+            if not self.in_order and not _in_range(finished[row], since, until):
+                continue
+            yield self.row(row)
+
+    def scan(self, predicate: Callable[[ArchivedMatch], bool]) -> Iterator[ArchivedMatch]:
+        """Every row that satisfies predicate, decoding each row once"""
+        return (match for match in map(self.row, range(len(self))) if predicate(match))
+
+    # Persistence
+
+    def size_bytes(self) -> int:
+        """Bytes the archive's columns take (what a directory holds, give or take the ID prefixes)"""
+        fixed = sum(column.itemsize * len(column) for column in self.columns.values())
+        return fixed + len(self.ids) + len(self.points) + sum(len(name.encode()) + 1 for name in self.names)
+
+    def flush(self) -> None:
+        """Append the rows added since the last flush to the directory's files and sync them"""
+        if self.directory is None or self._saved == len(self):
+            return
+        start = self._saved
+        self._append_lines("names.jsonl", self.names[self._saved_names:])
+        self._append_lines("formats.jsonl", self.formats[self._saved_formats:])
+        for name, _ in _COLUMNS:
+            with open(self._path(f"{name}.col"), "ab") as handle:
+                self.columns[name][start:].tofile(handle)
+                _sync(handle)
+        with open(self._path("ids.dat"), "ab") as handle:
+            handle.write(self.ids[self.id_ends[start - 1] if start else 0:])
+            _sync(handle)
+        with open(self._path("points.dat"), "ab") as handle:
+            handle.write(self.points[self.point_ends[start - 1] if start else 0:])
+            _sync(handle)
+        self._saved, self._saved_names, self._saved_formats = len(self), len(self.names), len(self.formats)
+
+    def _append_lines(self, name: str, values: List[str]) -> None:
+        if values:
+            with open(self._path(name), "a", encoding="utf-8") as handle:
+                handle.writelines(json.dumps(value) + "\n" for value in values)
+                _sync(handle)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self) -> None:
+        for name, table, index in (("names.jsonl", self.names, self.name_index),
+                                   ("formats.jsonl", self.formats, self.format_index)):
+            if os.path.exists(self._path(name)):
+                with open(self._path(name), encoding="utf-8") as handle:
+                    for line in handle:
+                        if line.endswith("\n"):
+                            index[json.loads(line)] = len(table)
+                            table.append(json.loads(line))
+
+        columns: Dict[str, array] = {}
+        for name, code in _COLUMNS:
+            column = array(code)
+            path = self._path(f"{name}.col")
+            if os.path.exists(path):
+                with open(path, "rb") as handle:
+                    data = handle.read()
+                column.frombytes(data[:len(data) - len(data) % column.itemsize])
+            columns[name] = column
+        ids = self._read("ids.dat")
+        points = self._read("points.dat")
+
+        # Replay the variable-width blobs; a row is complete only if every column has it
+        rows = min(len(column) for column in columns.values())
+        id_end = point_end = 0
+        for row in range(rows):
+            if id_end >= len(ids) or id_end + 1 + ids[id_end] > len(ids):
+                rows = row
+                break
+            next_points = point_end + (columns["point_count"][row] + 7) // 8 \
+                if columns["flags"][row] & _POINTS_KNOWN else point_end
+            if next_points > len(points) or columns["player0"][row] >= len(self.names) \
+                    or columns["player1"][row] >= len(self.names) or columns["format"][row] >= len(self.formats):
+                rows = row
+                break
+            id_end += 1 + ids[id_end]
+            point_end = next_points
+            self.id_ends.append(id_end)
+            self.point_ends.append(point_end)
+        self.ids = bytearray(ids[:id_end])
+        self.points = bytearray(points[:point_end])
+        for name, _ in _COLUMNS:
+            self.columns[name] = columns[name][:rows]
+
+        finished = self.columns["finished"]
+        self.in_order = all(finished[row - 1] <= finished[row] for row in range(1, rows))
+        for row in range(rows):
+            for side in ("player0", "player1"):
+                self.rows_by_player.setdefault(self.columns[side][row], array("I")).append(row)
+        self._saved, self._saved_names, self._saved_formats = rows, len(self.names), len(self.formats)
+        self._rewrite_if_torn()
+
+    def _read(self, name: str) -> bytes:
+        path = self._path(name)
+        if not os.path.exists(path):
+            return b""
+        with open(path, "rb") as handle:
+            return handle.read()
+
+    def _rewrite_if_torn(self) -> None:
+        """Cut every file back to the complete rows, so later appends line up"""
+        rows = len(self)
+        for name, _ in _COLUMNS:
+            _truncate(self._path(f"{name}.col"), rows * self.columns[name].itemsize)
+        _truncate(self._path("ids.dat"), len(self.ids))
+        _truncate(self._path("points.dat"), len(self.points))
+
+
+def _ceil(value: float) -> int:
+    whole = int(value)
+    return whole if whole == value else whole + 1
+
+
+def _in_range(finished: int, since: Optional[float], until: Optional[float]) -> bool:
+    return (since is None or finished >= since) and (until is None or finished < until)
+
+
+def _sync(handle) -> None:
+    handle.flush()
+    os.fsync(handle.fileno())
+
+
+def _truncate(path: str, size: int) -> None:
+    if os.path.exists(path) and os.path.getsize(path) > size:
+        with open(path, "r+b") as handle:
+            handle.truncate(size)
+
+
+class MatchArchiver(MatchListener):
+    """
+    Moves won matches out of the registry into an archive once they have
+    been finished for `after` seconds, so the final point can still be
+    undone and spectators still see the result for a while. sweep() does
+    the moving; the registry's other listeners see an ordinary removal.
+    Matches in keep are never archived.
+    """
+
+    def __init__(self, archive: MatchArchive, registry: MatchRegistry, after: float = 300.0,
+                 keep: Sequence[str] = (), clock: Callable[[], float] = time.time):
+        self.archive = archive
+        self.registry = registry
+        self.after = after
+        self.keep = frozenset(keep)
+        self.clock = clock
+        self.archived = 0
+        self._finished: Dict[str, float] = {}  # match ID -> when it was won, oldest first
+
+    def match_created(self, match: Match) -> None:
+        if match.state.winner != NO_PLAYER and match.match_id not in self.keep:
+            self._finished[match.match_id] = self.clock()  # loaded already won
+
+    def point_scored(self, match: Match, player: int, events: int) -> None:
+        if events & MATCH_WON and match.match_id not in self.keep:
+            self._finished.pop(match.match_id, None)
+            self._finished[match.match_id] = self.clock()
+
+    def match_reset(self, match: Match) -> None:
+        self._follow(match)
+
+    def match_undone(self, match: Match) -> None:
+        self._follow(match)
+
+    def match_redone(self, match: Match) -> None:
+        self._follow(match)
+
+    def match_removed(self, match: Match) -> None:
+        self._finished.pop(match.match_id, None)
+
+    def match_evicted(self, match: Match) -> None:
+        # A store loads it back won, and match_created starts its wait again
+        self._finished.pop(match.match_id, None)
+
+    def _follow(self, match: Match) -> None:
+        if match.state.winner == NO_PLAYER or match.match_id in self.keep:
+            self._finished.pop(match.match_id, None)
+        elif match.match_id not in self._finished:
+            self._finished[match.match_id] = self.clock()
+
+    def due(self) -> bool:
+        """Is any match ready to be archived"""
+        if not self._finished:
+            return False
+        return next(iter(self._finished.values())) <= self.clock() - self.after
+
+    def sweep(self) -> List[Match]:
+        """Archive and remove every match won at least `after` seconds ago; returns them"""
+        cutoff = self.clock() - self.after
+        ready = []
+        for match_id, finished_at in self._finished.items():
+            if finished_at > cutoff:
+                break
+            ready.append((match_id, finished_at))
+        archived, kept = [], []
+        for match_id, finished_at in ready:
+            match = self.registry.get(match_id)
+            if match is None:
+                kept.append(match_id)
+                continue
+            try:
+                self.archive.add(match, finished_at)
+            except ValueError:
+                kept.append(match_id)  # doesn't fit the columns: stays live
+                continue
+            archived.append(match)
+        # Durable in the archive before it leaves the registry (and the store)
+        self.archive.flush()
+        for match in archived:
+            self.registry.remove(match.match_id)
+        for match_id in kept:
+            self._finished.pop(match_id, None)
+        self.archived += len(archived)
+        return archived
@@ -0,0 +1,273 @@
+"""
+A match registry with a memory budget.
+
+MatchRegistry keeps every match it ever created until it is deleted, so a
+long-running server grows without bound. BoundedMatchRegistry caps the
+number of matches and their estimated bytes, and evicts to stay under the
+caps: finished matches first, least recently used first. With idle_ttl,
+live matches nobody has scored or read for that long are evicted too.
+Pinned matches are never evicted.
+
+Eviction is not deletion: listeners get match_evicted instead of
+match_removed, so a store keeps the match and can load it again on its
+next request (a miss). An optional spill hook sees every match before it
+is evicted, to save it somewhere first. Live matches still in use are only
+evicted when they can come back that way (evict_live, or a spill hook);
+otherwise a new match that does not fit raises RegistryFull rather than
+dropping a match someone is scoring.
+
+Each match's size is estimated in O(1) from what grows with play (undo
+history entries, timeline points and checkpoints) with per-item costs
+measured by tracemalloc, and kept up to date as points are scored, so the
+budget check never walks the matches. Recency is an OrderedDict: a hit or
+a point moves the match to the end, eviction pops from the front.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Sequence
+
+from tennis_backend.history import DEFAULT_HISTORY_DEPTH
+from tennis_backend.match_registry import Match, MatchListener, MatchRegistry
+from tennis_backend.match_state import NO_PLAYER
+from tennis_backend.timeline import DEFAULT_CHECKPOINT_EVERY
+
+# Measured with tracemalloc on CPython 3.11 (best of five, default format)
+MATCH_BYTES = 1_000             # a fresh match without undo history or timeline
+HISTORY_BYTES = 1_700           # an empty undo history: its two deques' first blocks
+HISTORY_ENTRY_BYTES = 480       # one undo or redo entry (state and stats snapshots)
+TIMELINE_ENTRY_BYTES = 70       # extra per entry when the match keeps a timeline
+CHECKPOINT_BYTES = 200          # one timeline checkpoint
+
+EVICTION_REASONS = ("matches", "bytes", "idle")
+
+
+class RegistryFull(RuntimeError):
+    """A new match would go over a cap and nothing can be evicted to make room"""
+
+
+def estimate_bytes(match: Match) -> int:
+    """Approximate memory held by a match, in constant time"""
+    timeline = match.timeline
+    history = match.history
+    if timeline is None:
+        size = MATCH_BYTES
+        entry = HISTORY_ENTRY_BYTES
+    else:
+        size = MATCH_BYTES + timeline.length + len(timeline.buffers[1]) * CHECKPOINT_BYTES
+        entry = HISTORY_ENTRY_BYTES + TIMELINE_ENTRY_BYTES
+    if history is not None:
+        size += HISTORY_BYTES + len(history) * entry
+    return size
+
+
+class BoundedMatchRegistry(MatchRegistry):
+    """
+    A MatchRegistry holding at most max_matches matches and max_bytes
+    estimated bytes (0: no cap), evicting the least recently used; with
+    idle_ttl (seconds, 0: never) matches unused that long are evicted too.
+    evict_live lets matches still in use go as well, for when a store can
+    load them back.
+    """
+
+    def __init__(self, engine: str = "compact", history_depth: int = DEFAULT_HISTORY_DEPTH,
+                 checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY, max_matches: int = 0, max_bytes: int = 0,
+                 idle_ttl: float = 0.0, spill: Optional[Callable[[Match], None]] = None, pinned: Sequence[str] = (),
+                 evict_live: bool = False, clock: Callable[[], float] = time.monotonic):
+        super().__init__(engine, history_depth, checkpoint_every)
+        if max_matches < 0 or max_bytes < 0 or idle_ttl < 0:
+            raise ValueError("Caps and the idle TTL must not be negative")
+        self.max_matches = max_matches
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.spill = spill
+        self.pinned = frozenset(pinned)
+        self.evict_live = evict_live or spill is not None
+        self.clock = clock
+        self._matches: "OrderedDict[str, Match]" = OrderedDict()  # least recently used first
+        self._used: Dict[str, float] = {}                          # match ID -> last use, by clock
+        self._finished: "OrderedDict[str, None]" = OrderedDict()   # won matches, least recently used first
+        self._sizes: Dict[str, int] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = dict.fromkeys(EVICTION_REASONS, 0)
+        self.spilled = 0
+        self.listeners.append(_Tracker(self))
+
+    def create(self, *args, **kwargs) -> Match:
+        """As MatchRegistry.create; raises RegistryFull if the caps leave no room"""
+        self._make_room()
+        match = super().create(*args, **kwargs)
+        self._changed(match)  # a loaded match may be won already (restored before create returns)
+        return match
+
+    def get(self, match_id: str) -> Optional[Match]:
+        match = self._matches.get(match_id)
+        if match is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._matches.move_to_end(match_id)
+            if match_id in self._finished:
+                self._finished.move_to_end(match_id)
+        if self.idle_ttl:
+            if match is not None:
+                self._used[match_id] = self.clock()
+            self.expire()
+        return match
+
+    def remove(self, match_id: str) -> Optional[Match]:
+        match = super().remove(match_id)
+        if match is not None:
+            self._forget(match_id)
+        return match
+
+    def evict(self, match_id: str, reason: str = "matches") -> Optional[Match]:
+        """Drop a match from memory without deleting it: spill it, then tell the listeners"""
+        match = self._matches.get(match_id)
+        if match is None:
+            return None
+        if self.spill is not None:
+            self.spill(match)
+            self.spilled += 1
+        del self._matches[match_id]
+        self._forget(match_id)
+        self.evictions[reason] += 1
+        for listener in self.listeners:
+            listener.match_evicted(match)
+        return match
+
+    def expire(self) -> int:
+        """Evict every match unused for idle_ttl seconds; returns how many"""
+        if not self.idle_ttl:
+            return 0
+        cutoff = self.clock() - self.idle_ttl
+        expired = []
+        for match_id in self._matches:
+            if self._used[match_id] > cutoff:
+                break  # the rest were used more recently
+            if match_id not in self.pinned and not self._matches[match_id].in_use:
+                expired.append(match_id)
+        for match_id in expired:
+            self.evict(match_id, "idle")
+        return len(expired)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "matches": len(self),
+            "finished": len(self._finished),
+            "bytes": self.bytes,
+            "max_matches": self.max_matches,
+            "max_bytes": self.max_bytes,
+            "idle_ttl": self.idle_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "evictions": dict(self.evictions),
+            "spilled": self.spilled,
+        }
+
+    # Bookkeeping
+
+    def _touch(self, match: Match) -> None:
+        match_id = match.match_id
+        self._matches.move_to_end(match_id)
+        if self.idle_ttl:
+            self._used[match_id] = self.clock()
+        size = estimate_bytes(match)
+        self.bytes += size - self._sizes.get(match_id, 0)
+        self._sizes[match_id] = size
+
+    def _forget(self, match_id: str) -> None:
+        self._used.pop(match_id, None)
+        self._finished.pop(match_id, None)
+        self.bytes -= self._sizes.pop(match_id, 0)
+
+    def _changed(self, match: Match) -> None:
+        """A match was created, scored, reset, undone or redone"""
+        match_id = match.match_id
+        if match_id not in self._matches:
+            return  # evicted or removed while a request still held it
+        if match.state.winner == NO_PLAYER:
+            if match_id in self._finished:
+                del self._finished[match_id]
+        else:
+            self._finished[match_id] = None
+            self._finished.move_to_end(match_id)
+        self._touch(match)
+        if (self.max_matches and len(self._matches) > self.max_matches) or (
+                self.max_bytes and self.bytes > self.max_bytes):
+            self._enforce(match_id)
+
+    def _over(self) -> Optional[str]:
+        if self.max_matches and len(self._matches) > self.max_matches:
+            return "matches"
+        if self.max_bytes and self.bytes > self.max_bytes:
+            return "bytes"
+        return None
+
+    def _make_room(self) -> None:
+        """Evict until one more fresh match fits under the caps, or raise RegistryFull"""
+        incoming = MATCH_BYTES + (HISTORY_BYTES if self.history_depth else 0)
+        while True:
+            if self.max_matches and len(self._matches) >= self.max_matches:
+                reason = "matches"
+            elif self.max_bytes and self.bytes + incoming > self.max_bytes:
+                reason = "bytes"
+            else:
+                return
+            victim = self._victim(None)
+            if victim is None:
+                raise RegistryFull(f"No room for another match: every match held is live and in use ({reason} cap)")
+            self.evict(victim, reason)
+
+    def _enforce(self, protect: str) -> None:
+        """Evict until under the caps, sparing protect (the match in use) and the pinned ones"""
+        reason = self._over()
+        while reason is not None:
+            victim = self._victim(protect)
+            if victim is None:
+                return  # only matches that must stay are left
+            self.evict(victim, reason)
+            reason = self._over()
+
+    def _victim(self, protect: Optional[str]) -> Optional[str]:
+        """
+        The finished match used least recently, else the live one if it may
+        go. A match a request holds or waits for the lock of is never picked:
+        that request would score a Match no longer in the registry.
+        """
+        matches = self._matches
+        for match_id in self._finished:
+            if match_id != protect and match_id not in self.pinned and not matches[match_id].in_use:
+                return match_id
+        cutoff = self.clock() - self.idle_ttl if self.idle_ttl else None
+        for match_id, match in matches.items():
+            if match_id == protect or match_id in self.pinned or match.in_use:
+                continue
+            # Later matches were used more recently still
+            if self.evict_live or (cutoff is not None and self._used[match_id] <= cutoff):
+                return match_id
+            return None
+        return None
+
+
+class _Tracker(MatchListener):
+    """Keeps the registry's recency, sizes and finished set in step with play"""
+
+    def __init__(self, registry: BoundedMatchRegistry):
+        self.registry = registry
+
+    def point_scored(self, match: Match, player: int, events: int) -> None:
+        self.registry._changed(match)
+
+    def match_reset(self, match: Match) -> None:
+        self.registry._changed(match)
+
+    def match_undone(self, match: Match) -> None:
+        self.registry._changed(match)
+
+    def match_redone(self, match: Match) -> None:
+        self.registry._changed(match)
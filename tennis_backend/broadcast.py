@@ -0,0 +1,156 @@
+"""
+Push score updates to spectators.
+
+MatchBroadcaster follows the registry as a listener. Each point or reset is
+turned into one small JSON delta, encoded once, and handed to every
+subscriber of that match without waiting: each subscriber has its own
+bounded queue drained by its own connection task (WebSocket or SSE). A
+subscriber that falls max_pending messages behind is not waited for; its
+backlog is replaced by one full snapshot so it catches up in a single
+message, and scoring carries on regardless. Feeds end when their match is
+removed or evicted from memory.
+"""
+
+import asyncio
+import json
+from typing import Dict, Optional, Set
+
+from tennis_backend.match_registry import Match, MatchListener
+from tennis_backend.match_state import (
+    GAME_WON, GAMES, MATCH_WON, NO_PLAYER, POINTS, POINTS_SEQUENCE, SET_WON, TIEBREAK_POINTS, TIEBREAK_STARTED,
+)
+
+EVENT_NAMES = ((GAME_WON, "game"), (SET_WON, "set"), (MATCH_WON, "match"), (TIEBREAK_STARTED, "tiebreak"))
+
+# Queued messages per subscriber before it is considered too slow
+MAX_PENDING = 64
+
+
+def point_delta(match: Match, player: int, events: int) -> Dict:
+    """What changed with one point: who won it, the in-set score and anything it finished"""
+    state = match.state
+    score = state.score
+    names = state.names
+    delta = {
+        "type": "point",
+        "player": names[player],
+        "events": [name for flag, name in EVENT_NAMES if events & flag],
+        "score": {
+            "points": [POINTS_SEQUENCE[score[POINTS]], POINTS_SEQUENCE[score[POINTS + 1]]],
+            "games": [score[GAMES], score[GAMES + 1]],
+            "tiebreak_points": [score[TIEBREAK_POINTS], score[TIEBREAK_POINTS + 1]],
+            "advantage": None if state.advantage == NO_PLAYER else names[state.advantage],
+            "tiebreak": state.tiebreak,
+        },
+    }
+    if events & SET_WON:
+        delta["set"] = list(state.sets[-2:])
+    if events & MATCH_WON:
+        delta["winner"] = names[state.winner]
+    return delta
+
+
+def snapshot_message(match: Match) -> str:
+    return json.dumps({"type": "snapshot", "players": match.player_list()})
+
+
+class Subscription:
+    """One spectator's feed of a match; iterate it for encoded JSON messages"""
+
+    def __init__(self, broadcaster: "MatchBroadcaster", match: Match, max_pending: int = MAX_PENDING):
+        self.broadcaster = broadcaster
+        self.match = match
+        self.lagged = 0  # times the backlog was replaced by a snapshot
+        self._queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(max_pending)
+        self._queue.put_nowait(snapshot_message(match))
+
+    def push(self, message: Optional[str]) -> None:
+        """Queue a message without ever waiting; None ends the feed"""
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lagged += 1
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(snapshot_message(self.match) if message is not None else message)
+
+    async def get(self) -> Optional[str]:
+        return await self._queue.get()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        message = await self._queue.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    def close(self) -> None:
+        self.broadcaster.unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class MatchBroadcaster(MatchListener):
+    """Fans every change to a match out to that match's subscribers"""
+
+    def __init__(self, max_pending: int = MAX_PENDING):
+        self.max_pending = max_pending
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, match: Match) -> Subscription:
+        """Start a feed for match; its first message is a full snapshot"""
+        subscription = Subscription(self, match, self.max_pending)
+        self._subscribers.setdefault(match.match_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.match.match_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.match.match_id]
+
+    def subscriber_count(self, match_id: str) -> int:
+        return len(self._subscribers.get(match_id, ()))
+
+    def _publish(self, match: Match, message: Optional[str]) -> None:
+        for subscription in list(self._subscribers.get(match.match_id, ())):
+            subscription.push(message)
+
+    # Listener hooks: nothing to do unless someone is watching
+
+    def point_scored(self, match: Match, player: int, events: int) -> None:
+        if match.match_id in self._subscribers:
+            self._publish(match, json.dumps(point_delta(match, player, events)))
+
+    def match_reset(self, match: Match) -> None:
+        if match.match_id in self._subscribers:
+            self._publish(match, json.dumps({"type": "reset"}))
+
+    def match_undone(self, match: Match) -> None:
+        if match.match_id in self._subscribers:
+            self._publish(match, json.dumps({"type": "undo", "players": match.player_list()}))
+
+    def match_redone(self, match: Match) -> None:
+        if match.match_id in self._subscribers:
+            self._publish(match, json.dumps({"type": "redo", "players": match.player_list()}))
+
+    def match_removed(self, match: Match) -> None:
+        self._end(match, "removed")
+
+    def match_evicted(self, match: Match) -> None:
+        # Its Match object is stale once evicted: spectators reconnect to the one loaded back
+        self._end(match, "evicted")
+
+    def _end(self, match: Match, reason: str) -> None:
+        if match.match_id in self._subscribers:
+            self._publish(match, json.dumps({"type": reason}))
+            self._publish(match, None)
+            # A new match may reuse the ID; it starts with no spectators
+            del self._subscribers[match.match_id]
@@ -0,0 +1,76 @@
+"""
+Undo/redo history for a match.
+
+Every entry is a tuple of immutable snapshots, one per part of the match
+that undo puts back: the MatchState.snapshot() (a 6-tuple of small ints,
+three scalars and the finished sets, an immutable bytes object shared by
+every snapshot taken in the same set), then the MatchStats and the
+Timeline, whose snapshots share their finished sets and point buffers the
+same way. Recording a point is a few small tuple builds and a deque append;
+undo and redo each move one entry between two bounded deques, so both are
+O(1) and the oldest entries fall off once the depth cap is reached.
+
+A part is anything with snapshot(), restore(snapshot) and reset().
+"""
+
+from collections import deque
+from typing import Deque, Tuple
+
+# Changes kept per match; a best-of-five match rarely runs past 400 points
+DEFAULT_HISTORY_DEPTH = 500
+
+
+class History:
+    """The states before (undo) and after (redo) the current one, newest last"""
+
+    __slots__ = ("depth", "_undo", "_redo")
+
+    def __init__(self, depth: int = DEFAULT_HISTORY_DEPTH):
+        if depth < 1:
+            raise ValueError("History depth must be at least 1")
+        self.depth = depth
+        self._undo: Deque[Tuple] = deque(maxlen=depth)
+        self._redo: Deque[Tuple] = deque(maxlen=depth)
+
+    def record(self, *parts) -> None:
+        """Remember the parts as they are before a change; a new change drops whatever could be redone"""
+        self._undo.append(tuple([part.snapshot() for part in parts]))
+        if self._redo:
+            self._redo.clear()
+
+    def undo(self, *parts) -> bool:
+        """Step the parts back one change; False if there is nothing to undo"""
+        if not self._undo:
+            return False
+        self._redo.append(tuple([part.snapshot() for part in parts]))
+        _restore(self._undo.pop(), parts)
+        return True
+
+    def redo(self, *parts) -> bool:
+        """Step the parts forward again after an undo; False if there is nothing to redo"""
+        if not self._redo:
+            return False
+        self._undo.append(tuple([part.snapshot() for part in parts]))
+        _restore(self._redo.pop(), parts)
+        return True
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
+
+    def __len__(self) -> int:
+        """Entries held, undoable and redoable"""
+        return len(self._undo) + len(self._redo)
+
+    @property
+    def undoable(self) -> int:
+        return len(self._undo)
+
+    @property
+    def redoable(self) -> int:
+        return len(self._redo)
+
+
+def _restore(entry: Tuple, parts: Tuple) -> None:
+    for part, snapshot in zip(parts, entry):
+        part.restore(snapshot)
@@ -0,0 +1,109 @@
+"""
+Idempotency keys for the scoring routes.
+
+A tablet on flaky Wi-Fi that times out on POST .../increment cannot tell
+whether the point was scored, so it retries, and without this every retry
+was another point. A client that sends the same Idempotency-Key header on
+every attempt of one action gets the first attempt's response back on the
+retries, and the point is scored once.
+
+IdempotencyCache remembers, per match, the response of each key for ttl
+seconds and at most keys_per_match keys (the oldest go first). Keys are
+kept in insertion order, which is also expiry order, so dropping expired
+keys pops from the front and a lookup is two dict gets and a clock read.
+Each key also remembers what it was used for (the action and player): the
+same key on a different request is an error rather than a silent replay.
+Deleting a match drops its keys. Keys of matches nobody touches any more
+(idle, evicted from memory) are swept once every ttl seconds by whichever
+lookup comes next; an evicted match keeps its keys until then, so a retry
+after it is loaded back is still answered from here.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from tennis_backend.match_registry import Match, MatchListener
+
+DEFAULT_KEYS_PER_MATCH = 256
+DEFAULT_TTL = 300.0
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflict(ValueError):
+    """The key was already used for a different request"""
+
+
+class IdempotencyCache(MatchListener):
+    """Recent Idempotency-Key responses per match, bounded in count and age"""
+
+    def __init__(self, keys_per_match: int = DEFAULT_KEYS_PER_MATCH, ttl: float = DEFAULT_TTL, clock=time.monotonic):
+        if keys_per_match < 1 or ttl <= 0:
+            raise ValueError("Keep at least one key per match for a positive time")
+        self.keys_per_match = keys_per_match
+        self.ttl = ttl
+        self.clock = clock
+        # match ID -> key -> (expires at, request fingerprint, response), oldest first
+        self._matches: Dict[str, "OrderedDict[str, Tuple[float, Hashable, Any]]"] = {}
+        self._next_sweep = clock() + ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, match_id: str, key: str, fingerprint: Hashable) -> Optional[Any]:
+        """
+        The stored response of key, or None if it is new (or expired).
+        Raises IdempotencyConflict if key was used for another fingerprint.
+        """
+        now = self.clock()
+        if now >= self._next_sweep:
+            self.sweep(now)
+        entries = self._matches.get(match_id)
+        entry = entries.get(key) if entries else None
+        if entry is None or entry[0] <= now:
+            self.misses += 1
+            return None
+        if entry[1] != fingerprint:
+            raise IdempotencyConflict(f"Idempotency-Key {key!r} was already used for a different request")
+        self.hits += 1
+        return entry[2]
+
+    def put(self, match_id: str, key: str, fingerprint: Hashable, response: Any) -> None:
+        """Remember response as the answer to key (response must not be changed afterwards)"""
+        entries = self._matches.get(match_id)
+        if entries is None:
+            entries = self._matches[match_id] = OrderedDict()
+        now = self.clock()
+        _expire(entries, now)
+        entries.pop(key, None)  # an expired key used again goes to the back
+        entries[key] = (now + self.ttl, fingerprint, response)
+        if len(entries) > self.keys_per_match:
+            entries.popitem(last=False)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop every expired key, and matches left with none; returns keys dropped"""
+        now = self.clock() if now is None else now
+        self._next_sweep = now + self.ttl
+        dropped = 0
+        for match_id, entries in list(self._matches.items()):
+            dropped += _expire(entries, now)
+            if not entries:
+                del self._matches[match_id]
+        return dropped
+
+    def match_removed(self, match: Match) -> None:
+        self._matches.pop(match.match_id, None)
+
+    def clear(self) -> None:
+        self._matches.clear()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._matches.values())
+
+
+def _expire(entries: "OrderedDict[str, Tuple[float, Hashable, Any]]", now: float) -> int:
+    """Pop the expired keys, which are at the front; returns how many"""
+    expired = 0
+    while entries and next(iter(entries.values()))[0] <= now:
+        entries.popitem(last=False)
+        expired += 1
+    return expired
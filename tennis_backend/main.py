@@ -1,16 +1,59 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Union
+from datetime import date, datetime, time, timedelta, timezone
+import asyncio
 import json
 import os
+import uuid
 
-from tennis_backend.tennis_game import award_point_to_player, get_opponent_from_players
+from tennis_backend.archive import MatchArchive, MatchArchiver
+from tennis_backend.bounded_registry import BoundedMatchRegistry, RegistryFull
+from tennis_backend.broadcast import MatchBroadcaster, Subscription
+from tennis_backend.history import DEFAULT_HISTORY_DEPTH
+from tennis_backend.idempotency import (DEFAULT_KEYS_PER_MATCH, DEFAULT_TTL, MAX_KEY_LENGTH, IdempotencyCache,
+                                        IdempotencyConflict)
+from tennis_backend.match_format import DEFAULT_FORMAT, FORMATS
+from tennis_backend.match_index import MatchIndex
+from tennis_backend.match_registry import Match
+from tennis_backend.match_state import NO_PLAYER
+from tennis_backend.match_store import MemoryStore, SQLiteStore
+from tennis_backend.metrics import CONTENT_TYPE, Metrics, MetricsMiddleware
+from tennis_backend.point_log import PointLog
+from tennis_backend.profiler import Profiler, ProfilerMiddleware
+from tennis_backend.response_cache import ResponseCache, encode
+from tennis_backend.shared_state import SharedMatchRegistry
+from tennis_backend.timeline import DEFAULT_CHECKPOINT_EVERY
+from tennis_backend.win_probability import win_probabilities
 
 # Environment configuration
 APP_ENV = os.getenv("APP_ENV", "production")
 CORS_ALLOW_ALL = os.getenv("CORS_ALLOW_ALL", "true").lower() == "true"
 CORS_ALLOW_ORIGINS = os.getenv("CORS_ALLOW_ORIGINS", "*").split(",")
+SCORING_ENGINE = os.getenv("SCORING_ENGINE", "compact")  # "compact" or "table"
+POINT_LOG_DIR = os.getenv("POINT_LOG_DIR")  # unset keeps matches in memory only
+SQLITE_PATH = os.getenv("SQLITE_PATH")  # unset keeps matches in memory only
+GROUP_COMMIT = os.getenv("GROUP_COMMIT", "true").lower() == "true"
+SHARED_STATE = os.getenv("SHARED_STATE")  # shared-memory segment name, for uvicorn --workers N
+SHARED_CAPACITY = int(os.getenv("SHARED_CAPACITY", "1024"))  # matches the segment holds
+UNDO_DEPTH = int(os.getenv("UNDO_DEPTH", str(DEFAULT_HISTORY_DEPTH)))  # changes that can be undone, 0 = off
+# Points between timeline checkpoints for GET /matches/{id}/state?at=N, 0 = no timeline
+CHECKPOINT_EVERY = int(os.getenv("CHECKPOINT_EVERY", str(DEFAULT_CHECKPOINT_EVERY)))
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"  # /metrics and request timing
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"  # POST /admin/profile
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "true").lower() == "true"  # pre-encoded player responses
+# Memory budget for the matches held in memory (not with SHARED_STATE); 0 = no cap.
+# Finished and idle matches are evicted; live ones in use only with SQLITE_PATH, which loads them back
+MAX_MATCHES = int(os.getenv("MAX_MATCHES", "0"))
+MAX_MATCH_BYTES = int(os.getenv("MAX_MATCH_BYTES", "0"))  # estimated bytes of match state
+MATCH_IDLE_TTL = float(os.getenv("MATCH_IDLE_TTL", "0"))  # seconds unused before a match is evicted
+# Idempotency-Key on increment/reset: how long a retry gets the stored response (0 = off), and keys kept per match
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", str(DEFAULT_TTL)))
+IDEMPOTENCY_KEYS = int(os.getenv("IDEMPOTENCY_KEYS", str(DEFAULT_KEYS_PER_MATCH)))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR")  # unset keeps finished matches live (not with SHARED_STATE)
+ARCHIVE_AFTER = float(os.getenv("ARCHIVE_AFTER", "300"))  # seconds a won match stays live before archiving
 
 # If allow all is false, use the specific origins
 if not CORS_ALLOW_ALL:
@@ -29,6 +72,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so the timings include CORS handling
+metrics = Metrics() if METRICS_ENABLED else None
+if metrics is not None:
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+# Off by default; when off nothing is installed at all
+profiler = Profiler() if PROFILER_ENABLED else None
+if profiler is not None:
+    app.add_middleware(ProfilerMiddleware, profiler=profiler)
 
 
 # Data model
@@ -41,64 +93,556 @@ class PlayerScore(BaseModel):
     tiebreak_points: int = 0
     advantage: bool = False
 
+class MatchFormatSpec(BaseModel):
+    # A preset to start from (default best_of_5); any field given overrides it
+    name: Optional[str] = None
+    sets_to_win: Optional[int] = None
+    games_per_set: Optional[int] = None
+    tiebreak_points: Optional[int] = None
+    no_ad: Optional[bool] = None
+    match_tiebreak_points: Optional[int] = None
+
+class MatchCreate(BaseModel):
+    players: List[str]
+    match_id: Optional[str] = None
+    first_server: Optional[str] = None  # defaults to the first player
+    format: Union[None, str, MatchFormatSpec] = None  # preset name or fields; defaults to best of five
+
+# Typical tour point-win rate on serve, used when the caller gives none
+DEFAULT_SERVE_WIN = 0.64
+
+class PointBatch(BaseModel):
+    # "AABAB..." (A = first player) or a list of player names, "A"/"B" or 0/1
+    winners: Union[str, List[Union[int, str]]]
+
+# Upper bound on one batch, so a single request cannot hold a court's lock for long
+MAX_BATCH_POINTS = 10_000
+
+# SSE comment sent when nothing happened for this long, so proxies keep the stream open
+SSE_KEEPALIVE_SECONDS = 15.0
+
+# Longest a long-poll (?since=&wait=) may park a request
+MAX_POLL_WAIT_SECONDS = 60.0
+
+# Longest a profiling session may run
+MAX_PROFILE_SECONDS = 300.0
+
+# Most matches one GET /matches page holds
+MAX_LIST_RESULTS = 500
+
+# Most archived matches one GET /archive returns
+MAX_ARCHIVE_RESULTS = 1000
+
+# Archived point winners as the letters PointBatch takes
+POINT_LETTERS = bytes.maketrans(b"\x00\x01", b"AB")
+
+# Versions restart with the process, so ETags carry a per-process prefix (and the
+# match's incarnation); shared-state workers share versions, so they share the prefix too
+ETAG_EPOCH = SHARED_STATE or uuid.uuid4().hex[:8]
+
 # In-memory storage (in a real app, you'd use a database)
-players_data = {
-    "Alcaraz": {"name": "Alcaraz", "points": 0, "current_set_games": 0, "sets": [], "tiebreak": False, "tiebreak_points": 0, "advantage": False, "winner": False},
-    "Sinner": {"name": "Sinner", "points": 0, "current_set_games": 0, "sets": [], "tiebreak": False, "tiebreak_points": 0, "advantage": False, "winner": False}
-}
+# Every court gets its own match; the /players routes keep scoring the default one.
+DEFAULT_MATCH_ID = "default"
+if SHARED_STATE:
+    # Every worker attaches to the same records, so any worker can score any match (no undo)
+    registry = SharedMatchRegistry(SHARED_STATE, SHARED_CAPACITY, engine=SCORING_ENGINE)
+else:
+    registry = BoundedMatchRegistry(engine=SCORING_ENGINE, history_depth=UNDO_DEPTH,
+                                    checkpoint_every=CHECKPOINT_EVERY, max_matches=MAX_MATCHES,
+                                    max_bytes=MAX_MATCH_BYTES, idle_ttl=MATCH_IDLE_TTL, pinned=[DEFAULT_MATCH_ID],
+                                    evict_live=bool(SQLITE_PATH))
+# With a log directory, matches survive restarts: recover them before serving
+point_log = PointLog.open(POINT_LOG_DIR, registry) if POINT_LOG_DIR else None
+# Every change is durable in the store before its response goes out
+store = SQLiteStore(SQLITE_PATH, group_commit=GROUP_COMMIT) if SQLITE_PATH else MemoryStore()
+store.load(registry)
+# Spectators get pushed deltas instead of polling /players
+broadcaster = MatchBroadcaster()
+registry.add_listener(broadcaster)
+# Player reads are served from bytes encoded once per match version
+response_cache = ResponseCache() if RESPONSE_CACHE else None
+if response_cache is not None:
+    registry.add_listener(response_cache)
+if metrics is not None:
+    registry.add_listener(metrics.scoring)
+    metrics.gauge("tennis_matches", "Matches in the registry", lambda: len(registry))
+    metrics.gauge("tennis_live_matches", "Matches without a winner yet",
+                  lambda: sum(1 for match in registry if match.state.winner == NO_PLAYER))
+    if isinstance(registry, BoundedMatchRegistry):
+        metrics.gauge("tennis_match_bytes", "Estimated bytes of match state held in memory", lambda: registry.bytes)
+        metrics.counter("tennis_match_hits_total", "Match lookups served from memory", lambda: registry.hits)
+        metrics.counter("tennis_match_misses_total", "Match lookups not in memory", lambda: registry.misses)
+        for reason, help_text in (("matches", "Matches evicted to stay within MAX_MATCHES"),
+                                  ("bytes", "Matches evicted to stay within MAX_MATCH_BYTES"),
+                                  ("idle", "Matches evicted after MATCH_IDLE_TTL unused")):
+            metrics.counter(f"tennis_match_evictions_{reason}_total", help_text,
+                            lambda reason=reason: registry.evictions[reason])
+# GET /matches filters and pages through indexes kept up to date by every change
+match_index = MatchIndex()
+registry.add_listener(match_index)
+for match in registry:  # recovered above, before the index was listening
+    match_index.match_created(match)
+# Retried increments and resets with the same Idempotency-Key get the first response back
+idempotency = IdempotencyCache(IDEMPOTENCY_KEYS, IDEMPOTENCY_TTL) if IDEMPOTENCY_TTL > 0 else None
+if idempotency is not None:
+    registry.add_listener(idempotency)
+# Won matches move to a compact columnar archive once nobody is scoring them
+archive = MatchArchive(ARCHIVE_DIR) if ARCHIVE_DIR and not SHARED_STATE else None
+archiver = MatchArchiver(archive, registry, ARCHIVE_AFTER, keep=[DEFAULT_MATCH_ID]) if archive is not None else None
+if archiver is not None:
+    registry.add_listener(archiver)
+    for match in registry:  # recovered above, before the archiver was listening
+        archiver.match_created(match)
+try:
+    default_match = registry.get(DEFAULT_MATCH_ID) or registry.create(["Alcaraz", "Sinner"], match_id=DEFAULT_MATCH_ID)
+except ValueError:
+    # Another worker created it first
+    default_match = registry.get(DEFAULT_MATCH_ID)
 
 # Tennis logic functions moved to tennis_game.py
 
+async def get_match_or_404(match_id: str) -> Match:
+    match = registry.get(match_id) or await store.fetch(registry, match_id)
+    if match is None:
+        raise HTTPException(status_code=404, detail="Match not found")
+    return match
+
+def check_player_or_404(match: Match, player_name: str) -> None:
+    if player_name not in match.player_index:
+        raise HTTPException(status_code=404, detail="Player not found")
+
+def get_player_or_404(match: Match, player_name: str) -> Dict:
+    check_player_or_404(match, player_name)
+    return match.player(player_name)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
+async def _versioned(match: Match, request: Request, since: Optional[int], wait: float,
+                     player_name: Optional[str] = None) -> Response:
+    """
+    Answer a GET for the match's players (or one player) tagged with the
+    match version. With since and wait the request first parks until the
+    version passes since (or wait seconds go by); a matching If-None-Match
+    gets 304 and no body. The JSON comes from the response cache when it is
+    on, so unchanged scores are not encoded again.
+    """
+    if since is not None and wait > 0 and match.version <= since:
+        await match.wait_for_change(wait)
+
+    version = match.version
+    etag = f'"{ETAG_EPOCH}-{match.incarnation}-{version}"'
+    headers = {"ETag": etag, "X-Match-Version": str(version), "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if response_cache is not None:
+        body = response_cache.players(match) if player_name is None else response_cache.player(match, player_name)
+    else:
+        body = encode(match.player_list() if player_name is None else match.player(player_name))
+    return Response(body, media_type="application/json", headers=headers)
+
+async def _archive_finished(force: bool = False) -> List[str]:
+    """Move matches won ARCHIVE_AFTER seconds ago into the archive; runs piggybacked on requests"""
+    if archiver is None or not (force or archiver.due()):
+        return []
+    archived = archiver.sweep()
+    for match in archived:
+        await store.persist(match)
+    return [match.match_id for match in archived]
+
+def _archive_or_404() -> MatchArchive:
+    if archive is None:
+        raise HTTPException(status_code=404, detail="Archive is disabled")
+    return archive
+
+def _replayed(match: Match, key: Optional[str], fingerprint: tuple, response: Response):
+    """The stored response to a retried Idempotency-Key, or None if the request is new"""
+    if key is None or idempotency is None:
+        return None
+    try:
+        stored = idempotency.get(match.match_id, key, fingerprint)
+    except IdempotencyConflict as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    if stored is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+    return stored
+
+def _remember(match: Match, key: Optional[str], fingerprint: tuple, result) -> None:
+    if key is not None and idempotency is not None:
+        idempotency.put(match.match_id, key, fingerprint, result)
+
+async def _increment(match: Match, player_name: str, key: Optional[str] = None,
+                     response: Optional[Response] = None) -> Dict:
+    # Web layer: Handle HTTP-specific concerns
+    get_player_or_404(match, player_name)
+
+    # Business layer: one point at a time per court, courts never wait on each other.
+    # The key is checked under the lock, so a retry racing the original waits for it.
+    fingerprint = ("increment", player_name)
+    async with match.lock:
+        replayed = _replayed(match, key, fingerprint, response)
+        if replayed is not None:
+            return replayed
+        player = match.award_point(player_name)
+        _remember(match, key, fingerprint, player)
+    await store.persist(match)
+    return player
+
+async def _award_points(match: Match, body: PointBatch) -> Dict:
+    if len(body.winners) > MAX_BATCH_POINTS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_POINTS} points per batch")
+    try:
+        winners = match.parse_winners(body.winners)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    # The whole rally log goes through the scoring engine under one lock
+    async with match.lock:
+        rejected_index = match.award_points(winners)
+        applied = len(winners) if rejected_index is None else rejected_index
+        result = {"applied": applied, "rejected_index": rejected_index, "players": match.player_list()}
+    await store.persist(match)
+    return result
+
+async def _reset(match: Match, key: Optional[str] = None, response: Optional[Response] = None) -> List[Dict]:
+    async with match.lock:
+        replayed = _replayed(match, key, ("reset",), response)
+        if replayed is not None:
+            return replayed
+        players = match.reset()
+        _remember(match, key, ("reset",), players)
+    await store.persist(match)
+    return players
+
+async def _step(match: Match, redo: bool = False) -> List[Dict]:
+    async with match.lock:
+        changed = match.redo() if redo else match.undo()
+        players = match.player_list()
+    if not changed:
+        raise HTTPException(status_code=409, detail="Nothing to redo" if redo else "Nothing to undo")
+    await store.persist(match)
+    return players
+
 @app.get("/")
 async def root():
     return {"message": "Tennis App API is running!"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """Request latencies, scoring counters and match gauges in the Prometheus text format"""
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+@app.post("/admin/profile", include_in_schema=False)
+async def profile(
+    seconds: float = Query(10.0, gt=0, le=MAX_PROFILE_SECONDS, description="Longest to sample for"),
+    requests: Optional[int] = Query(None, ge=1, description="Stop once this many other requests completed"),
+    interval_ms: float = Query(1.0, ge=0.1, le=100.0, description="Time between samples"),
+    top: int = Query(25, ge=1, le=500, description="Hot functions to list"),
+    format: str = Query("json", pattern="^(json|collapsed)$", description="collapsed: flamegraph input only"),
+):
+    """Sample the live process for a while: hot functions and collapsed stacks"""
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    try:
+        result = await profiler.run(seconds, requests, interval_ms / 1000)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    if format == "collapsed":
+        return PlainTextResponse(result.collapsed())
+    return result.to_dict(top)
+
+@app.post("/admin/archive", include_in_schema=False)
+async def archive_finished():
+    """Archive every match won at least ARCHIVE_AFTER seconds ago now"""
+    _archive_or_404()
+    return {"archived": await _archive_finished(force=True)}
+
+@app.get("/admin/memory", include_in_schema=False)
+async def memory_usage():
+    """Matches and estimated bytes held in memory, caps, hit/miss and eviction counts"""
+    if not isinstance(registry, BoundedMatchRegistry):
+        raise HTTPException(status_code=404, detail="Shared-state matches have a fixed capacity")
+    return registry.stats()
+
+IDEMPOTENCY_KEY = Header(None, alias="Idempotency-Key", min_length=1, max_length=MAX_KEY_LENGTH,
+                         description="Same key on a retry: get the first response back instead of acting again")
+
+SINCE_QUERY = Query(None, ge=0, description="Long-poll: only answer once the match version is past this")
+WAIT_QUERY = Query(0.0, ge=0, le=MAX_POLL_WAIT_SECONDS, description="Long-poll: longest to wait, in seconds")
+
 @app.get("/players")
-async def get_players():
+async def get_players(request: Request, since: Optional[int] = SINCE_QUERY, wait: float = WAIT_QUERY):
     """Get all players and their scores"""
-    return list(players_data.values())
+    return await _versioned(default_match, request, since, wait)
 
 # Not used currently
 @app.get("/players/{player_name}")
-async def get_player(player_name: str):
+async def get_player(player_name: str, request: Request, since: Optional[int] = SINCE_QUERY,
+                     wait: float = WAIT_QUERY):
     """Get a specific player's score"""
-    if player_name not in players_data:
-        raise HTTPException(status_code=404, detail="Player not found")
-    return players_data[player_name]
+    check_player_or_404(default_match, player_name)
+    return await _versioned(default_match, request, since, wait, player_name)
 
 @app.post("/players/{player_name}/increment")
-async def increment_score(player_name: str):
+async def increment_score(player_name: str, response: Response, idempotency_key: Optional[str] = IDEMPOTENCY_KEY):
     """Increment a player's point according to tennis rules, sets, and tiebreaks"""
-    # Web layer: Handle HTTP-specific concerns
-    if player_name not in players_data:
-        raise HTTPException(status_code=404, detail="Player not found")
-    
-    # Get player data
-    opponent_name = get_opponent_from_players(players_data, player_name)
-    player = players_data[player_name]
-    opponent = players_data[opponent_name]
-    
-    # Business layer: Apply tennis logic (this is where the magic happens!)
-    updated_player, updated_opponent = award_point_to_player(player, opponent)
-    
-    # Update the data store (in a real app, this would be database operations)
-    players_data[player_name] = updated_player
-    players_data[opponent_name] = updated_opponent
-    
-    return updated_player
+    return await _increment(default_match, player_name, idempotency_key, response)
+
+@app.post("/players/points")
+async def add_points(body: PointBatch):
+    """Apply a buffered list of point winners in order in one request"""
+    return await _award_points(default_match, body)
 
 @app.post("/players/reset")
-async def reset_scores():
+async def reset_scores(response: Response, idempotency_key: Optional[str] = IDEMPOTENCY_KEY):
     """Reset all player points, games, sets, and tiebreaks to 0"""
-    for player in players_data.values():
-        player["points"] = 0
-        player["current_set_games"] = 0
-        player["sets"] = []
-        player["tiebreak"] = False
-        player["tiebreak_points"] = 0
-        player["advantage"] = False
-        player["winner"] = False
-    return list(players_data.values())
+    return await _reset(default_match, idempotency_key, response)
+
+@app.post("/players/undo")
+async def undo_point():
+    """Take back the last point or reset"""
+    return await _step(default_match)
+
+@app.post("/players/redo")
+async def redo_point():
+    """Put back the last point or reset that was taken back"""
+    return await _step(default_match, redo=True)
+
+@app.get("/formats")
+async def get_formats():
+    """Preset match formats that POST /matches accepts by name"""
+    return {name: match_format._asdict() for name, match_format in FORMATS.items()}
+
+@app.post("/matches", status_code=201)
+async def create_match(body: MatchCreate):
+    """Start a new match on its own court"""
+    # An evicted match is only in the store; creating over it would overwrite its score
+    if body.match_id is not None and (body.match_id in registry
+                                      or await store.fetch(registry, body.match_id) is not None):
+        raise HTTPException(status_code=409, detail="Match already exists")
+    try:
+        match_format = body.format.model_dump(exclude_none=True) if isinstance(body.format, MatchFormatSpec) \
+            else body.format
+        match = registry.create(body.players, match_id=body.match_id, first_server=body.first_server,
+                                match_format=match_format)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except RegistryFull as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    await store.persist(match)
+    await _archive_finished()
+    return match.to_dict()
+
+@app.get("/archive")
+async def get_archived_matches(
+    player: Optional[str] = Query(None, description="Only matches this player played"),
+    since: Optional[date] = Query(None, description="Finished on or after this day (UTC)"),
+    until: Optional[date] = Query(None, description="Finished on or before this day (UTC)"),
+    limit: int = Query(100, ge=1, le=MAX_ARCHIVE_RESULTS),
+):
+    """Finished matches from the archive, oldest first"""
+    matches_archive = _archive_or_404()
+    await _archive_finished()
+    start = None if since is None else datetime.combine(since, time(), timezone.utc).timestamp()
+    stop = None if until is None else datetime.combine(until + timedelta(days=1), time(), timezone.utc).timestamp()
+    matches = []
+    for match in matches_archive.query(player, start, stop):
+        if len(matches) == limit:
+            break
+        matches.append(match.to_dict())
+    return {"matches": matches, "count": len(matches)}
+
+@app.get("/archive/{match_id}")
+async def get_archived_match(match_id: str):
+    """One archived match with every point's winner (A: first player, B: second), if they were recorded"""
+    matches_archive = _archive_or_404()
+    await _archive_finished()
+    row = matches_archive.find(match_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Match not found in the archive")
+    winners = matches_archive.point_winners(row)
+    return {**matches_archive.row(row).to_dict(),
+            "winners": None if winners is None else winners.translate(POINT_LETTERS).decode()}
+
+@app.get("/matches")
+async def list_matches(
+    status: Optional[str] = Query(None, pattern="^(live|finished)$", description="live: not won yet"),
+    player: Optional[str] = Query(None, description="Only matches this player is in"),
+    tiebreak: Optional[bool] = Query(None, description="Only matches in (true) or not in (false) a tiebreak"),
+    updated_within: Optional[float] = Query(None, gt=0, description="Only matches changed in the last N seconds"),
+    cursor: Optional[int] = Query(None, ge=1, description="next_cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=MAX_LIST_RESULTS),
+):
+    """Matches in this process, most recently changed first, a page at a time"""
+    since = None if updated_within is None else match_index.clock() - updated_within
+    matches, next_cursor = match_index.page(status, player, tiebreak, since, cursor, limit)
+    return {
+        "matches": [{
+            **match.to_dict(),
+            "status": "live" if match.state.winner == NO_PLAYER else "finished",
+            "tiebreak": match.state.tiebreak,
+            "version": match.version,
+            "updated_at": datetime.fromtimestamp(match_index.updated[match.match_id], timezone.utc).isoformat(),
+        } for match in matches],
+        "next_cursor": None if next_cursor is None else str(next_cursor),
+    }
+
+@app.get("/matches/{match_id}")
+async def get_match(match_id: str):
+    """Get a match with both players' scores"""
+    return (await get_match_or_404(match_id)).to_dict()
+
+@app.delete("/matches/{match_id}", status_code=204)
+async def delete_match(match_id: str):
+    """Remove a match from the registry"""
+    match = await get_match_or_404(match_id)
+    registry.remove(match_id)
+    await store.persist(match)
+
+@app.get("/matches/{match_id}/players")
+async def get_match_players(match_id: str, request: Request, since: Optional[int] = SINCE_QUERY,
+                            wait: float = WAIT_QUERY):
+    """Get both players' scores in a match"""
+    match = await get_match_or_404(match_id)
+    return await _versioned(match, request, since, wait)
+
+@app.get("/matches/{match_id}/players/{player_name}")
+async def get_match_player(match_id: str, player_name: str, request: Request,
+                           since: Optional[int] = SINCE_QUERY, wait: float = WAIT_QUERY):
+    """Get one player's score in a match"""
+    match = await get_match_or_404(match_id)
+    check_player_or_404(match, player_name)
+    return await _versioned(match, request, since, wait, player_name)
+
+@app.post("/matches/{match_id}/players/{player_name}/increment")
+async def increment_match_score(match_id: str, player_name: str, response: Response,
+                                idempotency_key: Optional[str] = IDEMPOTENCY_KEY):
+    """Award a point to a player in a match"""
+    return await _increment(await get_match_or_404(match_id), player_name, idempotency_key, response)
+
+@app.get("/matches/{match_id}/win-probability")
+async def get_win_probability(
+    match_id: str,
+    serve_win: List[float] = Query(
+        default=[DEFAULT_SERVE_WIN, DEFAULT_SERVE_WIN],
+        description="Each player's point-win probability on serve, in player order",
+    ),
+):
+    """Exact probability of each player winning the current game, tiebreak, set and match"""
+    match = await get_match_or_404(match_id)
+    if match.format != DEFAULT_FORMAT:
+        raise HTTPException(status_code=422, detail="Win probabilities are only modelled for best of five")
+    try:
+        probabilities = win_probabilities(match.state, serve_win, match.first_server)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    names = match.state.names
+    result = {"match_id": match_id, "server": names[match.state.server(match.first_server)]}
+    for level, p in probabilities.items():
+        result[level] = None if p is None else {names[0]: p, names[1]: 1 - p}
+    return result
+
+@app.get("/matches/{match_id}/stats")
+async def get_match_stats(match_id: str):
+    """Break points, deuces, streaks, tiebreaks won and points per set, kept up to date point by point"""
+    match = await get_match_or_404(match_id)
+    return {"match_id": match_id, "version": match.version, **match.stats.to_dict(match.state.names)}
+
+@app.get("/matches/{match_id}/state")
+async def get_match_state_at(match_id: str, at: int = Query(..., ge=0, description="Points played since 0-0")):
+    """The score as it stood after the first `at` points, rebuilt from the nearest checkpoint"""
+    match = await get_match_or_404(match_id)
+    if match.timeline is None:
+        raise HTTPException(status_code=409, detail="This match keeps no timeline of its points")
+    try:
+        state = match.state_at(at)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return {
+        "match_id": match_id,
+        "at": at,
+        "points": match.timeline.length,
+        "server": state.names[state.server(match.first_server)],
+        "players": state.to_players(),
+    }
+
+@app.post("/matches/{match_id}/points")
+async def add_match_points(match_id: str, body: PointBatch):
+    """Apply a buffered list of point winners to a match in order in one request"""
+    return await _award_points(await get_match_or_404(match_id), body)
+
+@app.post("/matches/{match_id}/reset")
+async def reset_match(match_id: str, response: Response, idempotency_key: Optional[str] = IDEMPOTENCY_KEY):
+    """Reset a match back to 0-0"""
+    return await _reset(await get_match_or_404(match_id), idempotency_key, response)
+
+@app.post("/matches/{match_id}/undo")
+async def undo_match_point(match_id: str):
+    """Take back the last point or reset in a match"""
+    return await _step(await get_match_or_404(match_id))
+
+@app.post("/matches/{match_id}/redo")
+async def redo_match_point(match_id: str):
+    """Put back the last point or reset taken back in a match"""
+    return await _step(await get_match_or_404(match_id), redo=True)
+
+async def _sse_events(match: Match):
+    with broadcaster.subscribe(match) as subscription:
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if message is None:
+                return
+            yield f"data: {message}\n\n"
+
+@app.get("/matches/{match_id}/events")
+async def match_events(match_id: str):
+    """Server-Sent Events: a snapshot, then one small delta per point or reset"""
+    match = await get_match_or_404(match_id)
+    return StreamingResponse(_sse_events(match), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/matches/{match_id}/ws")
+async def match_updates(websocket: WebSocket, match_id: str):
+    """WebSocket feed: a snapshot, then one small delta per point or reset"""
+    match = registry.get(match_id) or await store.fetch(registry, match_id)
+    if match is None:
+        await websocket.close(code=4404)
+        return
+    await websocket.accept()
+
+    async def forward(subscription: Subscription):
+        async for message in subscription:
+            await websocket.send_text(message)
+        await websocket.close()
+
+    async def until_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    # Sending runs in its own task, so a slow socket only delays this spectator
+    with broadcaster.subscribe(match) as subscription:
+        tasks = [asyncio.ensure_future(forward(subscription)), asyncio.ensure_future(until_disconnect())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Wait for both, so neither task's error is left unretrieved
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            # The spectator going away mid-send is an ordinary end of the feed
+            if isinstance(result, Exception) and not isinstance(result, (WebSocketDisconnect, OSError)):
+                raise result
 
 if __name__ == "__main__":
     import uvicorn
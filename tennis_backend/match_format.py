@@ -0,0 +1,102 @@
+"""
+Match formats: how many sets, how long a set is and how games and the
+deciding set are played.
+
+A MatchFormat is a plain immutable definition. It is chosen per match when
+the match is created (by preset name or by its fields) and compiled once per
+distinct format into a transition table (transition_table.compile_format),
+so a match in any format scores a point with the same table lookup and no
+format checks. The default, best of five with advantage games and 7-point
+tiebreaks at 6-6, is the format the original scoring functions implement.
+"""
+
+from typing import Dict, NamedTuple, Optional, Union
+
+from tennis_backend.match_state import GAMES_PER_SET, SETS_TO_WIN, TIEBREAK_POINTS_TO_WIN
+
+MAX_SETS_TO_WIN = 5
+MAX_GAMES_PER_SET = 12
+MAX_TIEBREAK_POINTS = 25
+
+
+class MatchFormat(NamedTuple):
+    sets_to_win: int = SETS_TO_WIN                # 3: best of five, 2: best of three
+    games_per_set: int = GAMES_PER_SET            # games to win a set; tiebreak when both reach it
+    tiebreak_points: int = TIEBREAK_POINTS_TO_WIN
+    no_ad: bool = False                           # at deuce the next point wins the game
+    match_tiebreak_points: int = 0                # if set, a tiebreak to this many replaces the deciding set
+
+    def validate(self) -> "MatchFormat":
+        """The format itself; raises ValueError if it cannot be played"""
+        if not 1 <= self.sets_to_win <= MAX_SETS_TO_WIN:
+            raise ValueError(f"sets_to_win must be between 1 and {MAX_SETS_TO_WIN}")
+        if not 1 <= self.games_per_set <= MAX_GAMES_PER_SET:
+            raise ValueError(f"games_per_set must be between 1 and {MAX_GAMES_PER_SET}")
+        if not 1 <= self.tiebreak_points <= MAX_TIEBREAK_POINTS:
+            raise ValueError(f"tiebreak_points must be between 1 and {MAX_TIEBREAK_POINTS}")
+        if not 0 <= self.match_tiebreak_points <= MAX_TIEBREAK_POINTS:
+            raise ValueError(f"match_tiebreak_points must be between 0 and {MAX_TIEBREAK_POINTS}")
+        if self.match_tiebreak_points and self.sets_to_win < 2:
+            raise ValueError("A match tiebreak replaces the deciding set, so it needs sets_to_win of at least 2")
+        return self
+
+    @property
+    def name(self) -> Optional[str]:
+        """The preset this format is, if any"""
+        return _PRESET_NAMES.get(self)
+
+    @property
+    def key(self) -> str:
+        """Compact text form for persistence: the preset name, or the fields"""
+        return self.name or "custom:" + ":".join(str(int(value)) for value in self)
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, **self._asdict()}
+
+
+DEFAULT_FORMAT = MatchFormat()
+
+FORMATS: Dict[str, MatchFormat] = {
+    "best_of_5": DEFAULT_FORMAT,
+    "best_of_3": MatchFormat(sets_to_win=2),
+    "best_of_3_no_ad": MatchFormat(sets_to_win=2, no_ad=True),
+    # Third set replaced by a 10-point match tiebreak
+    "best_of_3_match_tiebreak": MatchFormat(sets_to_win=2, match_tiebreak_points=10),
+    # Tour doubles: no-ad games and a 10-point match tiebreak
+    "doubles": MatchFormat(sets_to_win=2, no_ad=True, match_tiebreak_points=10),
+    # Short sets to 4 games, tiebreak at 4-4
+    "short_sets": MatchFormat(sets_to_win=2, games_per_set=4),
+}
+
+_PRESET_NAMES = {match_format: name for name, match_format in FORMATS.items()}
+
+
+def parse_format(value: Union[None, str, Dict, MatchFormat]) -> MatchFormat:
+    """A preset name, a dict of MatchFormat fields (missing ones default), a MatchFormat or None for the default"""
+    if value is None:
+        return DEFAULT_FORMAT
+    if isinstance(value, MatchFormat):
+        return value.validate()
+    if isinstance(value, str):
+        if value.startswith("custom:"):
+            parts = value[len("custom:"):].split(":")
+            if len(parts) != len(MatchFormat._fields) or not all(part.isdigit() for part in parts):
+                raise ValueError(f"A custom match format is {len(MatchFormat._fields)} whole numbers: "
+                                 f"custom:{':'.join(MatchFormat._fields)}")
+            fields = [int(part) for part in parts]
+            if fields[3] not in (0, 1):
+                raise ValueError("no_ad must be 0 or 1 in a custom match format")
+            return MatchFormat(fields[0], fields[1], fields[2], bool(fields[3]), fields[4]).validate()
+        if value not in FORMATS:
+            raise ValueError(f"Unknown match format {value!r}, expected one of {sorted(FORMATS)}")
+        return FORMATS[value]
+    if not isinstance(value, dict):
+        raise ValueError(f"A match format is a preset name or a dict of fields, not {type(value).__name__}")
+    unknown = set(value) - set(MatchFormat._fields) - {"name"}
+    if unknown:
+        raise ValueError(f"Unknown match format fields {sorted(unknown)}")
+    for field in MatchFormat._fields:
+        if field in value and not isinstance(value[field], int):
+            raise ValueError(f"{field} must be a whole number")
+    base = parse_format(value["name"]) if value.get("name") else DEFAULT_FORMAT
+    return base._replace(**{field: value[field] for field in MatchFormat._fields if field in value}).validate()
@@ -0,0 +1,193 @@
+"""
+Secondary indexes over the matches in a registry, for GET /matches.
+
+A dashboard asks for "all live matches", "matches in a tiebreak",
+"matches with player X" or "recently finished", newest change first, a
+page at a time. MatchIndex answers those without looking at every match:
+it follows the registry as a listener and keeps
+
+  - live and finished: sets of match IDs, moved when a match is won,
+    reset, undone or redone;
+  - tiebreak: the matches currently in a tiebreak, updated only on points
+    whose events start or end one (or a set);
+  - players: name -> set of match IDs;
+  - recency: every change gives the match a new sequence number and
+    appends (seq, match ID) to a log, so the log is sorted by seq and by
+    time without ever being re-sorted. Older entries of a match stay in
+    the log and are skipped on read (their seq is no longer the match's);
+    they are filtered out once more than half of the log is stale.
+
+A page walks the log backwards from the cursor (the seq of the last match
+returned) and keeps matches in every filter set. When one filter is much
+smaller than the whole (a player's handful of matches), its members are
+sorted by seq instead of walking. A match changed between two pages moves
+to the front, past the cursor, so pages never repeat a match.
+"""
+
+import bisect
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from tennis_backend.match_registry import Match, MatchListener
+from tennis_backend.match_state import GAME_WON, MATCH_WON, NO_PLAYER, TIEBREAK_STARTED
+
+STATUSES = ("live", "finished")
+
+# Sort a filter's members instead of walking the log when it holds under this share of the matches
+_SELECTIVE = 1 / 8
+
+
+class MatchIndex(MatchListener):
+    """Status, player, tiebreak and recency indexes, updated as matches change"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self.matches: Dict[str, Match] = {}
+        self.live: Set[str] = set()
+        self.finished: Set[str] = set()
+        self.tiebreak: Set[str] = set()
+        self.players: Dict[str, Set[str]] = {}
+        self.seq: Dict[str, int] = {}             # match ID -> seq of its latest change
+        self.updated: Dict[str, float] = {}       # match ID -> time of its latest change
+        self._log: List[Tuple[int, str]] = []     # (seq, match ID), oldest first; stale entries skipped
+        self._next_seq = 1
+
+    # Listener hooks
+
+    def match_created(self, match: Match) -> None:
+        match_id = match.match_id
+        self.matches[match_id] = match
+        for name in match.state.names:
+            self.players.setdefault(name, set()).add(match_id)
+        self._refresh(match)
+
+    def point_scored(self, match: Match, player: int, events: int) -> None:
+        match_id = match.match_id
+        if events & (TIEBREAK_STARTED | GAME_WON | MATCH_WON):
+            if match.state.tiebreak:
+                self.tiebreak.add(match_id)
+            else:
+                self.tiebreak.discard(match_id)
+            if events & MATCH_WON:
+                self.live.discard(match_id)
+                self.finished.add(match_id)
+        # _touch, inlined: this runs on every point
+        seq = self._next_seq
+        self._next_seq = seq + 1
+        self.seq[match_id] = seq
+        self.updated[match_id] = self.clock()
+        log = self._log
+        log.append((seq, match_id))
+        if len(log) > 2 * len(self.seq) + 64:
+            self._compact()
+
+    def match_reset(self, match: Match) -> None:
+        self._refresh(match)
+
+    def match_undone(self, match: Match) -> None:
+        self._refresh(match)
+
+    def match_redone(self, match: Match) -> None:
+        self._refresh(match)
+
+    def match_removed(self, match: Match) -> None:
+        match_id = match.match_id
+        if self.matches.get(match_id) is not match:
+            return
+        del self.matches[match_id]
+        self.live.discard(match_id)
+        self.finished.discard(match_id)
+        self.tiebreak.discard(match_id)
+        for name in match.state.names:
+            ids = self.players.get(name)
+            if ids is not None:
+                ids.discard(match_id)
+                if not ids:
+                    del self.players[name]
+        del self.seq[match_id], self.updated[match_id]
+
+    # Out of memory is out of the listing, like a removal
+    match_evicted = match_removed
+
+    def _refresh(self, match: Match) -> None:
+        """Re-derive a match's status and tiebreak flag from its state (any change)"""
+        match_id = match.match_id
+        state = match.state
+        if state.winner == NO_PLAYER:
+            self.finished.discard(match_id)
+            self.live.add(match_id)
+        else:
+            self.live.discard(match_id)
+            self.finished.add(match_id)
+        if state.tiebreak:
+            self.tiebreak.add(match_id)
+        else:
+            self.tiebreak.discard(match_id)
+        self._touch(match_id)
+
+    def _touch(self, match_id: str) -> None:
+        seq = self._next_seq
+        self._next_seq = seq + 1
+        self.seq[match_id] = seq
+        self.updated[match_id] = self.clock()
+        log = self._log
+        log.append((seq, match_id))
+        if len(log) > 2 * len(self.seq) + 64:
+            self._compact()
+
+    def _compact(self) -> None:
+        # Dropping the stale entries keeps the rest in seq order
+        current = self.seq
+        self._log = [entry for entry in self._log if current.get(entry[1]) == entry[0]]
+
+    # Queries
+
+    def page(self, status: Optional[str] = None, player: Optional[str] = None, tiebreak: Optional[bool] = None,
+             updated_since: Optional[float] = None, before: Optional[int] = None,
+             limit: int = 50) -> Tuple[List[Match], Optional[int]]:
+        """
+        Up to limit matches passing every filter, most recently changed
+        first, changed before seq `before` (the previous page's cursor).
+        Returns them and the cursor of the next page (None: no more).
+        """
+        if status is not None and status not in STATUSES:
+            raise ValueError(f"Unknown status {status!r}, expected one of {STATUSES}")
+        required: List[Set[str]] = []
+        if status is not None:
+            required.append(self.live if status == "live" else self.finished)
+        if player is not None:
+            required.append(self.players.get(player, set()))
+        if tiebreak:
+            required.append(self.tiebreak)
+        excluded = self.tiebreak if tiebreak is False else None
+
+        def wanted(match_id: str) -> bool:
+            return all(match_id in ids for ids in required) and (excluded is None or match_id not in excluded)
+
+        smallest = min(required, key=len) if required else None
+        if smallest is not None and len(smallest) < len(self.seq) * _SELECTIVE:
+            seq = self.seq
+            entries = sorted((seq[match_id], match_id) for match_id in smallest if wanted(match_id))
+            walk = _newest_first(entries, before)
+        else:
+            walk = (entry for entry in _newest_first(self._log, before)
+                    if self.seq.get(entry[1]) == entry[0] and wanted(entry[1]))
+
+        found: List[Match] = []
+        for seq, match_id in walk:
+            if updated_since is not None and self.updated[match_id] < updated_since:
+                break  # everything after this changed earlier still
+            if len(found) == limit:
+                return found, self.seq[found[-1].match_id]
+            found.append(self.matches[match_id])
+        return found, None
+
+    def __len__(self) -> int:
+        return len(self.matches)
+
+
+def _newest_first(entries: List[Tuple[int, str]], before: Optional[int]):
+    """(seq, match ID) entries with seq < before, from the newest, given entries sorted by seq"""
+    stop = len(entries) if before is None else bisect.bisect_left(entries, (before,))
+    for index in range(stop - 1, -1, -1):
+        yield entries[index]
@@ -0,0 +1,298 @@
+import asyncio
+import uuid
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+from tennis_backend.history import DEFAULT_HISTORY_DEPTH, History
+from tennis_backend.match_format import DEFAULT_FORMAT, MatchFormat, parse_format
+from tennis_backend.match_state import NO_PLAYER, MatchState, score_point
+from tennis_backend.match_stats import MatchStats, is_break_point
+from tennis_backend.timeline import DEFAULT_CHECKPOINT_EVERY, Timeline
+from tennis_backend.transition_table import compile_format, score_point_table
+
+# Interchangeable scoring engines for the default format: same rules, same event flags.
+# Matches in any other format score with that format's compiled table.
+SCORING_ENGINES: Dict[str, Callable[[MatchState, int], int]] = {
+    "compact": score_point,
+    "table": score_point_table,
+}
+
+
+class MatchListener:
+    """
+    Something that follows every change to the matches in a registry
+    (persistence, push updates, ...). Override only what you need; listeners
+    run synchronously while the match lock is held, so keep them quick.
+    """
+
+    def match_created(self, match: "Match") -> None:
+        pass
+
+    def point_scored(self, match: "Match", player: int, events: int) -> None:
+        pass
+
+    def match_reset(self, match: "Match") -> None:
+        pass
+
+    def match_undone(self, match: "Match") -> None:
+        pass
+
+    def match_redone(self, match: "Match") -> None:
+        pass
+
+    def match_removed(self, match: "Match") -> None:
+        pass
+
+    def match_evicted(self, match: "Match") -> None:
+        """Dropped from memory to stay within a budget, but not deleted: a store keeps it"""
+        pass
+
+
+class Match:
+    """
+    A single match on one court.
+
+    Holds both players' compact state, an O(1) name -> player index lookup
+    and the lock that serializes scoring on this court. Matches never share
+    a lock, so courts are scored independently of each other.
+    """
+
+    def __init__(self, match_id: str, player_names: Sequence[str], engine: str = "compact",
+                 first_server: Optional[str] = None, number: int = 0,
+                 listeners: Optional[List[MatchListener]] = None, history_depth: int = DEFAULT_HISTORY_DEPTH,
+                 match_format: Union[None, str, Dict, MatchFormat] = None,
+                 checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY):
+        if len(player_names) != 2:
+            raise ValueError("A match needs exactly two players")
+        first, second = player_names
+        if first == second:
+            raise ValueError("Player names must be different")
+        if first_server is not None and first_server not in player_names:
+            raise ValueError("The first server must be one of the players")
+
+        self.match_id = match_id
+        self.number = number  # compact numeric ID, unique within the registry
+        self.listeners = listeners if listeners is not None else []
+        self.state = MatchState(player_names)
+        self.player_index = {first: 0, second: 1}
+        self.format = parse_format(match_format)
+        # Format rules are compiled into the table once per format, not checked per point
+        if self.format == DEFAULT_FORMAT:
+            self.score_point = SCORING_ENGINES[engine]
+        else:
+            self.score_point = compile_format(self.format).score_point
+        self.first_server = 1 if first_server == second else 0  # player index who served first
+        self.version = 0  # bumped by every point, reset, undo and redo
+        # Versions start over for every copy of a match (re-created, reloaded), so tags carry this too
+        self.incarnation = uuid.uuid4().hex[:8]
+        self.history = History(history_depth) if history_depth else None  # None: no undo
+        self.stats = MatchStats()
+        # Every point's winner plus periodic checkpoints, for the score at any earlier point; None: not kept
+        self.timeline = Timeline(checkpoint_every) if checkpoint_every else None
+        # What undo puts back
+        self._undoable = (self.state, self.stats) + ((self.timeline,) if self.timeline is not None else ())
+        self._lock: Optional[asyncio.Lock] = None
+        self._changed: Optional[asyncio.Future] = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # Created lazily so the lock binds to the server's running event loop
+        # rather than whichever loop existed when the match was created.
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    @property
+    def in_use(self) -> bool:
+        """Is a request holding the lock or waiting for it"""
+        lock = self._lock
+        # asyncio.Lock keeps no public waiter count; _waiters has been there since 3.4
+        return lock is not None and (lock.locked() or bool(getattr(lock, "_waiters", None)))
+
+    async def wait_for_change(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for the version to advance; False if it did not"""
+        changed = self._changed
+        if changed is None or changed.get_loop() is not asyncio.get_running_loop():
+            changed = self._changed = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(asyncio.shield(changed), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def _bump_version(self) -> None:
+        self.version += 1
+        changed = self._changed
+        if changed is not None:
+            # Wake every long-poll parked on this match
+            self._changed = None
+            if not changed.done():
+                changed.set_result(self.version)
+
+    def score(self, player: int) -> int:
+        """Award a point to player index (0 or 1) and tell the listeners; returns the event flags"""
+        state, stats = self.state, self.stats
+        if self.history is not None:
+            self.history.record(*self._undoable)
+        server = state.server(self.first_server)
+        break_point = is_break_point(state, server, self.format.no_ad)
+        tiebreak = state.tiebreak
+        events = self.score_point(state, player)
+        stats.record_point(state, player, server, break_point, tiebreak, events)
+        if self.timeline is not None:
+            self.timeline.record(player, state)
+        self._bump_version()
+        for listener in self.listeners:
+            listener.point_scored(self, player, events)
+        return events
+
+    def award_point(self, player_name: str) -> Dict:
+        """Award a point to player_name; the caller must hold the match lock"""
+        player = self.player_index[player_name]
+        self.score(player)
+        return self.state.to_player(player)
+
+    def parse_winners(self, winners: Union[str, Sequence[Union[int, str]]]) -> List[int]:
+        """
+        Turn a rally log into player indexes (0 or 1). Accepts a compact string
+        such as "AABAB" (A is the first player, B the second) or a list of
+        player names, "A"/"B" letters or 0/1 indexes; a player's name wins
+        over the letter it happens to spell. Raises ValueError naming the
+        first point that is none of those.
+        """
+        lookup = {"A": 0, "B": 1, 0: 0, 1: 1, **self.player_index}
+        parsed = []
+        for position, winner in enumerate(winners):
+            if isinstance(winner, bool) or winner not in lookup:
+                raise ValueError(f"Point {position}: unknown point winner {winner!r}")
+            parsed.append(lookup[winner])
+        return parsed
+
+    def award_points(self, winners: Sequence[int]) -> Optional[int]:
+        """
+        Apply point winners in order in one pass; the caller must hold the
+        match lock. Stops once the match has a winner and returns the index
+        of the first point rejected because of that (None if all applied).
+        """
+        state = self.state
+        for position, winner in enumerate(winners):
+            if state.winner != NO_PLAYER:
+                return position
+            self.score(winner)
+        return None
+
+    def reset(self) -> List[Dict]:
+        """Reset both players to the start of the match"""
+        if self.history is not None:
+            self.history.record(*self._undoable)
+        self.state.reset()
+        self.stats.reset()
+        if self.timeline is not None:
+            self.timeline.reset()
+        self._bump_version()
+        for listener in self.listeners:
+            listener.match_reset(self)
+        return self.player_list()
+
+    def undo(self) -> bool:
+        """Take back the last point or reset; False if there is nothing to take back"""
+        if self.history is None or not self.history.undo(*self._undoable):
+            return False
+        self._bump_version()
+        for listener in self.listeners:
+            listener.match_undone(self)
+        return True
+
+    def redo(self) -> bool:
+        """Put back the last point or reset taken back; False if there is none"""
+        if self.history is None or not self.history.redo(*self._undoable):
+            return False
+        self._bump_version()
+        for listener in self.listeners:
+            listener.match_redone(self)
+        return True
+
+    def state_at(self, point: int) -> MatchState:
+        """
+        The score after the first `point` points since the start (or the last
+        reset), from the nearest checkpoint; raises ValueError if the point is
+        not recorded or the match keeps no timeline.
+        """
+        if self.timeline is None:
+            raise ValueError("This match keeps no timeline of its points")
+        return self.timeline.state_at(point, self.state.names, self.score_point)
+
+    def player(self, player_name: str) -> Dict:
+        return self.state.to_player(self.player_index[player_name])
+
+    def player_list(self) -> List[Dict]:
+        return self.state.to_players()
+
+    def to_dict(self) -> Dict:
+        return {"id": self.match_id, "format": self.format.to_dict(), "players": self.player_list()}
+
+
+class MatchRegistry:
+    """All matches currently held by this process, keyed by match ID"""
+
+    def __init__(self, engine: str = "compact", history_depth: int = DEFAULT_HISTORY_DEPTH,
+                 checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY):
+        if engine not in SCORING_ENGINES:
+            raise ValueError(f"Unknown scoring engine {engine!r}, expected one of {sorted(SCORING_ENGINES)}")
+        self.engine = engine
+        self.history_depth = history_depth  # undo depth per match, 0 turns undo off
+        self.checkpoint_every = checkpoint_every  # points between timeline checkpoints, 0 keeps no timeline
+        self.listeners: List[MatchListener] = []
+        self._matches: Dict[str, Match] = {}
+        self._next_number = 1
+
+    def add_listener(self, listener: MatchListener) -> None:
+        self.listeners.append(listener)
+
+    def create(self, player_names: Sequence[str], match_id: Optional[str] = None,
+               first_server: Optional[str] = None, number: Optional[int] = None,
+               match_format: Union[None, str, Dict, MatchFormat] = None,
+               restore: Optional[Callable[["Match"], None]] = None) -> Match:
+        """
+        Register a new match; raises ValueError if the ID is already taken or
+        the format is invalid. restore brings a loaded match to its stored
+        score before any listener hears of it.
+        """
+        if match_id is None:
+            match_id = uuid.uuid4().hex[:12]
+        if match_id in self._matches:
+            raise ValueError(f"Match {match_id} already exists")
+        if number is None:
+            number = self._next_number
+        self._next_number = max(self._next_number, number + 1)
+
+        match = Match(match_id, player_names, self.engine, first_server, number, self.listeners, self.history_depth,
+                      match_format, self.checkpoint_every)
+        if restore is not None:
+            restore(match)
+        self._matches[match_id] = match
+        for listener in self.listeners:
+            listener.match_created(match)
+        return match
+
+    def get(self, match_id: str) -> Optional[Match]:
+        return self._matches.get(match_id)
+
+    def remove(self, match_id: str) -> Optional[Match]:
+        match = self._matches.pop(match_id, None)
+        if match is not None:
+            for listener in self.listeners:
+                listener.match_removed(match)
+        return match
+
+    def clear(self) -> None:
+        for match_id in list(self._matches):
+            self.remove(match_id)
+
+    def __contains__(self, match_id: str) -> bool:
+        return match_id in self._matches
+
+    def __iter__(self) -> Iterator[Match]:
+        return iter(list(self._matches.values()))
+
+    def __len__(self) -> int:
+        return len(self._matches)
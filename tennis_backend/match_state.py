@@ -0,0 +1,210 @@
+"""
+Compact match state and a scoring engine that runs on it natively.
+
+award_point_to_player in tennis_game.py works on two string-keyed dicts per
+match. MatchState keeps the same information in one slotted object:
+the per-player counters share a single list indexed by field offset plus
+player (0 or 1), points are stored as an index into POINTS_SEQUENCE, and
+finished sets are packed two bytes per set into an immutable bytes object.
+The converters produce and accept exactly the JSON shape served by the API.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+from tennis_backend.tennis_game import POINTS_SEQUENCE
+
+# Player index meaning "nobody" for advantage and winner
+NO_PLAYER = -1
+
+# Event flags returned by score_point
+GAME_WON = 1
+SET_WON = 2
+MATCH_WON = 4
+TIEBREAK_STARTED = 8
+
+GAMES_PER_SET = 6
+TIEBREAK_POINTS_TO_WIN = 7
+SETS_TO_WIN = 3
+GAME_POINT = len(POINTS_SEQUENCE) - 1  # index of 40
+
+# Offsets into MatchState.score; add the player index (0 or 1)
+POINTS = 0   # index into POINTS_SEQUENCE
+GAMES = 2    # games in the current set
+TIEBREAK_POINTS = 4
+
+
+class MatchState:
+    """Both players' score in one match"""
+
+    __slots__ = ("names", "score", "advantage", "tiebreak", "sets", "winner", "table_index")
+
+    def __init__(self, names: Sequence[str]):
+        self.names: Tuple[str, str] = (names[0], names[1])
+        self.score = [0, 0, 0, 0, 0, 0]  # points, games, tiebreak points for each player
+        self.advantage = NO_PLAYER
+        self.tiebreak = False
+        self.sets = b""                # finished sets: player 0 games, player 1 games, ...
+        self.winner = NO_PLAYER
+        self.table_index = -1          # cached row in transition_table.TRANSITIONS, -1 if unknown
+
+    def set_scores(self, player: int) -> List[int]:
+        """Games won by player in each finished set"""
+        return list(self.sets[player::2])
+
+    def sets_won(self, player: int) -> int:
+        sets = self.sets
+        other = 1 - player
+        return sum(1 for i in range(0, len(sets), 2) if sets[i + player] > sets[i + other])
+
+    def games_played(self) -> int:
+        """Games completed so far in the match (a tiebreak counts as one)"""
+        score = self.score
+        return sum(self.sets) + score[GAMES] + score[GAMES + 1]
+
+    def server(self, first_server: int = 0) -> int:
+        """
+        Player index serving the next point, given who served the first game.
+        Serve alternates every game; in a tiebreak the first server serves
+        one point, then the players alternate every two points.
+        """
+        server = (first_server + self.games_played()) % 2
+        if self.tiebreak:
+            played = self.score[TIEBREAK_POINTS] + self.score[TIEBREAK_POINTS + 1]
+            server = (server + (played + 1) // 2) % 2
+        return server
+
+    def reset(self) -> None:
+        self.__init__(self.names)
+
+    def snapshot(self) -> Tuple:
+        """Immutable copy of the score (everything but the names)"""
+        return (tuple(self.score), self.advantage, self.tiebreak, self.sets, self.winner)
+
+    def restore(self, snapshot: Tuple) -> None:
+        """Go back to a score taken with snapshot()"""
+        score, self.advantage, self.tiebreak, self.sets, self.winner = snapshot
+        self.score = list(score)
+        self.table_index = -1
+
+    def copy(self) -> "MatchState":
+        clone = MatchState.__new__(MatchState)
+        clone.names = self.names
+        clone.score = self.score[:]
+        clone.advantage = self.advantage
+        clone.tiebreak = self.tiebreak
+        clone.sets = self.sets
+        clone.winner = self.winner
+        clone.table_index = self.table_index
+        return clone
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, MatchState):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__[:-1])
+
+    def __repr__(self) -> str:
+        return f"MatchState({self.to_players()!r})"
+
+    def to_player(self, player: int) -> Dict:
+        """One player's score in the API's JSON shape"""
+        return {
+            "name": self.names[player],
+            "points": POINTS_SEQUENCE[self.score[POINTS + player]],
+            "current_set_games": self.score[GAMES + player],
+            "sets": self.set_scores(player),
+            "tiebreak": self.tiebreak,
+            "tiebreak_points": self.score[TIEBREAK_POINTS + player],
+            "advantage": self.advantage == player,
+            "winner": self.winner == player,
+        }
+
+    def to_players(self) -> List[Dict]:
+        return [self.to_player(0), self.to_player(1)]
+
+    @classmethod
+    def from_players(cls, player: Dict, opponent: Dict) -> "MatchState":
+        """Build a state from the two per-player dicts used by award_point_to_player"""
+        if len(player["sets"]) != len(opponent["sets"]):
+            raise ValueError("Both players must have the same number of finished sets")
+        if player["advantage"] and opponent["advantage"]:
+            raise ValueError("Only one player can have advantage")
+        if player["winner"] and opponent["winner"]:
+            raise ValueError("Only one player can win the match")
+
+        state = cls((player["name"], opponent["name"]))
+        state.score = [
+            POINTS_SEQUENCE.index(player["points"]), POINTS_SEQUENCE.index(opponent["points"]),
+            player["current_set_games"], opponent["current_set_games"],
+            player["tiebreak_points"], opponent["tiebreak_points"],
+        ]
+        state.tiebreak = player["tiebreak"]
+        state.advantage = 0 if player["advantage"] else 1 if opponent["advantage"] else NO_PLAYER
+        state.winner = 0 if player["winner"] else 1 if opponent["winner"] else NO_PLAYER
+        state.sets = bytes(games for pair in zip(player["sets"], opponent["sets"]) for games in pair)
+        return state
+
+
+def score_point(state: MatchState, winner: int) -> int:
+    """
+    Award a point to player index winner (0 or 1), following the same rules
+    as award_point_to_player. Returns the GAME_WON / SET_WON / MATCH_WON /
+    TIEBREAK_STARTED flags for what the point decided.
+    """
+    loser = 1 - winner
+    score = state.score
+    state.table_index = -1
+
+    # Tiebreak logic
+    if state.tiebreak:
+        score[TIEBREAK_POINTS + winner] += 1
+        won = score[TIEBREAK_POINTS + winner]
+        if won >= TIEBREAK_POINTS_TO_WIN and won - score[TIEBREAK_POINTS + loser] >= 2:
+            score[GAMES + winner] += 1  # 7 games (6 + tiebreak win)
+            return GAME_WON | _win_set(state, winner)
+        return 0
+
+    # Enter tiebreak if both reach 6 games in current set
+    if score[GAMES + winner] == GAMES_PER_SET and score[GAMES + loser] == GAMES_PER_SET:
+        state.tiebreak = True
+        score[TIEBREAK_POINTS + winner] = 1
+        score[TIEBREAK_POINTS + loser] = 0
+        return TIEBREAK_STARTED
+
+    if score[POINTS + winner] == GAME_POINT and score[POINTS + loser] == GAME_POINT:
+        # Deuce: advantage, back to deuce, or game
+        if state.advantage == NO_PLAYER:
+            state.advantage = winner
+            return 0
+        if state.advantage == loser:
+            state.advantage = NO_PLAYER
+            return 0
+        return _win_game(state, winner)
+    if score[POINTS + winner] == GAME_POINT or state.advantage == winner:
+        return _win_game(state, winner)
+
+    score[POINTS + winner] += 1
+    return 0
+
+
+def _win_game(state: MatchState, winner: int) -> int:
+    score = state.score
+    score[GAMES + winner] += 1
+    score[POINTS] = score[POINTS + 1] = 0
+    state.advantage = NO_PLAYER
+    won = score[GAMES + winner]
+    if won >= GAMES_PER_SET and won - score[GAMES + 1 - winner] >= 2:
+        return GAME_WON | _win_set(state, winner)
+    return GAME_WON
+
+
+def _win_set(state: MatchState, winner: int) -> int:
+    score = state.score
+    state.sets += bytes(score[GAMES:GAMES + 2])
+    score[:] = (0, 0, 0, 0, 0, 0)
+    state.advantage = NO_PLAYER
+    state.tiebreak = False
+    if state.sets_won(winner) >= SETS_TO_WIN:
+        events = SET_WON if state.winner == winner else SET_WON | MATCH_WON
+        state.winner = winner
+        return events
+    return SET_WON
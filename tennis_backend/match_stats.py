@@ -0,0 +1,149 @@
+"""
+Live match statistics kept up to date point by point.
+
+MatchStats is updated by Match.score in constant time per point: a handful
+of counters in one list indexed by field offset plus player (0 or 1), the
+same layout MatchState uses, and the points of finished sets packed into an
+immutable tuple that grows by one pair when a set ends. Nothing is ever
+recomputed from the point history, so reading the stats costs the same
+after five points as after five hours.
+
+snapshot() is O(1) like MatchState.snapshot(): the counters are copied into
+a small tuple and the finished sets are shared. The undo history stores one
+alongside every state snapshot, so undo and redo put the stats back exactly.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+from tennis_backend.match_state import GAME_POINT, GAME_WON, NO_PLAYER, POINTS, SET_WON, MatchState
+
+# Offsets into MatchStats.counts; add the player index (0 or 1) for per-player counters
+POINTS_WON = 0
+BREAK_POINTS_FACED = 2       # on the player's own serve
+BREAK_POINTS_CONVERTED = 4   # won as the returner
+LONGEST_POINT_STREAK = 6
+LONGEST_GAME_STREAK = 8
+TIEBREAKS_WON = 10
+SET_POINTS = 12              # points won in the current set
+DEUCES = 14                  # times a game reached deuce (40-40), shared
+POINT_STREAK_PLAYER = 15     # who won the last points in a row, and how many
+POINT_STREAK = 16
+GAME_STREAK_PLAYER = 17      # who won the last games in a row, and how many
+GAME_STREAK = 18
+_SIZE = 19
+
+
+def is_break_point(state: MatchState, server: int, no_ad: bool = False) -> bool:
+    """Would the returner win the current game by winning the next point"""
+    if state.tiebreak:
+        return False
+    returner = 1 - server
+    if state.advantage == returner:
+        return True
+    score = state.score
+    if score[POINTS + returner] != GAME_POINT:
+        return False
+    # 40-30 or better for the returner, or the deciding point at 40-40 without advantage
+    return score[POINTS + server] < GAME_POINT or (no_ad and state.advantage == NO_PLAYER)
+
+
+class MatchStats:
+    """Running statistics for one match"""
+
+    __slots__ = ("counts", "set_points")
+
+    def __init__(self):
+        self.counts = [0] * _SIZE
+        self.counts[POINT_STREAK_PLAYER] = self.counts[GAME_STREAK_PLAYER] = NO_PLAYER
+        self.set_points: Tuple[int, ...] = ()  # finished sets: points won by player 0, player 1, ...
+
+    def record_point(self, state: MatchState, winner: int, server: int, break_point: bool, tiebreak: bool,
+                     events: int) -> None:
+        """
+        Count a point scored into state. server, break_point and tiebreak
+        describe the score before the point; events are the engine's flags.
+        """
+        counts = self.counts
+        loser = 1 - winner
+        counts[POINTS_WON + winner] += 1
+        counts[SET_POINTS + winner] += 1
+
+        if counts[POINT_STREAK_PLAYER] == winner:
+            counts[POINT_STREAK] += 1
+        else:
+            counts[POINT_STREAK_PLAYER] = winner
+            counts[POINT_STREAK] = 1
+        if counts[POINT_STREAK] > counts[LONGEST_POINT_STREAK + winner]:
+            counts[LONGEST_POINT_STREAK + winner] = counts[POINT_STREAK]
+
+        if break_point:
+            counts[BREAK_POINTS_FACED + server] += 1
+            if winner != server:
+                counts[BREAK_POINTS_CONVERTED + winner] += 1
+
+        if events & GAME_WON:
+            if counts[GAME_STREAK_PLAYER] == winner:
+                counts[GAME_STREAK] += 1
+            else:
+                counts[GAME_STREAK_PLAYER] = winner
+                counts[GAME_STREAK] = 1
+            if counts[GAME_STREAK] > counts[LONGEST_GAME_STREAK + winner]:
+                counts[LONGEST_GAME_STREAK + winner] = counts[GAME_STREAK]
+            if events & SET_WON:
+                if tiebreak:
+                    counts[TIEBREAKS_WON + winner] += 1
+                self.set_points += (counts[SET_POINTS], counts[SET_POINTS + 1])
+                counts[SET_POINTS] = counts[SET_POINTS + 1] = 0
+        elif not state.tiebreak:
+            score = state.score
+            if score[POINTS + winner] == GAME_POINT == score[POINTS + loser] and state.advantage == NO_PLAYER:
+                counts[DEUCES] += 1
+
+    def reset(self) -> None:
+        self.__init__()
+
+    def snapshot(self) -> Tuple:
+        return tuple(self.counts), self.set_points
+
+    def restore(self, snapshot: Tuple) -> None:
+        counts, self.set_points = snapshot
+        self.counts = list(counts)
+
+    def points_per_set(self) -> List[List[int]]:
+        """Points won by each player in every finished set and the current one"""
+        points = self.set_points
+        sets = [[points[i], points[i + 1]] for i in range(0, len(points), 2)]
+        current = self.counts[SET_POINTS:SET_POINTS + 2]
+        if any(current) or not sets:
+            sets.append(current)
+        return sets
+
+    def to_dict(self, names: Sequence[str]) -> Dict:
+        counts = self.counts
+        players = []
+        for player in (0, 1):
+            other = 1 - player
+            faced = counts[BREAK_POINTS_FACED + player]
+            players.append({
+                "name": names[player],
+                "points_won": counts[POINTS_WON + player],
+                "break_points_faced": faced,
+                "break_points_saved": faced - counts[BREAK_POINTS_CONVERTED + other],
+                "break_point_chances": counts[BREAK_POINTS_FACED + other],
+                "break_points_converted": counts[BREAK_POINTS_CONVERTED + player],
+                "longest_point_streak": counts[LONGEST_POINT_STREAK + player],
+                "longest_game_streak": counts[LONGEST_GAME_STREAK + player],
+                "tiebreaks_won": counts[TIEBREAKS_WON + player],
+            })
+        return {
+            "players": players,
+            "deuces": counts[DEUCES],
+            "points_per_set": self.points_per_set(),
+            "point_streak": _streak(names, counts[POINT_STREAK_PLAYER], counts[POINT_STREAK]),
+            "game_streak": _streak(names, counts[GAME_STREAK_PLAYER], counts[GAME_STREAK]),
+        }
+
+
+def _streak(names: Sequence[str], player: int, length: int) -> Dict:
+    """The current run of points or games won in a row"""
+    return {"player": None if player == NO_PLAYER else names[player], "length": length}
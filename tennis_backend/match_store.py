@@ -0,0 +1,270 @@
+"""
+Durable match stores behind the API.
+
+The registry stays the working set that every request scores against; a
+store is a MatchListener that keeps a durable copy of it. Handlers change a
+match under its lock and then await store.persist(match) before answering,
+so a response only goes out once its change is stored.
+
+MemoryStore keeps nothing and returns at once (the default). SQLiteStore
+keeps one row per match in a WAL-mode database. A single writer owns the
+only write connection; with group commit it commits at once when it is
+idle, and every match changed while a commit is running, by any number of
+concurrent requests, goes into the next transaction together, which wakes
+all their handlers when it commits. Reads (loading a
+match another process stored) go through a small pool of read-only
+connections.
+"""
+
+import asyncio
+import json
+import queue
+import sqlite3
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from tennis_backend.match_registry import Match, MatchListener, MatchRegistry
+from tennis_backend.match_state import MatchState
+
+# score (6 x u16), advantage, tiebreak, winner; then the packed sets
+_STATE = struct.Struct("<6Hb?b")
+
+# (id, number, players as JSON, first server index, encoded state, format key)
+Row = Tuple[str, int, str, int, bytes, str]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id TEXT PRIMARY KEY,
+    number INTEGER NOT NULL,
+    players TEXT NOT NULL,
+    first_server INTEGER NOT NULL,
+    state BLOB NOT NULL,
+    format TEXT NOT NULL
+)
+"""
+
+COLUMNS = "id, number, players, first_server, state, format"
+
+
+def encode_state(state: MatchState) -> bytes:
+    return _STATE.pack(*state.score, state.advantage, state.tiebreak, state.winner) + state.sets
+
+
+def decode_state(state: MatchState, data: bytes) -> None:
+    *score, advantage, tiebreak, winner = _STATE.unpack_from(data)
+    state.restore((tuple(score), advantage, tiebreak, bytes(data[_STATE.size:]), winner))
+
+
+def to_row(match: Match) -> Row:
+    return (match.match_id, match.number, json.dumps(list(match.state.names)), match.first_server,
+            encode_state(match.state), match.format.key)
+
+
+class MatchStore(MatchListener):
+    """Keeps nothing: matches live only as long as the process"""
+
+    def load(self, registry: MatchRegistry) -> int:
+        """
+        Recreate every stored match registry does not hold yet (a point log
+        may have recovered it already) and start following it; returns
+        matches loaded
+        """
+        registry.add_listener(self)
+        return 0
+
+    async def persist(self, match: Match) -> None:
+        """Return once every change made so far to match is durable"""
+
+    async def fetch(self, registry: MatchRegistry, match_id: str) -> Optional[Match]:
+        """Load a match this process does not hold yet (e.g. stored by another worker)"""
+        return None
+
+    async def close(self) -> None:
+        pass
+
+
+MemoryStore = MatchStore
+
+
+class SQLiteStore(MatchStore):
+    """
+    One row per match in SQLite (WAL mode). group_commit=True batches every
+    change made while the previous commit runs into the next transaction
+    (commit_interval > 0 also spaces commits at least that far apart); False
+    commits each persist() on its own, still through the single writer.
+    """
+
+    def __init__(self, path: str, group_commit: bool = True, commit_interval: float = 0.0, readers: int = 4,
+                 synchronous: str = "FULL"):
+        self.path = path
+        self.group_commit = group_commit
+        self.commit_interval = commit_interval
+
+        self._writer = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        # FULL syncs the WAL on every commit (survives power loss); NORMAL only survives process crashes
+        self._writer.execute(f"PRAGMA synchronous={synchronous}")
+        self._writer.execute(SCHEMA)
+        self._write_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+
+        self._readers: "queue.SimpleQueue[sqlite3.Connection]" = queue.SimpleQueue()
+        for _ in range(readers):
+            self._readers.put(sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False))
+        self._read_threads = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="sqlite-reader")
+
+        # Matches changed since the last commit: match ID -> match, or None once removed
+        self._dirty: Dict[str, Optional[Match]] = {}
+        self._batch: Optional[asyncio.Future] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.commits = 0
+
+    # Listener hooks: only mark the match, the writer reads its state at commit time
+
+    def match_created(self, match: Match) -> None:
+        self._dirty[match.match_id] = match
+
+    def point_scored(self, match: Match, player: int, events: int) -> None:
+        self._dirty[match.match_id] = match
+
+    def match_reset(self, match: Match) -> None:
+        self._dirty[match.match_id] = match
+
+    def match_undone(self, match: Match) -> None:
+        self._dirty[match.match_id] = match
+
+    def match_redone(self, match: Match) -> None:
+        self._dirty[match.match_id] = match
+
+    def match_removed(self, match: Match) -> None:
+        self._dirty[match.match_id] = None
+
+    # Reads
+
+    def load(self, registry: MatchRegistry) -> int:
+        rows = self._read(lambda connection: connection.execute(
+            f"SELECT {COLUMNS} FROM matches ORDER BY number").fetchall())
+        # The point log, when there is one, recovered its matches first and with their undo history
+        loaded = [_restore(registry, row) for row in rows if row[0] not in registry]
+        registry.add_listener(self)
+        return len(loaded)
+
+    async def fetch(self, registry: MatchRegistry, match_id: str) -> Optional[Match]:
+        loop = asyncio.get_running_loop()
+        row = await loop.run_in_executor(self._read_threads, self._read, lambda connection: connection.execute(
+            f"SELECT {COLUMNS} FROM matches WHERE id = ?", (match_id,)).fetchone())
+        if row is None or match_id in registry:
+            return registry.get(match_id)
+        return _restore(registry, row)
+
+    def _read(self, query):
+        connection = self._readers.get()
+        try:
+            return query(connection)
+        finally:
+            self._readers.put(connection)
+
+    # Writes
+
+    async def persist(self, match: Match) -> None:
+        if not self.group_commit:
+            changes = {match.match_id: self._dirty.pop(match.match_id, match)}
+            try:
+                await self._commit(self._rows(changes))
+            except Exception:
+                self._keep(changes)
+                raise
+            return
+
+        self._ensure_writer()
+        if self._batch is None:
+            self._batch = asyncio.get_running_loop().create_future()
+            self._wake.set()
+        await asyncio.shield(self._batch)
+
+    def _ensure_writer(self) -> None:
+        # Started lazily so the writer runs on the server's event loop
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wake = asyncio.Event()
+            self._batch = None
+            self._task = loop.create_task(self._write_loop())
+
+    async def _write_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        last_commit = 0.0
+        while True:
+            await self._wake.wait()
+            # A leader commits straight away; requests arriving while its commit runs
+            # queue up as followers for the next one
+            if self.commit_interval:
+                await asyncio.sleep(max(0.0, last_commit + self.commit_interval - loop.time()))
+            self._wake.clear()
+            batch, self._batch = self._batch, None
+            changes, self._dirty = self._dirty, {}
+            try:
+                await self._commit(self._rows(changes))
+            except Exception as exc:
+                self._keep(changes)
+                batch.set_exception(exc)
+            else:
+                batch.set_result(None)
+            last_commit = loop.time()
+
+    def _keep(self, changes: Dict[str, Optional[Match]]) -> None:
+        """Mark the changes of a failed commit dirty again, unless a newer change marked them since"""
+        for match_id, match in changes.items():
+            self._dirty.setdefault(match_id, match)
+
+    def _rows(self, changes: Dict[str, Optional[Match]]) -> Tuple[List[Row], List[Tuple[str]]]:
+        """Encode the changed matches now, on the event loop, while no point is half-scored"""
+        upserts = [to_row(match) for match in changes.values() if match is not None]
+        deletes = [(match_id,) for match_id, match in changes.items() if match is None]
+        return upserts, deletes
+
+    async def _commit(self, rows: Tuple[List[Row], List[Tuple[str]]]) -> None:
+        await asyncio.get_running_loop().run_in_executor(self._write_thread, self._write, *rows)
+
+    def _write(self, upserts: List[Row], deletes: List[Tuple[str]]) -> None:
+        connection = self._writer
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(f"INSERT OR REPLACE INTO matches ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", upserts)
+            connection.executemany("DELETE FROM matches WHERE id = ?", deletes)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        self.commits += 1
+
+    async def close(self) -> None:
+        if self._dirty:
+            await self._commit(self._rows(self._dirty))
+            self._dirty = {}
+        if self._task is not None:
+            self._task.cancel()
+        self._write_thread.shutdown()
+        self._read_threads.shutdown()
+        self._writer.close()
+        while not self._readers.empty():
+            self._readers.get().close()
+
+    def stored_ids(self) -> List[str]:
+        """Every match ID currently committed, for tests and tools"""
+        rows = self._read(lambda connection: connection.execute("SELECT id FROM matches").fetchall())
+        return [match_id for (match_id,) in rows]
+
+
+def _restore(registry: MatchRegistry, row: Row) -> Match:
+    match_id, number, players, first_server, data, match_format = row
+    names = json.loads(players)
+
+    def restore(match: Match) -> None:
+        decode_state(match.state, data)
+        if match.timeline is not None:
+            match.timeline.restart(match.state)  # points before the stored score are not kept
+
+    # Listeners hear of the match at its stored score, not at 0-0
+    return registry.create(names, match_id=match_id, first_server=names[first_server], number=number,
+                           match_format=match_format, restore=restore)
@@ -0,0 +1,185 @@
+"""
+Low-overhead metrics in the Prometheus text format.
+
+Three sources feed one Metrics object:
+  * MetricsMiddleware, a plain ASGI middleware, times every HTTP request
+    into a latency histogram per method, route template and status: two
+    perf_counter() calls, one dict lookup and a bisect;
+  * MatchMetrics follows the registry as a listener and counts what the
+    scoring engine reports for each point (points, games, sets, tiebreaks
+    started, matches won) plus resets, undos and redos, with int additions;
+  * gauges are callables read only when /metrics is scraped, so keeping
+    them costs nothing per request.
+
+Everything is per process: with uvicorn --workers N each worker reports its
+own numbers.
+"""
+
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+from tennis_backend.match_registry import Match, MatchListener
+from tennis_backend.match_state import GAME_WON, MATCH_WON, SET_WON, TIEBREAK_STARTED
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds; most routes answer well inside a millisecond
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+
+# Requests that matched no route share one label, so junk URLs cannot add series
+UNMATCHED = "unmatched"
+
+
+class Histogram:
+    """Observation counts per bucket (not cumulative until rendered), their sum and count"""
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class MatchMetrics(MatchListener):
+    """Counts scoring events as the engine reports them"""
+
+    def __init__(self):
+        self.points = 0
+        self.games = 0
+        self.sets = 0
+        self.tiebreaks = 0
+        self.matches_won = 0
+        self.resets = 0
+        self.undos = 0
+        self.redos = 0
+
+    def point_scored(self, match: Match, player: int, events: int) -> None:
+        self.points += 1
+        if events:
+            if events & GAME_WON:
+                self.games += 1
+            if events & SET_WON:
+                self.sets += 1
+            if events & TIEBREAK_STARTED:
+                self.tiebreaks += 1
+            if events & MATCH_WON:
+                self.matches_won += 1
+
+    def match_reset(self, match: Match) -> None:
+        self.resets += 1
+
+    def match_undone(self, match: Match) -> None:
+        self.undos += 1
+
+    def match_redone(self, match: Match) -> None:
+        self.redos += 1
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Request histograms, scoring counters and gauges, rendered for Prometheus"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.requests: Dict[Tuple[str, str, int], Histogram] = {}
+        self.scoring = MatchMetrics()
+        self.gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self.counters: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route, status)
+        histogram = self.requests.get(key)
+        if histogram is None:
+            histogram = self.requests[key] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> None:
+        """Report read() as gauge name on every scrape"""
+        self.gauges[name] = (help_text, read)
+
+    def counter(self, name: str, help_text: str, read: Callable[[], float]) -> None:
+        """Report read(), a count that only goes up, as counter name on every scrape"""
+        self.counters[name] = (help_text, read)
+
+    def render(self) -> str:
+        lines: List[str] = [
+            "# HELP http_request_duration_seconds Time from request to the end of the response",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        bucket_labels = [repr(bound) for bound in self.buckets] + ["+Inf"]
+        for (method, route, status), histogram in sorted(self.requests.items()):
+            labels = f'method="{method}",route="{_label(route)}",status="{status}"'
+            total = 0
+            for le, count in zip(bucket_labels, histogram.counts):
+                total += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{le}"}} {total}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum!r}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {total}")
+
+        scoring = self.scoring
+        for name, help_text, value in (
+            ("tennis_points_total", "Points awarded", scoring.points),
+            ("tennis_games_total", "Games won", scoring.games),
+            ("tennis_sets_total", "Sets won", scoring.sets),
+            ("tennis_tiebreaks_total", "Tiebreaks started", scoring.tiebreaks),
+            ("tennis_matches_won_total", "Matches won", scoring.matches_won),
+            ("tennis_resets_total", "Matches reset", scoring.resets),
+            ("tennis_undos_total", "Changes taken back", scoring.undos),
+            ("tennis_redos_total", "Changes put back", scoring.redos),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {value}"]
+        for name, (help_text, read) in self.counters.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {read()}"]
+
+        for name, (help_text, read) in self.gauges.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {read()}"]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Times each HTTP request into metrics, labelled with its route template rather than its URL"""
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - start
+            # The router leaves the matched route in the scope
+            route = scope.get("route")
+            key = (scope["method"], UNMATCHED if route is None else route.path, status)
+            histogram = self.metrics.requests.get(key)
+            if histogram is None:
+                self.metrics.observe_request(*key, elapsed)
+            else:
+                histogram.observe(elapsed)
@@ -0,0 +1,248 @@
+"""
+Event-sourced persistence: an append-only binary point log plus snapshots.
+
+Every change to a match is appended to the current log segment as one
+fixed-size record (sequence number, match number, kind, point winner), so
+scoring a point costs one 16-byte write. Match creations also add a line to
+a small JSON catalog with the match ID, players, first server and format,
+which the fixed-size records cannot hold.
+
+Every snapshot_every records the whole registry is written as one compact
+snapshot and a new log segment is started; older segments and snapshots are
+deleted. On startup recover() loads the newest snapshot and replays only the
+records after it, reading the segments through mmap.
+"""
+
+import json
+import mmap
+import os
+import pickle
+import struct
+from functools import partial
+from typing import Dict, Iterator, Tuple
+
+from tennis_backend.match_registry import Match, MatchListener, MatchRegistry
+
+# Sequence number, match number, kind, point winner, padding
+RECORD = struct.Struct("<QIBB2x")
+
+CREATE = 1
+POINT = 2
+RESET = 3
+REMOVE = 4
+UNDO = 5
+REDO = 6
+
+CATALOG_FILE = "matches.jsonl"
+SEGMENT_PREFIX = "points-"
+SNAPSHOT_PREFIX = "snapshot-"
+
+
+class PointLog(MatchListener):
+    """Durable record of every match change, attached to a registry as a listener"""
+
+    def __init__(self, directory: str, registry: MatchRegistry, snapshot_every: int = 1_000_000,
+                 fsync: bool = False):
+        self.directory = directory
+        self.registry = registry
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync  # fsync every record, not just hand it to the OS
+        self.seq = 0
+        self._since_snapshot = 0
+        self._segment = None
+        self._catalog = None
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def open(cls, directory: str, registry: MatchRegistry, **options) -> "PointLog":
+        """Recover the registry from directory, then log every later change to it"""
+        log = cls(directory, registry, **options)
+        log.recover()
+        log._catalog = open(os.path.join(directory, CATALOG_FILE), "a", encoding="utf-8")
+        log._start_segment()
+        registry.add_listener(log)
+        return log
+
+    def close(self) -> None:
+        """Stop logging and close the files"""
+        if self in self.registry.listeners:
+            self.registry.listeners.remove(self)
+        for handle in (self._segment, self._catalog):
+            if handle is not None:
+                handle.close()
+        self._segment = self._catalog = None
+
+    # Listener hooks: one record per change
+
+    def match_created(self, match: Match) -> None:
+        entry = {"number": match.number, "id": match.match_id, "players": list(match.state.names),
+                 "first_server": match.first_server, "format": match.format.key}
+        self._catalog.write(json.dumps(entry) + "\n")
+        self._catalog.flush()
+        self._append(CREATE, match.number)
+
+    def point_scored(self, match: Match, player: int, events: int) -> None:
+        self._append(POINT, match.number, player)
+
+    def match_reset(self, match: Match) -> None:
+        self._append(RESET, match.number)
+
+    def match_undone(self, match: Match) -> None:
+        self._append(UNDO, match.number)
+
+    def match_redone(self, match: Match) -> None:
+        self._append(REDO, match.number)
+
+    def match_removed(self, match: Match) -> None:
+        self._append(REMOVE, match.number)
+
+    def _append(self, kind: int, number: int, winner: int = 0) -> None:
+        self.seq += 1
+        self._segment.write(RECORD.pack(self.seq, number, kind, winner))
+        self._segment.flush()
+        if self.fsync:
+            os.fsync(self._segment.fileno())
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    # Snapshots
+
+    def snapshot(self) -> str:
+        """Write every match state as of the current sequence number and start a new segment"""
+        # Undo history goes along, so UNDO/REDO records after the snapshot replay correctly
+        matches = [
+            (match.number, match.match_id, match.state.names, match.first_server, match.state.snapshot(),
+             match.history, match.format.key, match.stats.snapshot(),
+             None if match.timeline is None else match.timeline.snapshot())
+            for match in self.registry
+        ]
+        path = os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{self.seq:020d}.bin")
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as handle:
+            pickle.dump({"seq": self.seq, "matches": matches}, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, path)
+
+        self._since_snapshot = 0
+        if self._segment is not None:
+            self._start_segment()
+        # Everything older is covered by the new snapshot
+        for name in os.listdir(self.directory):
+            older_snapshot = name.startswith(SNAPSHOT_PREFIX) and name < os.path.basename(path)
+            older_segment = name.startswith(SEGMENT_PREFIX) and _first_seq(name) <= self.seq
+            if older_snapshot or older_segment:
+                os.remove(os.path.join(self.directory, name))
+        return path
+
+    def _start_segment(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{self.seq + 1:020d}.log")
+        self._segment = open(path, "ab")
+
+    # Recovery
+
+    def recover(self) -> int:
+        """Load the newest snapshot into the registry and replay the log after it; returns records replayed"""
+        catalog = self._read_catalog()
+        snapshot_seq, by_number = self._load_snapshot()
+        self.seq = snapshot_seq
+
+        replayed = 0
+        for seq, number, kind, winner in self._records_after(snapshot_seq):
+            if kind == POINT:
+                match = by_number.get(number)
+                if match is not None:
+                    match.score(winner)
+            elif kind == CREATE:
+                entry = catalog[number]
+                players = entry["players"]
+                by_number[number] = self.registry.create(
+                    players, match_id=entry["id"], first_server=players[entry["first_server"]], number=number,
+                    match_format=entry["format"])
+            elif kind == RESET:
+                by_number[number].reset()
+            elif kind == REMOVE:
+                self.registry.remove(by_number.pop(number).match_id)
+            elif kind == UNDO:
+                by_number[number].undo()
+            elif kind == REDO:
+                by_number[number].redo()
+            self.seq = seq
+            replayed += 1
+        self._since_snapshot = replayed
+        return replayed
+
+    def _read_catalog(self) -> Dict[int, Dict]:
+        path = os.path.join(self.directory, CATALOG_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as handle:
+            entries = (json.loads(line) for line in handle if line.strip())
+            return {entry["number"]: entry for entry in entries}
+
+    def _load_snapshot(self) -> Tuple[int, Dict[int, Match]]:
+        snapshots = sorted(name for name in os.listdir(self.directory)
+                           if name.startswith(SNAPSHOT_PREFIX) and name.endswith(".bin"))
+        if not snapshots:
+            return 0, {}
+        with open(os.path.join(self.directory, snapshots[-1]), "rb") as handle:
+            snapshot = pickle.load(handle)
+
+        by_number = {}
+        for number, match_id, names, first_server, state, history, match_format, stats, timeline in snapshot["matches"]:
+            # Listeners hear of the match as snapshotted, not at 0-0
+            by_number[number] = self.registry.create(
+                names, match_id=match_id, first_server=names[first_server], number=number, match_format=match_format,
+                restore=partial(_restore_snapshot, state=state, history=history, stats=stats, timeline=timeline))
+        return snapshot["seq"], by_number
+
+    def _records_after(self, seq: int) -> Iterator[Tuple[int, int, int, int]]:
+        """Every record with a sequence number above seq, oldest first"""
+        segments = sorted(name for name in os.listdir(self.directory) if name.startswith(SEGMENT_PREFIX))
+        for position, name in enumerate(segments):
+            following = segments[position + 1:]
+            if following and _first_seq(following[0]) <= seq + 1:
+                continue  # the whole segment is at or before seq
+            yield from _read_segment(os.path.join(self.directory, name), seq)
+
+
+def _restore_snapshot(match: Match, state, history, stats, timeline) -> None:
+    match.state.restore(state)
+    match.stats.restore(stats)
+    if match.timeline is not None:
+        if timeline is not None:
+            match.timeline.restore(timeline)
+        else:
+            match.timeline.restart(match.state)  # snapshotted with CHECKPOINT_EVERY=0
+    match.history = history
+
+
+def _first_seq(segment_name: str) -> int:
+    return int(segment_name[len(SEGMENT_PREFIX):].split(".")[0])
+
+
+def _read_segment(path: str, after_seq: int) -> Iterator[Tuple[int, int, int, int]]:
+    size = os.path.getsize(path)
+    # A crash can leave half a record at the end; it was never acknowledged
+    usable = size - size % RECORD.size
+    if usable == 0:
+        return
+    # Sequence numbers are contiguous within a segment, so the tail starts at a known offset
+    skip = max(0, after_seq + 1 - _first_seq(os.path.basename(path))) * RECORD.size
+    if skip >= usable:
+        return
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            yield from RECORD.iter_unpack(view[skip:usable])
+        finally:
+            view.release()
+
+
+def recover_registry(directory: str, engine: str = "compact") -> Tuple[MatchRegistry, int]:
+    """Rebuild a registry from a log directory without attaching a log to it"""
+    registry = MatchRegistry(engine=engine)
+    return registry, PointLog(directory, registry).recover()
@@ -0,0 +1,181 @@
+"""
+On-demand sampling profiler for the live process.
+
+While a session runs, a background thread wakes every interval, reads the
+event-loop thread's current stack from sys._current_frames() and counts it.
+Every handler in main.py and the scoring engines run on that thread, so the
+counts show where request time goes without instrumenting any of it. Stacks
+whose innermost frame is the selector waiting for I/O are counted as idle
+and left out of the results.
+
+During a session the interpreter's GIL switch interval is lowered to half
+the sampling interval so a busy loop still gets sampled on time. Nothing
+runs between sessions: no thread, no hooks, and the request counter in
+ProfilerMiddleware is one attribute check. main.py only installs it when
+PROFILER_ENABLED is set.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+DEFAULT_INTERVAL = 0.001  # seconds between samples
+
+# Innermost frames that mean the loop is waiting for I/O
+_IDLE_FRAMES = {("selectors.py", "select"), ("selectors.py", "poll")}
+
+
+def _frame_label(code) -> str:
+    directory, filename = os.path.split(code.co_filename)
+    name = getattr(code, "co_qualname", code.co_name)  # Python 3.11+
+    return f"{os.path.basename(directory)}/{filename}:{name}"
+
+
+class Profile:
+    """Stacks sampled during one session, outermost frame first"""
+
+    def __init__(self, stacks: Counter, idle: int, elapsed: float, interval: float, requests: int):
+        self.stacks = stacks
+        self.idle = idle
+        self.elapsed = elapsed
+        self.interval = interval
+        self.requests = requests
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """One "outer;...;inner count" line per distinct stack, as flamegraph.pl and speedscope read them"""
+        lines = sorted(f"{';'.join(stack)} {count}" for stack, count in self.stacks.items())
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def hot_functions(self, top: int = 25) -> List[Dict]:
+        """Functions by samples spent in them (self) and under them (total)"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for frame in set(stack):  # recursion counts once per sample
+                total[frame] += count
+        samples = self.samples or 1
+        ranked = sorted(total, key=lambda frame: (own[frame], total[frame]), reverse=True)[:top]
+        return [{"function": frame, "self": own[frame], "total": total[frame],
+                 "self_percent": round(100 * own[frame] / samples, 2),
+                 "total_percent": round(100 * total[frame] / samples, 2)} for frame in ranked]
+
+    def to_dict(self, top: int = 25) -> Dict:
+        return {
+            "seconds": round(self.elapsed, 3),
+            "interval": self.interval,
+            "requests": self.requests,
+            "samples": self.samples,
+            "idle_samples": self.idle,
+            "functions": self.hot_functions(top),
+            "collapsed": self.collapsed(),
+        }
+
+
+class Sampler:
+    """Samples one thread's stack from a background thread until stopped"""
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.idle = 0
+        self._labels: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    def start(self) -> None:
+        # A busy loop thread only hands over the GIL every switch interval (5 ms by default)
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 2))
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self) -> None:
+        labels, stacks = self._labels, self.stacks
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+                self.idle += 1
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            stack.reverse()
+            stacks[tuple(stack)] += 1
+
+
+class Profiler:
+    """Runs one profiling session at a time over the event-loop thread"""
+
+    def __init__(self):
+        self.active = False
+        self.requests = 0
+        self._target: Optional[int] = None
+        self._enough: Optional[asyncio.Event] = None
+
+    def request_done(self) -> None:
+        self.requests += 1
+        if self._target is not None and self.requests >= self._target:
+            self._enough.set()
+
+    async def run(self, seconds: float, requests: Optional[int] = None,
+                  interval: float = DEFAULT_INTERVAL) -> Profile:
+        """Sample for seconds, or until requests more requests have completed if that comes first"""
+        if self.active:
+            raise RuntimeError("A profile is already running")
+        self.active = True
+        self.requests = 0
+        self._target = requests
+        self._enough = asyncio.Event()
+        sampler = Sampler(threading.get_ident(), interval)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await asyncio.wait_for(self._enough.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            sampler.stop()
+            self.active = False
+            self._target = None
+        return Profile(sampler.stacks, sampler.idle, time.perf_counter() - start, interval, self.requests)
+
+
+class ProfilerMiddleware:
+    """Counts completed HTTP requests while a session runs, for profiles of the next N requests"""
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if not self.profiler.active or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if self.profiler.active:
+                self.profiler.request_done()
+
@@ -0,0 +1,352 @@
+"""
+Bulk replay of historical point-by-point records.
+
+Each record is one match as a string of point winners relative to the
+server, in the format of the widely shared point-by-point archives:
+
+    S or A    the server won the point (A: an ace)
+    R or D    the returner won the point (D: a double fault)
+    ;         end of a game
+    .         end of a set
+    /         change of server inside a tiebreak
+
+server1 served the first game. Records come from a JSONL file (one object
+per line) or a CSV file with a header row; both use the fields id (or
+pbp_id), server1, server2, pbp and optionally format (a preset name or
+"custom:..." key). The file is streamed in chunks, so memory stays flat
+however large it is, and the chunks are scored in a process pool with a
+bounded number in flight.
+
+Every point goes through the scoring engine, and the separators are checked
+against what the engine decided, so corrupt or impossible sequences are
+reported with the position of the first bad character: an unknown
+character, a game or set boundary in the wrong place, a '/' outside a
+tiebreak or a point after the match was already won (which
+award_point_to_player would silently score).
+
+    python -m tennis_backend.replay matches.csv --workers 4 --output results.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from tennis_backend.match_format import DEFAULT_FORMAT, parse_format
+from tennis_backend.match_registry import SCORING_ENGINES
+from tennis_backend.match_state import GAME_WON, NO_PLAYER, SET_WON, TIEBREAK_POINTS, MatchState
+from tennis_backend.transition_table import compile_format
+
+SERVER_WON = "SA"
+RETURNER_WON = "RD"
+GAME_END = ";"
+SET_END = "."
+TIEBREAK_SWITCH = "/"
+# Point characters: did the server win it
+_SERVER_WON = {char: True for char in SERVER_WON}
+_SERVER_WON.update({char: False for char in RETURNER_WON})
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class ReplayError(ValueError):
+    """A sequence that cannot be a real match, at a position in the pbp string"""
+
+    def __init__(self, message: str, position: int, points: int = 0):
+        super().__init__(message)
+        self.position = position
+        self.points = points  # points scored before it
+
+
+class ReplayResult(NamedTuple):
+    id: str
+    players: Tuple[str, str]
+    winner: int                       # player index, NO_PLAYER if nobody won
+    sets: List[Tuple[int, int]]       # games per finished set
+    tiebreaks: List[Optional[int]]    # per finished set, the tiebreak loser's points (None without one)
+    points: int                       # points scored before the end or the first error
+    error: Optional[str] = None
+    position: Optional[int] = None    # index of the character that caused error
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return "invalid"
+        return "unfinished" if self.winner == NO_PLAYER else "complete"
+
+    @property
+    def score(self) -> str:
+        """Scoreline from the first player's side, e.g. 6-4 6-7(5) 7-6(10)"""
+        return " ".join(f"{first}-{second}" + (f"({loser})" if loser is not None else "")
+                        for (first, second), loser in zip(self.sets, self.tiebreaks))
+
+    def to_dict(self) -> Dict:
+        result = {
+            "id": self.id,
+            "players": list(self.players),
+            "status": self.status,
+            "winner": None if self.winner == NO_PLAYER else self.players[self.winner],
+            "score": self.score,
+            "sets": [list(games) for games in self.sets],
+            "points": self.points,
+        }
+        if self.error is not None:
+            result["error"] = self.error
+            result["position"] = self.position
+        return result
+
+
+def replay_points(pbp: str, score_point: Callable[[MatchState, int], int],
+                  players: Sequence[str] = ("server1", "server2")) -> MatchState:
+    """
+    Score a pbp string from 0-0 with score_point (player 0 serves first) and
+    return the final state; raises ReplayError at the first impossible character.
+    """
+    state = MatchState(players)
+    _replay(pbp, score_point, state, [])
+    return state
+
+
+def _replay(pbp: str, score_point: Callable[[MatchState, int], int], state: MatchState,
+            tiebreaks: List[Optional[int]]) -> int:
+    """Score pbp onto state, appending each finished set's tiebreak to tiebreaks; returns the points scored"""
+    expected = None       # separator the last point requires: GAME_END or SET_END
+    last_server = None    # who served the last point
+    game_server = 0       # who serves the current game, outside tiebreaks
+    points = 0
+    for position, char in enumerate(pbp):
+        server_won = _SERVER_WON.get(char)
+        if server_won is not None:
+            if state.winner != NO_PLAYER:
+                raise ReplayError(f"Point after {state.names[state.winner]} had already won the match", position,
+                                  points)
+            if expected is not None:
+                raise ReplayError(f"Missing {expected!r} after a finished {_unit(expected)}", position, points)
+            last_server = state.server() if state.tiebreak else game_server
+            winner = last_server if server_won else 1 - last_server
+            tiebreak_loser = state.score[TIEBREAK_POINTS + 1 - winner] if state.tiebreak else None
+            events = score_point(state, winner)
+            points += 1
+            if events & GAME_WON:
+                game_server = 1 - game_server
+                if events & SET_WON:
+                    tiebreaks.append(tiebreak_loser)
+                    expected = SET_END
+                else:
+                    expected = GAME_END
+        elif char == GAME_END or char == SET_END:
+            if expected is None:
+                raise ReplayError(f"{char!r} in the middle of a game", position, points)
+            if char != expected:
+                raise ReplayError(f"{char!r} after a finished {_unit(expected)}, expected {expected!r}", position,
+                                  points)
+            expected = None
+        elif char == TIEBREAK_SWITCH:
+            if not state.tiebreak or expected is not None:
+                raise ReplayError(f"{char!r} outside a tiebreak", position, points)
+            if state.server() == last_server:
+                raise ReplayError(f"{char!r} where the server does not change", position, points)
+        elif not char.isspace():
+            raise ReplayError(f"Unexpected character {char!r}", position, points)
+    return points
+
+
+def _unit(separator: str) -> str:
+    return "set" if separator == SET_END else "game"
+
+
+def replay_record(record: Dict, engine: str = "compact", match_format=None, record_id: str = "") -> ReplayResult:
+    """Replay one record (a JSONL object or CSV row); problems are reported in the result, not raised"""
+    match_id = next((str(record[key]) for key in ("id", "pbp_id") if record.get(key) not in (None, "")), record_id)
+    players = (str(record.get("server1") or "server1"), str(record.get("server2") or "server2"))
+    state = MatchState(players)
+    tiebreaks: List[Optional[int]] = []
+    try:
+        pbp = record.get("pbp")
+        if not isinstance(pbp, str):
+            raise ReplayError("No pbp string", 0)
+        record_format = record.get("format")
+        if record_format not in (None, "") and not isinstance(record_format, str):
+            raise ValueError(f"format must be a preset name or custom:... key, not {type(record_format).__name__}")
+        score_point = _engine(engine, parse_format(record_format or match_format))
+        points = _replay(pbp, score_point, state, tiebreaks)
+    except ReplayError as error:
+        return ReplayResult(match_id, players, state.winner, _sets(state), tiebreaks, error.points, str(error),
+                            error.position)
+    except ValueError as error:
+        return ReplayResult(match_id, players, NO_PLAYER, [], [], 0, str(error), None)
+    return ReplayResult(match_id, players, state.winner, _sets(state), tiebreaks, points)
+
+
+def _engine(engine: str, match_format) -> Callable[[MatchState, int], int]:
+    if match_format == DEFAULT_FORMAT:
+        return SCORING_ENGINES[engine]
+    return compile_format(match_format).score_point
+
+
+def _sets(state: MatchState) -> List[Tuple[int, int]]:
+    sets = state.sets
+    return [(sets[i], sets[i + 1]) for i in range(0, len(sets), 2)]
+
+
+def format_points(winners: Iterable[int], score_point: Callable[[MatchState, int], int] = SCORING_ENGINES["compact"],
+                  first_server: int = 0) -> str:
+    """The pbp string for points won by player index (player first_server serving first); the inverse of replay"""
+    state = MatchState(("", ""))
+    out = []
+    last_server = first_server
+    for winner in winners:
+        if state.winner != NO_PLAYER:
+            break
+        server = state.server(first_server)
+        if state.tiebreak and out and out[-1] not in (GAME_END, SET_END) and server != last_server:
+            out.append(TIEBREAK_SWITCH)
+        out.append("S" if winner == server else "R")
+        last_server = server
+        events = score_point(state, winner)
+        if events & SET_WON:
+            out.append(SET_END)
+        elif events & GAME_WON:
+            out.append(GAME_END)
+    if out and out[-1] == SET_END and state.winner != NO_PLAYER:
+        out.pop()  # archives leave the final set open
+    return "".join(out)
+
+
+# Streaming and sharding
+
+def read_records(path: str) -> Iterator[Tuple[int, object]]:
+    """(line number, raw JSONL line or CSV row dict) for each record, read lazily"""
+    with open(path, newline="", encoding="utf-8") as source:
+        if path.endswith(".csv"):
+            for number, row in enumerate(csv.DictReader(source), 2):
+                yield number, row
+        else:
+            for number, line in enumerate(source, 1):
+                if line.strip():
+                    yield number, line
+
+
+def _replay_chunk(chunk: List[Tuple[int, object]], engine: str, match_format: Optional[str]) -> List[ReplayResult]:
+    results = []
+    for number, item in chunk:
+        record_id = f"line {number}"
+        if isinstance(item, str):
+            try:
+                item = json.loads(item)
+            except ValueError as error:
+                results.append(ReplayResult(record_id, ("", ""), NO_PLAYER, [], [], 0, f"Bad JSON: {error}"))
+                continue
+            if not isinstance(item, dict):
+                results.append(ReplayResult(record_id, ("", ""), NO_PLAYER, [], [], 0, "Not a JSON object"))
+                continue
+        try:
+            results.append(replay_record(item, engine, match_format, record_id))
+        except Exception as error:  # one corrupt record must not take the chunk (and the pool run) down with it
+            results.append(ReplayResult(record_id, ("", ""), NO_PLAYER, [], [], 0, f"Unreadable record: {error!r}"))
+    return results
+
+
+def _chunks(records: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def replay_file(path: str, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                engine: str = "compact", match_format: Optional[str] = None) -> Iterator[ReplayResult]:
+    """
+    Replay every record in a JSONL or CSV file, yielding results in file order.
+    Chunks of chunk_size records are scored by a pool of workers processes
+    (all CPUs by default; 1 scores in this process), at most two per worker
+    in flight, so neither the input nor the results pile up in memory.
+    """
+    if engine not in SCORING_ENGINES:
+        raise ValueError(f"Unknown scoring engine {engine!r}, expected one of {sorted(SCORING_ENGINES)}")
+    if match_format is not None:
+        parse_format(match_format)  # fail before starting the pool
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(read_records(path), chunk_size)
+    if workers == 1:
+        for chunk in chunks:
+            yield from _replay_chunk(chunk, engine, match_format)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_replay_chunk, chunk, engine, match_format))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class ReplayStats:
+    """Running totals over replayed matches"""
+
+    def __init__(self):
+        self.statuses = {"complete": 0, "unfinished": 0, "invalid": 0}
+        self.points = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add(self, result: ReplayResult) -> None:
+        self.statuses[result.status] += 1
+        self.points += result.points
+
+    def stop(self) -> "ReplayStats":
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    @property
+    def matches(self) -> int:
+        return sum(self.statuses.values())
+
+    @property
+    def matches_per_second(self) -> float:
+        return self.matches / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        counts = ", ".join(f"{count:,} {status}" for status, count in self.statuses.items())
+        return (f"{self.matches:,} matches ({counts}), {self.points:,} points in {self.elapsed:.2f} s: "
+                f"{self.matches_per_second:,.0f} matches/s")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="JSONL or .csv file of point-by-point records")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--engine", choices=sorted(SCORING_ENGINES), default="compact")
+    parser.add_argument("--format", default=None, help="match format of records without one (default best_of_5)")
+    parser.add_argument("--output", default="-", help="JSONL results (default stdout)")
+    parser.add_argument("--invalid-only", action="store_true", help="only write invalid records")
+    args = parser.parse_args(argv)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    stats = ReplayStats()
+    try:
+        for result in replay_file(args.path, args.workers, args.chunk_size, args.engine, args.format):
+            stats.add(result)
+            if not args.invalid_only or result.error is not None:
+                output.write(json.dumps(result.to_dict()) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(stats.stop().summary(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
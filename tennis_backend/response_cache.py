@@ -0,0 +1,90 @@
+"""
+Pre-encoded player responses, one set per match.
+
+The scores only change when a point is scored, reset, undone or redone, and
+every one of those bumps the match version. ResponseCache keeps the JSON
+bytes of a match's player list (and of each player) together with the
+version they were encoded at, so a read is a dict lookup and a version
+compare, and the bytes go out as they are, without FastAPI's
+jsonable_encoder or a json.dumps per request. The first read after a change
+encodes again. orjson is used when installed (pip install -e .[fast]);
+otherwise the standard json module writes the same compact JSON.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+from tennis_backend.match_registry import Match, MatchListener
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def encode(value: Any) -> bytes:
+    """Compact UTF-8 JSON, byte for byte what FastAPI's JSONResponse sends"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+class _Entry:
+    __slots__ = ("match", "version", "players", "player")
+
+    def __init__(self, match: Match, version: int):
+        self.match = match
+        self.version = version
+        self.players: Optional[bytes] = None
+        self.player: Dict[str, bytes] = {}
+
+
+class ResponseCache(MatchListener):
+    """Player JSON per match, valid for one match version; follows the registry to drop removed matches"""
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, match: Match) -> _Entry:
+        # Read the version before the scores: bytes may be newer than the version they are kept under,
+        # never older, so a reader that sees the current version never gets a score from before it
+        version = match.version
+        entry = self._entries.get(match.match_id)
+        if entry is None or entry.version != version or entry.match is not match:
+            entry = self._entries[match.match_id] = _Entry(match, version)
+        return entry
+
+    def players(self, match: Match) -> bytes:
+        """Both players, as GET /players returns them"""
+        entry = self._entry(match)
+        if entry.players is None:
+            self.misses += 1
+            entry.players = encode(match.player_list())
+        else:
+            self.hits += 1
+        return entry.players
+
+    def player(self, match: Match, player_name: str) -> bytes:
+        """One player, as GET /players/{player_name} returns it"""
+        entry = self._entry(match)
+        body = entry.player.get(player_name)
+        if body is None:
+            self.misses += 1
+            body = entry.player[player_name] = encode(match.player(player_name))
+        else:
+            self.hits += 1
+        return body
+
+    def match_removed(self, match: Match) -> None:
+        self._entries.pop(match.match_id, None)
+
+    match_evicted = match_removed
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
@@ -0,0 +1,373 @@
+"""
+Match state shared by every worker process.
+
+With uvicorn --workers N each worker imports its own registry, so without
+this every worker keeps its own scores. SharedMatchRegistry instead keeps
+every match in one multiprocessing.shared_memory segment of fixed-size
+records, so any worker can score or read any match.
+
+Locking is per record and cheap:
+  * writers take an fcntl byte-range lock on the record's byte of a small
+    lock file (one syscall each way; the kernel drops it if a worker dies),
+    pull the record into the local MatchState, score with the normal engine
+    and write it back;
+  * readers take no lock at all. Every record starts with a sequence counter
+    that a writer makes odd while it writes and even again afterwards
+    (a seqlock); a reader retries if it saw an odd or changed counter.
+Creating and removing matches additionally hold byte 0 of the lock file.
+Outside a write, every read of match.state pulls the record first (a
+lock-free read as above), so scores, win probabilities and gauges all see
+other workers' points.
+
+Undo history, push feeds and the other listeners stay per process, so they
+only see changes made by their own worker.
+"""
+
+import asyncio
+import fcntl
+import os
+import struct
+import tempfile
+import uuid
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Dict, Iterator, Optional, Sequence, Union
+
+from tennis_backend.match_format import FORMATS, MatchFormat
+from tennis_backend.match_registry import Match, MatchRegistry
+from tennis_backend.match_state import NO_PLAYER, MatchState
+
+# seq, generation, version, used, first server, advantage, tiebreak, winner,
+# finished-set bytes, format preset, score (6 x u16), match ID, player names, finished sets
+RECORD = struct.Struct("<IIIBBbBbBBx6H32s48s48s32s")
+_SEQ = struct.Struct("<I")
+_VERSION = struct.Struct("<I")
+_VERSION_OFFSET = 8
+_USED_OFFSET = 12
+_ID_OFFSET = struct.calcsize("<IIIBBbBbBBx6H")
+
+MAX_ID_BYTES = 32
+MAX_NAME_BYTES = 48
+MAX_SET_BYTES = 32  # 16 finished sets, plenty for best of five
+
+# Records hold a match format as its index in this list, so only presets fit
+PRESET_FORMATS = list(FORMATS)
+
+DEFAULT_CAPACITY = 1024
+
+# How often a long-poll checks for changes made by other workers
+POLL_INTERVAL = 0.05
+
+# Lock-free read attempts before falling back to the record lock
+SPIN_LIMIT = 1000
+
+
+class SharedMatchTable:
+    """Fixed-size match records in a named shared-memory segment, plus their locks"""
+
+    def __init__(self, name: str, capacity: int = DEFAULT_CAPACITY, lock_dir: Optional[str] = None):
+        self.name = name
+        self.capacity = capacity
+        size = capacity * RECORD.size
+        try:
+            self._memory = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            self._memory = shared_memory.SharedMemory(name)
+            if self._memory.size < size:
+                raise ValueError(f"Shared segment {name} holds fewer than {capacity} records")
+        # The segment outlives any one worker; only unlink() removes it
+        resource_tracker.unregister(self._memory._name, "shared_memory")
+        self.buffer = self._memory.buf
+
+        lock_path = os.path.join(lock_dir or tempfile.gettempdir(), f"{name}.lock")
+        self._lock_file = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        self.lock_path = lock_path
+
+    @contextmanager
+    def locked(self, slot: int) -> Iterator[None]:
+        """Hold one record's lock; slot -1 is the table-wide lock for creating and removing"""
+        fcntl.lockf(self._lock_file, fcntl.LOCK_EX, 1, slot + 1)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self._lock_file, fcntl.LOCK_UN, 1, slot + 1)
+
+    def read(self, slot: int) -> tuple:
+        """A consistent copy of one record, without locking"""
+        buffer, offset = self.buffer, slot * RECORD.size
+        for _ in range(SPIN_LIMIT):
+            before = _SEQ.unpack_from(buffer, offset)[0]
+            if before & 1:
+                continue  # a writer is halfway through
+            record = RECORD.unpack_from(buffer, offset)
+            if _SEQ.unpack_from(buffer, offset)[0] == before:
+                return record
+        # A writer that died mid-write leaves the counter odd, but the kernel dropped its lock
+        with self.locked(slot):
+            return RECORD.unpack_from(buffer, offset)
+
+    def write(self, slot: int, *fields) -> None:
+        """Replace a record (all fields but seq); the caller holds its lock"""
+        buffer, offset = self.buffer, slot * RECORD.size
+        seq = _SEQ.unpack_from(buffer, offset)[0]
+        _SEQ.pack_into(buffer, offset, seq + 1)
+        RECORD.pack_into(buffer, offset, seq + 1, *fields)
+        _SEQ.pack_into(buffer, offset, seq + 2)
+
+    def version(self, slot: int) -> int:
+        return _VERSION.unpack_from(self.buffer, slot * RECORD.size + _VERSION_OFFSET)[0]
+
+    def used(self, slot: int) -> bool:
+        return bool(self.buffer[slot * RECORD.size + _USED_OFFSET])
+
+    def find(self, match_id: str) -> Optional[int]:
+        """Slot holding match_id; compares the raw ID bytes first and confirms with a full read"""
+        buffer, size = self.buffer, RECORD.size
+        encoded = match_id.encode().ljust(MAX_ID_BYTES, b"\0")
+        for slot in range(self.capacity):
+            start = slot * size + _ID_OFFSET
+            if buffer[start:start + MAX_ID_BYTES] == encoded:
+                record = self.read(slot)
+                if record[3] and record[16] == encoded:
+                    return slot
+        # A write zero-fills the record before packing it, so the raw scan can miss a record
+        # being written; confirm the miss with consistent reads
+        for slot in self.used_slots():
+            record = self.read(slot)
+            if record[3] and record[16] == encoded:
+                return slot
+        return None
+
+    def used_slots(self) -> Iterator[int]:
+        return (slot for slot in range(self.capacity) if self.used(slot))
+
+    def close(self) -> None:
+        self.buffer = None
+        self._memory.close()
+        os.close(self._lock_file)
+
+    def unlink(self) -> None:
+        """Delete the segment and lock file for good (after every worker is done)"""
+        resource_tracker.register(self._memory._name, "shared_memory")
+        self._memory.unlink()
+        os.unlink(self.lock_path)
+
+
+class SharedMatch(Match):
+    """A match whose state lives in a shared record; the local MatchState is a working copy"""
+
+    def __init__(self, table: SharedMatchTable, slot: int, generation: int, match_id: str,
+                 player_names: Sequence[str], engine: str, first_server: Optional[str], listeners,
+                 match_format: Optional[str] = None):
+        self.table = table
+        self.slot = slot
+        self.generation = generation
+        self._held = 0
+        self._state = None
+        super().__init__(match_id, player_names, engine, first_server, number=slot + 1, listeners=listeners,
+                         history_depth=0, match_format=match_format, checkpoint_every=0)
+        # The record's version is shared, so is its incarnation: a removed slot's next owner bumps it
+        self.incarnation = f"{slot}.{generation}"
+
+    @property
+    def version(self) -> int:
+        # Inside a write the working copy is newest; otherwise another worker may have moved on
+        return self._version if self._held else self.table.version(self.slot)
+
+    @version.setter
+    def version(self, value: int) -> None:
+        self._version = value
+
+    @property
+    def state(self) -> MatchState:
+        # Same as version: refresh the working copy unless this worker is writing it
+        if not self._held and self._state is not None:
+            record = self.table.read(self.slot)
+            if record[3] and record[1] == self.generation:
+                self._apply(record)
+            # else removed: listeners hearing about it get the last state seen
+        return self._state
+
+    @state.setter
+    def state(self, value: MatchState) -> None:
+        self._state = value
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Lock the record, refresh the working copy and write it back when done"""
+        if self._held:
+            self._held += 1
+            try:
+                yield
+            finally:
+                self._held -= 1
+            return
+        with self.table.locked(self.slot):
+            self.pull()
+            self._held = 1
+            try:
+                yield
+                self.push()
+            finally:
+                self._held = 0
+
+    def pull(self) -> None:
+        """Copy the shared record into the working copy"""
+        record = self.table.read(self.slot)
+        if not record[3] or record[1] != self.generation:
+            raise KeyError(f"Match {self.match_id} was removed")
+        self._apply(record)
+
+    def _apply(self, record: tuple) -> None:
+        _, _, self._version, _, _, advantage, tiebreak, winner, set_bytes, _, *rest = record
+        state = self._state
+        state.score[:] = rest[:6]
+        state.advantage = advantage
+        state.tiebreak = bool(tiebreak)
+        state.winner = winner
+        state.sets = rest[9][:set_bytes]
+        state.table_index = -1
+
+    def push(self) -> None:
+        state = self._state
+        if len(state.sets) > MAX_SET_BYTES:
+            raise ValueError(f"Match {self.match_id} has more sets than a shared record holds")
+        names = state.names
+        self.table.write(self.slot, self.generation, self._version, 1, self.first_server, state.advantage,
+                         state.tiebreak, state.winner, len(state.sets), PRESET_FORMATS.index(self.format.name),
+                         *state.score, self.match_id.encode(), names[0].encode(), names[1].encode(), state.sets)
+
+    def score(self, player: int) -> int:
+        with self._writing():
+            return super().score(player)
+
+    def award_points(self, winners: Sequence[int]) -> Optional[int]:
+        # One lock for the whole batch
+        with self._writing():
+            return super().award_points(winners)
+
+    def reset(self):
+        with self._writing():
+            return super().reset()
+
+    def player(self, player_name: str) -> Dict:
+        if not self._held:
+            self.pull()
+        return super().player(player_name)
+
+    def player_list(self):
+        if not self._held:
+            self.pull()
+        return super().player_list()
+
+    async def wait_for_change(self, timeout: float) -> bool:
+        # Another worker cannot wake this one, so watch the shared version instead
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        start = self.version
+        while self.version == start:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(POLL_INTERVAL, remaining))
+        return True
+
+
+class SharedMatchRegistry(MatchRegistry):
+    """A registry whose matches are the records of a SharedMatchTable, visible to every worker"""
+
+    def __init__(self, name: str, capacity: int = DEFAULT_CAPACITY, engine: str = "compact",
+                 lock_dir: Optional[str] = None):
+        super().__init__(engine=engine, history_depth=0, checkpoint_every=0)
+        self.table = SharedMatchTable(name, capacity, lock_dir)
+        self._matches: Dict[str, SharedMatch] = {}  # this worker's handles, checked against the table
+
+    def _handle(self, slot: int) -> SharedMatch:
+        record = self.table.read(slot)
+        names = [record[17].rstrip(b"\0").decode(), record[18].rstrip(b"\0").decode()]
+        match_id = record[16].rstrip(b"\0").decode()
+        match = SharedMatch(self.table, slot, record[1], match_id, names, self.engine, names[record[4]],
+                            self.listeners, PRESET_FORMATS[record[9]])
+        match.pull()
+        self._matches[match_id] = match
+        return match
+
+    def create(self, player_names: Sequence[str], match_id: Optional[str] = None,
+               first_server: Optional[str] = None, number: Optional[int] = None,
+               match_format: Union[None, str, Dict, MatchFormat] = None,
+               restore: Optional[Callable[[Match], None]] = None) -> Match:
+        if match_id is None:
+            match_id = uuid.uuid4().hex[:12]
+        names = list(player_names)
+        # Validate names, first server and format the same way as any other match
+        checked = Match(match_id, names, self.engine, first_server, history_depth=0, match_format=match_format)
+        if checked.format.name is None:
+            raise ValueError(f"Shared match records only hold preset formats: {', '.join(PRESET_FORMATS)}")
+        if len(match_id.encode()) > MAX_ID_BYTES or any(len(name.encode()) > MAX_NAME_BYTES for name in names):
+            raise ValueError(f"Match IDs are limited to {MAX_ID_BYTES} bytes and names to {MAX_NAME_BYTES}")
+
+        table = self.table
+        with table.locked(-1):
+            if table.find(match_id) is not None:
+                raise ValueError(f"Match {match_id} already exists")
+            slot = next((slot for slot in range(table.capacity) if not table.used(slot)), None)
+            if slot is None:
+                raise ValueError(f"All {table.capacity} shared match records are in use")
+            generation = table.read(slot)[1] + 1
+            with table.locked(slot):
+                first = 1 if first_server == names[1] else 0
+                table.write(slot, generation, 0, 1, first, NO_PLAYER, False, NO_PLAYER, 0,
+                            PRESET_FORMATS.index(checked.format.name), 0, 0, 0, 0, 0, 0,
+                            match_id.encode(), names[0].encode(), names[1].encode(), b"")
+            match = self._handle(slot)
+            if restore is not None:
+                with match._writing():
+                    restore(match)
+
+        for listener in self.listeners:
+            listener.match_created(match)
+        return match
+
+    def get(self, match_id: str) -> Optional[Match]:
+        match = self._matches.get(match_id)
+        if match is not None:
+            record = self.table.read(match.slot)
+            if record[3] and record[1] == match.generation:
+                return match
+            del self._matches[match_id]
+        slot = self.table.find(match_id)
+        return None if slot is None else self._handle(slot)
+
+    def remove(self, match_id: str) -> Optional[Match]:
+        table = self.table
+        with table.locked(-1):
+            match = self.get(match_id)
+            if match is None:
+                return None
+            with table.locked(match.slot):
+                record = list(table.read(match.slot))
+                record[3] = 0  # unused; the generation stays so the next owner bumps it
+                table.write(match.slot, *record[1:])
+            self._matches.pop(match_id, None)
+        for listener in self.listeners:
+            listener.match_removed(match)
+        return match
+
+    def __contains__(self, match_id: str) -> bool:
+        return self.get(match_id) is not None
+
+    def __iter__(self) -> Iterator[Match]:
+        handles = []
+        for slot in self.table.used_slots():
+            match_id = self.table.read(slot)[16].rstrip(b"\0").decode()
+            match = self.get(match_id)
+            if match is not None:
+                handles.append(match)
+        return iter(handles)
+
+    def clear(self) -> None:
+        for match in self:
+            self.remove(match.match_id)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.table.used_slots())
@@ -0,0 +1,186 @@
+"""
+Vectorized Monte Carlo match simulator.
+
+Plays many independent matches forward from the current score in parallel,
+one point per step across NumPy arrays, with the same rules as tennis_game.py:
+games to 4 points with deuce and advantage, sets to 6 games with a tiebreak
+to 7 points at 6-6, and best of 5 sets. Each point is won by the server with
+that player's point-win probability on serve.
+
+Needs NumPy (pip install -e .[sim]).
+"""
+
+import random
+from typing import Dict, NamedTuple, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError as exc:  # pragma: no cover - depends on the environment
+    raise ImportError("tennis_backend.simulation needs NumPy: pip install -e .[sim]") from exc
+
+from tennis_backend.match_state import (
+    GAMES, GAMES_PER_SET, MATCH_WON, NO_PLAYER, POINTS, SETS_TO_WIN, TIEBREAK_POINTS, TIEBREAK_POINTS_TO_WIN,
+    MatchState, score_point,
+)
+
+# Points needed to win a regular game (0, 15, 30, 40, game)
+GAME_POINTS_TO_WIN = 4
+
+
+class SimulationResult(NamedTuple):
+    matches: int
+    win_probability: float               # player 0 wins the match
+    set_scores: Dict[str, float]         # "3-1" (player 0 sets - player 1 sets) -> probability
+
+
+def serve_point_probabilities(serve_win: Sequence[float], return_win: Optional[Sequence[float]] = None) -> np.ndarray:
+    """
+    Probability that each player wins a point on their own serve.
+
+    serve_win[i] is player i's point-win probability on serve. If return_win
+    is given, return_win[i] is player i's point-win probability on return and
+    each serve point averages the server's serve and the receiver's return.
+    """
+    serve = np.asarray(serve_win, dtype=float)
+    if return_win is not None:
+        returns = np.asarray(return_win, dtype=float)
+        serve = (serve + 1.0 - returns[::-1]) / 2.0
+    if serve.shape != (2,) or not ((serve > 0) & (serve < 1)).all():
+        # At exactly 0 or 1 every point goes with serve and a tiebreak never ends
+        raise ValueError("Point-win probabilities must be strictly between 0 and 1, one per player")
+    return serve
+
+
+def simulate_match(state: MatchState, serve_win: Sequence[float], return_win: Optional[Sequence[float]] = None,
+                   first_server: int = 0, matches: int = 1_000_000, seed: Optional[int] = None) -> SimulationResult:
+    """
+    Simulate matches from state until each one has a winner.
+
+    first_server is the player index who served the first game of the match;
+    the server of every later point follows from the score.
+    """
+    server_wins_point = serve_point_probabilities(serve_win, return_win)
+    if state.winner != NO_PLAYER:
+        sets = f"{state.sets_won(0)}-{state.sets_won(1)}"
+        return SimulationResult(matches, 1.0 if state.winner == 0 else 0.0, {sets: 1.0})
+
+    rng = np.random.default_rng(seed)
+    score = state.score
+
+    # Current game in raw points won; advantage is 4-3
+    start_points = [score[POINTS], score[POINTS + 1]]
+    if state.advantage != NO_PLAYER:
+        start_points[state.advantage] += 1
+
+    # One array per counter and player, one element per simulated match
+    def column(value, dtype=np.int8):
+        return np.full(matches, value, dtype=dtype)
+
+    points_0, points_1 = column(start_points[0]), column(start_points[1])
+    games_0, games_1 = column(score[GAMES]), column(score[GAMES + 1])
+    tiebreak_0, tiebreak_1 = column(score[TIEBREAK_POINTS], np.int16), column(score[TIEBREAK_POINTS + 1], np.int16)
+    sets_0, sets_1 = column(state.sets_won(0)), column(state.sets_won(1))
+    at_six_all = score[GAMES] == score[GAMES + 1] == GAMES_PER_SET
+    in_tiebreak = column(state.tiebreak or at_six_all, bool)
+    # Serve alternates every game, so only the parity of games played matters
+    player_1_serves_game = column((first_server + state.games_played()) % 2 == 1, bool)
+    serve_0, serve_1 = server_wins_point
+
+    # Results, written as matches finish; ids maps array elements back to them.
+    # Finished matches keep playing (their results are already recorded) until
+    # they are half the arrays, then get dropped in one go.
+    final_sets = np.empty((matches, 2), dtype=np.int8)
+    ids = np.arange(matches)
+    finished = column(False, bool)
+
+    while ids.size:
+        # Who serves: alternate games; in a tiebreak one point, then every two
+        switched_in_tiebreak = in_tiebreak & (((tiebreak_0 + tiebreak_1 + 1) >> 1) & 1).astype(bool)
+        player_1_serves = player_1_serves_game ^ switched_in_tiebreak
+        server_won = rng.random(ids.size) < np.where(player_1_serves, serve_1, serve_0)
+        player_1_won = server_won == player_1_serves
+        player_0_won = ~player_1_won
+
+        # Regular game: first to 4 points, by 2; 4-4 is deuce again (3-3)
+        regular = ~in_tiebreak
+        points_0 += player_0_won & regular
+        points_1 += player_1_won & regular
+        game_0 = regular & (points_0 >= GAME_POINTS_TO_WIN) & (points_0 - points_1 >= 2)
+        game_1 = regular & (points_1 >= GAME_POINTS_TO_WIN) & (points_1 - points_0 >= 2)
+        back_to_deuce = (points_0 == points_1) & (points_0 > 3)
+        points_0 -= back_to_deuce
+        points_1 -= back_to_deuce
+
+        # Tiebreak: first to 7 points, by 2
+        tiebreak_0 += player_0_won & in_tiebreak
+        tiebreak_1 += player_1_won & in_tiebreak
+        game_0 |= in_tiebreak & (tiebreak_0 >= TIEBREAK_POINTS_TO_WIN) & (tiebreak_0 - tiebreak_1 >= 2)
+        game_1 |= in_tiebreak & (tiebreak_1 >= TIEBREAK_POINTS_TO_WIN) & (tiebreak_1 - tiebreak_0 >= 2)
+
+        # Games (a tiebreak counts as the 13th game of the set)
+        game_over = game_0 | game_1
+        if not game_over.any():
+            continue
+        games_0 += game_0
+        games_1 += game_1
+        player_1_serves_game ^= game_over
+        points_0 *= ~game_over
+        points_1 *= ~game_over
+        set_0 = game_0 & (((games_0 >= GAMES_PER_SET) & (games_0 - games_1 >= 2)) | in_tiebreak)
+        set_1 = game_1 & (((games_1 >= GAMES_PER_SET) & (games_1 - games_0 >= 2)) | in_tiebreak)
+        in_tiebreak |= (games_0 == GAMES_PER_SET) & (games_1 == GAMES_PER_SET)
+
+        set_over = set_0 | set_1
+        if not set_over.any():
+            continue
+        sets_0 += set_0
+        sets_1 += set_1
+        still_in_set = ~set_over
+        games_0 *= still_in_set
+        games_1 *= still_in_set
+        tiebreak_0 *= still_in_set
+        tiebreak_1 *= still_in_set
+        in_tiebreak &= still_in_set
+
+        match_over = set_over & ~finished & ((sets_0 >= SETS_TO_WIN) | (sets_1 >= SETS_TO_WIN))
+        if not match_over.any():
+            continue
+        final_sets[ids[match_over], 0] = sets_0[match_over]
+        final_sets[ids[match_over], 1] = sets_1[match_over]
+        finished |= match_over
+        if 2 * np.count_nonzero(finished) >= ids.size:
+            live = ~finished
+            ids, points_0, points_1, games_0, games_1 = ids[live], points_0[live], points_1[live], games_0[live], games_1[live]
+            tiebreak_0, tiebreak_1, sets_0, sets_1 = tiebreak_0[live], tiebreak_1[live], sets_0[live], sets_1[live]
+            in_tiebreak, player_1_serves_game, finished = in_tiebreak[live], player_1_serves_game[live], finished[live]
+
+    # Count each final "sets won" pair; SETS_TO_WIN + 1 covers 0..SETS_TO_WIN per player
+    width = SETS_TO_WIN + 1
+    counts = np.bincount(final_sets[:, 0].astype(np.intp) * width + final_sets[:, 1], minlength=width * width)
+    return SimulationResult(
+        matches=matches,
+        win_probability=float((final_sets[:, 0] >= SETS_TO_WIN).mean()),
+        set_scores={f"{code // width}-{code % width}": count / matches
+                    for code, count in enumerate(counts.tolist()) if count},
+    )
+
+
+def simulate_match_loop(state: MatchState, serve_win: Sequence[float], return_win: Optional[Sequence[float]] = None,
+                        first_server: int = 0, matches: int = 10_000, seed: Optional[int] = None) -> SimulationResult:
+    """Reference version of simulate_match: one match at a time through score_point"""
+    server_wins_point = serve_point_probabilities(serve_win, return_win).tolist()
+    rng = random.Random(seed)
+    wins = 0
+    set_scores: Dict[str, float] = {}
+
+    for _ in range(matches):
+        match = state.copy()
+        while match.winner == NO_PLAYER:
+            server = match.server(first_server)
+            winner = server if rng.random() < server_wins_point[server] else 1 - server
+            if score_point(match, winner) & MATCH_WON:
+                break
+        wins += match.winner == 0
+        sets = f"{match.sets_won(0)}-{match.sets_won(1)}"
+        set_scores[sets] = set_scores.get(sets, 0) + 1 / matches
+    return SimulationResult(matches, wins / matches, set_scores)
@@ -1,5 +1,22 @@
 import pytest
-from tennis_backend.main import players_data
+from tennis_backend.main import DEFAULT_MATCH_ID, default_match, idempotency, registry
+
+
+class FakeClock:
+    """A clock tests move by hand (now), or that advances by tick on every read"""
+
+    def __init__(self, tick: float = 0.0):
+        self.now = 0.0
+        self.tick = tick
+
+    def __call__(self) -> float:
+        self.now += self.tick
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
 
 #beforeEach
 
@@ -10,16 +27,12 @@ def reset_players_data():
     """Reset players data to clean state before each test"""
     print("🧹 Cleaning up data before test...")
     
-    players_data.clear()
-    players_data.update({
-        "Alcaraz": {
-            "name": "Alcaraz", "points": 0, "current_set_games": 0, 
-            "sets": [], "tiebreak": False, "tiebreak_points": 0, 
-            "advantage": False, "winner": False
-        },
-        "Sinner": {
-            "name": "Sinner", "points": 0, "current_set_games": 0, 
-            "sets": [], "tiebreak": False, "tiebreak_points": 0, 
-            "advantage": False, "winner": False
-        }
-    })
\ No newline at end of file
+    # Only the default match survives between tests
+    for match in registry:
+        if match.match_id != DEFAULT_MATCH_ID:
+            registry.remove(match.match_id)
+
+    default_match.reset()
+    default_match.history.clear()
+    if idempotency is not None:
+        idempotency.clear()
@@ -0,0 +1,223 @@
+"""
+Tests for the finished-match archive: rows decode back to the matches that
+were archived, player and date queries return exactly the matching rows, the
+directory survives a reopen and a torn write, and the archiver moves won
+matches out of the registry only once they have been finished long enough.
+"""
+
+import os
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from tennis_backend import main
+from tennis_backend.archive import MatchArchive, MatchArchiver, pack_points, pack_sets, unpack_points, unpack_sets
+from tennis_backend.bounded_registry import BoundedMatchRegistry
+from tennis_backend.match_registry import MatchRegistry
+from tennis_backend.match_store import SQLiteStore
+
+PLAYERS = ["Alcaraz", "Sinner", "Djokovic", "Medvedev", "Zverev"]
+
+
+def play_out(match, rng):
+    while match.state.winner == -1:
+        match.score(rng.randint(0, 1))
+    return match
+
+
+def test_packing_round_trips():
+    rng = random.Random(1)
+    for count in (0, 1, 7, 8, 9, 300):
+        winners = bytes(rng.randint(0, 1) for _ in range(count))
+        packed = pack_points(winners)
+        assert len(packed) == (count + 7) // 8
+        assert unpack_points(packed, count) == winners
+    sets = bytes([7, 6, 3, 6, 15, 0, 0, 15])
+    assert unpack_sets(pack_sets(sets), 4) == [(7, 6), (3, 6), (15, 0), (0, 15)]
+
+
+def test_rows_decode_to_the_archived_matches():
+    rng = random.Random(2)
+    registry = MatchRegistry()
+    archive = MatchArchive()
+    matches = []
+    for number, match_format in enumerate([None, "best_of_3", "doubles", None]):
+        match = registry.create(rng.sample(PLAYERS, 2), match_id=f"court-{number}", first_server=None,
+                                match_format=match_format)
+        matches.append(play_out(match, rng))
+        assert archive.add(match, 1_700_000_000 + number) == number
+
+    for match in matches:
+        row = archive.find(match.match_id)
+        archived = archive.row(row)
+        assert archived.id == match.match_id and archived.players == tuple(match.state.names)
+        assert archived.winner == match.state.winner and archived.first_server == match.first_server
+        assert archived.format == match.format.key and archived.points_known
+        assert archived.sets == [tuple(match.state.sets[i:i + 2]) for i in range(0, len(match.state.sets), 2)]
+        assert archive.point_winners(row) == match.timeline.winners()
+    assert archive.find("court") is None and archive.find("court-9") is None
+    assert archive.find("") is None
+
+    unfinished = registry.create(["Alcaraz", "Sinner"])
+    with pytest.raises(ValueError):
+        archive.add(unfinished, 0)
+
+
+def test_queries_by_player_and_date():
+    rng = random.Random(3)
+    archive = MatchArchive()
+    rows = []
+    for row in range(500):
+        players = rng.sample(PLAYERS, 2)
+        finished = 1_700_000_000 + row * 60
+        archive.add_result(f"m{row}", players, rng.randint(0, 1), 0, "best_of_3", bytes([6, 4, 6, 3]), finished)
+        rows.append((players, finished))
+
+    def expected(player=None, since=None, until=None):
+        return [f"m{row}" for row, (players, finished) in enumerate(rows)
+                if (player is None or player in players) and (since is None or finished >= since)
+                and (until is None or finished < until)]
+
+    since, until = 1_700_000_000 + 100 * 60, 1_700_000_000 + 300 * 60 + 30
+    for player in [None, "Sinner", "Zverev"]:
+        for window in [(None, None), (since, None), (None, until), (since, until)]:
+            assert [match.id for match in archive.query(player, *window)] == expected(player, *window)
+    assert list(archive.query("Federer")) == []
+
+    # Out of order finish times fall back to checking every candidate
+    archive.add_result("late", ["Sinner", "Alcaraz"], 0, 1, "best_of_3", bytes([6, 0, 6, 0]), since)
+    assert not archive.in_order
+    assert "late" in [match.id for match in archive.query("Sinner", since, until)]
+    assert archive.point_winners(archive.find("late")) is None
+
+
+def test_directory_survives_reopen_and_a_torn_write(tmp_path):
+    rng = random.Random(4)
+    registry = MatchRegistry()
+    archive = MatchArchive(str(tmp_path))
+    for number in range(6):
+        archive.add(play_out(registry.create(rng.sample(PLAYERS, 2), match_id=f"m{number}"), rng), 1_000 + number)
+        if number % 2:
+            archive.flush()
+    expected = [archive.row(row) for row in range(len(archive))]
+    points = [archive.point_winners(row) for row in range(len(archive))]
+
+    reopened = MatchArchive(str(tmp_path))
+    assert [reopened.row(row) for row in range(len(reopened))] == expected
+    assert [reopened.point_winners(row) for row in range(len(reopened))] == points
+
+    # A crash part way through a flush leaves some columns a row ahead
+    reopened.add(play_out(registry.create(["Alcaraz", "Sinner"], match_id="torn"), rng), 2_000)
+    reopened.flush()
+    with open(tmp_path / "points.dat", "r+b") as handle:
+        handle.truncate(os.path.getsize(tmp_path / "points.dat") - 1)
+    recovered = MatchArchive(str(tmp_path))
+    assert len(recovered) == 6 and recovered.find("torn") is None
+    recovered.add(play_out(registry.create(["Alcaraz", "Sinner"], match_id="after"), rng), 3_000)
+    recovered.flush()
+    again = MatchArchive(str(tmp_path))
+    assert [again.row(row) for row in range(6)] == expected
+    assert again.row(again.find("after")).players == ("Alcaraz", "Sinner")
+
+
+def test_archiver_waits_follows_undo_and_keeps_listed_matches(clock):
+    rng = random.Random(5)
+    registry = MatchRegistry()
+    archiver = MatchArchiver(MatchArchive(), registry, after=60, keep=["default"], clock=clock)
+    registry.add_listener(archiver)
+    kept = play_out(registry.create(["Alcaraz", "Sinner"], match_id="default"), rng)
+    first = play_out(registry.create(["Alcaraz", "Sinner"], match_id="first"), rng)
+    clock.now += 30
+    second = play_out(registry.create(["Djokovic", "Zverev"], match_id="second"), rng)
+    live = registry.create(["Medvedev", "Zverev"], match_id="live")
+    live.award_points([0] * 4)
+
+    clock.now += 40
+    assert archiver.due()
+    assert [match.match_id for match in archiver.sweep()] == ["first"]
+    assert "first" not in registry and archiver.archive.find("first") == 0
+
+    # Taking back the winning point makes the match live again
+    second.undo()
+    clock.now += 60
+    assert not archiver.due() and archiver.sweep() == []
+    second.redo()
+    clock.now += 60
+    assert [match.match_id for match in archiver.sweep()] == ["second"]
+    assert "default" in registry and "live" in registry and kept.state.winner != -1
+    assert archiver.archived == 2
+
+
+@pytest.mark.asyncio
+async def test_archived_matches_leave_the_store(tmp_path, clock):
+    path = str(tmp_path / "matches.db")
+    registry = MatchRegistry()
+    store = SQLiteStore(path)
+    store.load(registry)
+    archiver = MatchArchiver(MatchArchive(str(tmp_path / "archive")), registry, after=0, clock=clock)
+    registry.add_listener(archiver)
+    match = play_out(registry.create(["Alcaraz", "Sinner"], match_id="court-1"), random.Random(6))
+    await store.persist(match)
+    for archived in archiver.sweep():
+        await store.persist(archived)
+    await store.close()
+
+    reopened = MatchRegistry()
+    store = SQLiteStore(path)
+    store.load(reopened)
+    assert "court-1" not in reopened and await store.fetch(reopened, "court-1") is None
+    await store.close()
+    assert MatchArchive(str(tmp_path / "archive")).find("court-1") == 0
+
+
+@pytest.mark.asyncio
+async def test_an_evicted_won_match_is_archived_once_fetched_back(tmp_path, clock):
+    registry = BoundedMatchRegistry(max_matches=1, evict_live=True)
+    store = SQLiteStore(str(tmp_path / "matches.db"))
+    store.load(registry)
+    archiver = MatchArchiver(MatchArchive(), registry, after=60, clock=clock)
+    registry.add_listener(archiver)
+    match = play_out(registry.create(["Alcaraz", "Sinner"], match_id="won"), random.Random(7))
+    await store.persist(match)
+    registry.create(["Djokovic", "Zverev"], match_id="other")
+    assert "won" not in registry and not archiver.due()
+
+    clock.now += 30
+    assert (await store.fetch(registry, "won")).state.winner != -1
+    clock.now += 40
+    assert not archiver.due()  # waits `after` from the fetch, not from the win
+    clock.now += 20
+    assert [archived.match_id for archived in archiver.sweep()] == ["won"]
+    assert archiver.archive.find("won") == 0
+    await store.close()
+
+
+def test_archive_routes(tmp_path, monkeypatch):
+    archive = MatchArchive(str(tmp_path))
+    archiver = MatchArchiver(archive, main.registry, after=0, keep=[main.DEFAULT_MATCH_ID])
+    main.registry.add_listener(archiver)
+    monkeypatch.setattr(main, "archive", archive)
+    monkeypatch.setattr(main, "archiver", archiver)
+    client = TestClient(main.app)
+    try:
+        match_id = client.post("/matches", json={"players": ["Ruud", "Fritz"],
+                                                 "format": "short_sets"}).json()["id"]
+        client.post(f"/matches/{match_id}/points", json={"winners": "A" * 32})
+        assert client.post("/admin/archive").json() == {"archived": [match_id]}
+        assert client.get(f"/matches/{match_id}").status_code == 404
+
+        body = client.get(f"/archive/{match_id}").json()
+        assert body["winner"] == "Ruud" and body["sets"] == [[4, 0], [4, 0]] and body["winners"] == "A" * 32
+        assert body["format"]["name"] == "short_sets"
+        today = body["finished_at"][:10]
+        listed = client.get("/archive", params={"player": "Fritz", "since": today, "until": today}).json()
+        assert [match["id"] for match in listed["matches"]] == [match_id]
+        assert client.get("/archive", params={"player": "Fritz", "until": "2000-01-01"}).json()["count"] == 0
+        assert client.get("/archive/nope").status_code == 404
+    finally:
+        main.registry.listeners.remove(archiver)
+
+    monkeypatch.setattr(main, "archive", None)
+    monkeypatch.setattr(main, "archiver", None)
+    assert client.get("/archive").status_code == 404
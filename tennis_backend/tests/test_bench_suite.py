@@ -0,0 +1,57 @@
+"""
+Tests for the benchmark suite's scenarios and regression gate (the timings
+themselves are not checked here).
+"""
+
+import json
+
+from benchmarks.bench_suite import SCENARIOS, Metric, _start_state, compare, from_json, main, to_json
+from tennis_backend.match_state import NO_PLAYER, score_point
+
+
+def play(name):
+    score, winners = SCENARIOS[name]
+    state = _start_state(score)
+    events = [score_point(state, winner) for winner in winners]
+    return state, events
+
+
+def test_scenarios_are_what_they_say():
+    assert play("love_game")[0].score[2] == 1
+    deuce, _ = play("deuce_battle")
+    assert deuce.score[2] == 1 and deuce.score[3] == 0
+    tiebreak, _ = play("tiebreak")
+    assert tiebreak.set_scores(1) == [7]
+    five_setter, _ = play("five_setter")
+    assert five_setter.winner != NO_PLAYER and len(five_setter.set_scores(0)) == 5
+
+
+def test_compare_flags_only_tracked_regressions():
+    baseline = {
+        "fast": Metric(100.0, "ns/point", higher_is_better=False),
+        "busy": Metric(1000.0, "req/s", higher_is_better=True),
+        "noisy": Metric(50.0, "us", higher_is_better=False, tracked=False),
+    }
+    assert compare(baseline, baseline) == []
+
+    current = {
+        "fast": Metric(120.0, "ns/point", higher_is_better=False),
+        "busy": Metric(900.0, "req/s", higher_is_better=True),
+        "noisy": Metric(500.0, "us", higher_is_better=False, tracked=False),
+    }
+    regressions = compare(baseline, current, threshold=0.15)
+    assert len(regressions) == 1 and regressions[0].startswith("fast:")
+    assert len(compare(baseline, current, threshold=0.05)) == 2
+
+
+def test_results_round_trip_through_json():
+    metrics = {"busy": Metric(1000.0, "req/s", higher_is_better=True)}
+    assert from_json(json.loads(json.dumps(to_json(metrics)))) == metrics
+
+
+def test_regression_mode_exit_code(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    # A baseline no machine can match: 0.001 ns per point
+    fast = {f"scoring.score_point.{name}": Metric(0.001, "ns/point", higher_is_better=False) for name in SCENARIOS}
+    baseline.write_text(json.dumps(to_json(fast)))
+    assert main(["--only", "scoring", "--budget", "0.01", "--compare", str(baseline)]) == 1
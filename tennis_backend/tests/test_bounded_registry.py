@@ -0,0 +1,225 @@
+"""
+Tests for the memory-bounded registry: byte estimates track real
+allocations, the caps and idle TTL evict in LRU order (finished matches
+first, pinned ones never, live ones in use only when they can be loaded
+back), eviction spills and leaves stores alone so a match can be loaded
+back, and the counters add up.
+"""
+
+import asyncio
+import random
+import tracemalloc
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from tennis_backend import main
+from tennis_backend.bounded_registry import BoundedMatchRegistry, RegistryFull, estimate_bytes
+from tennis_backend.main import app
+from tennis_backend.match_registry import Match, MatchListener
+from tennis_backend.match_store import SQLiteStore
+
+client = TestClient(app)
+
+
+class Events(MatchListener):
+    def __init__(self):
+        self.removed, self.evicted = [], []
+
+    def match_removed(self, match):
+        self.removed.append(match.match_id)
+
+    def match_evicted(self, match):
+        self.evicted.append(match.match_id)
+
+
+def play_out(match, rng):
+    while match.state.winner == -1:
+        match.score(rng.randint(0, 1))
+
+
+@pytest.mark.parametrize("points, checkpoint_every", [(0, 32), (150, 32), (400, 32), (300, 0)])
+def test_estimates_are_close_to_the_allocated_bytes(points, checkpoint_every):
+    rng = random.Random(points)
+    winners = [rng.randint(0, 1) for _ in range(points)]
+    tracemalloc.start()
+    matches = []
+    for number in range(100):
+        match = Match(f"m{number:06d}", ["Alcaraz", "Sinner"], checkpoint_every=checkpoint_every)
+        for winner in winners:
+            match.score(winner)
+        matches.append(match)
+    allocated = tracemalloc.get_traced_memory()[0] / len(matches)
+    tracemalloc.stop()
+    assert 0.75 < estimate_bytes(matches[0]) / allocated < 1.25
+
+
+def test_match_cap_evicts_finished_then_least_recently_used():
+    rng = random.Random(1)
+    events = Events()
+    registry = BoundedMatchRegistry(max_matches=3, pinned=["default"], evict_live=True)
+    registry.add_listener(events)
+    registry.create(["Alcaraz", "Sinner"], match_id="default")
+    registry.create(["Alcaraz", "Sinner"], match_id="a")
+    play_out(registry.create(["Alcaraz", "Sinner"], match_id="done"), rng)
+    registry.get("a")
+
+    registry.create(["Alcaraz", "Sinner"], match_id="b")
+    assert events.evicted == ["done"]            # finished before live, whatever the recency
+    registry.create(["Alcaraz", "Sinner"], match_id="c")
+    assert events.evicted == ["done", "a"]       # then the least recently used; default is pinned
+    assert [match.match_id for match in registry] == ["default", "b", "c"]
+    assert events.removed == [] and registry.evictions["matches"] == 2
+
+
+def test_live_matches_in_use_are_kept_unless_they_can_come_back(clock):
+    rng = random.Random(3)
+    registry = BoundedMatchRegistry(max_matches=2, idle_ttl=60, clock=clock)
+    live = registry.create(["Alcaraz", "Sinner"], match_id="live")
+    play_out(registry.create(["Djokovic", "Zverev"], match_id="done"), rng)
+    registry.create(["Swiatek", "Gauff"], match_id="next")        # the finished match makes room
+    assert "done" not in registry
+    clock.now = 30
+    live.score(0)
+    with pytest.raises(RegistryFull):
+        registry.create(["Sabalenka", "Rybakina"])
+    assert [match.match_id for match in registry] == ["next", "live"]
+    clock.now = 70                                                  # "next" has been idle past the TTL
+    registry.create(["Sabalenka", "Rybakina"], match_id="after")
+    assert [match.match_id for match in registry] == ["live", "after"]
+
+    spilled = []
+    registry = BoundedMatchRegistry(max_matches=1, spill=spilled.append)
+    first = registry.create(["Alcaraz", "Sinner"])
+    registry.create(["Djokovic", "Zverev"])
+    assert spilled == [first]
+
+
+def test_a_full_registry_refuses_new_matches_over_http(monkeypatch):
+    monkeypatch.setattr(main.registry, "max_matches", 2)
+    match_id = client.post("/matches", json={"players": ["Alcaraz", "Sinner"]}).json()["id"]
+    response = client.post("/matches", json={"players": ["Djokovic", "Zverev"]})
+    assert response.status_code == 503
+    assert client.post(f"/matches/{match_id}/players/Alcaraz/increment").json()["points"] == 15
+
+
+def test_bytes_stay_exact_and_within_the_cap():
+    rng = random.Random(2)
+    events = Events()
+    registry = BoundedMatchRegistry(max_bytes=200_000, evict_live=True)
+    registry.add_listener(events)
+    for number in range(40):
+        match = registry.create(["Alcaraz", "Sinner"], match_id=f"m{number}")
+        for _ in range(rng.randint(0, 120)):
+            action = rng.random()
+            if action < 0.85:
+                match.score(rng.randint(0, 1))
+            elif action < 0.95:
+                match.undo()
+            elif action < 0.98:
+                match.redo()
+            else:
+                match.reset()
+            assert registry.bytes <= 200_000
+        if number % 7 == 0:
+            registry.remove(f"m{number}")
+        assert registry.bytes == sum(estimate_bytes(held) for held in registry)
+    assert events.evicted and registry.evictions["bytes"] == len(events.evicted)
+    assert registry.stats()["bytes"] == registry.bytes
+
+
+def test_a_match_too_big_for_the_budget_is_kept_while_in_use():
+    registry = BoundedMatchRegistry(max_bytes=10_000, evict_live=True)
+    other = registry.create(["Djokovic", "Zverev"])
+    match = registry.create(["Alcaraz", "Sinner"])
+    match.award_points([0, 1] * 30)
+    assert other.match_id not in registry and match.match_id in registry
+    assert registry.bytes > registry.max_bytes
+
+
+def test_idle_ttl_hits_misses_and_spill(clock):
+    spilled = []
+    registry = BoundedMatchRegistry(idle_ttl=60, spill=spilled.append, pinned=["default"], clock=clock)
+    registry.create(["Alcaraz", "Sinner"], match_id="default")
+    idle = registry.create(["Alcaraz", "Sinner"], match_id="idle")
+    busy = registry.create(["Djokovic", "Zverev"], match_id="busy")
+    clock.now = 50
+    busy.score(0)
+    clock.now = 100
+    assert registry.get("busy") is busy
+    assert registry.get("idle") is None and registry.get("nope") is None
+    assert spilled == [idle] and "default" in registry
+    stats = registry.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]["idle"], stats["spilled"]) == (1, 2, 1, 1)
+    assert stats["hit_ratio"] == pytest.approx(1 / 3)
+
+
+@pytest.mark.asyncio
+async def test_evicted_matches_are_reloaded_from_the_store(tmp_path):
+    registry = BoundedMatchRegistry(max_matches=1, evict_live=True)
+    store = SQLiteStore(str(tmp_path / "matches.db"))
+    store.load(registry)
+    first = registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    first.award_points([0] * 9)
+    await store.persist(first)
+    second = registry.create(["Djokovic", "Zverev"], match_id="court-2")
+    await store.persist(second)
+    assert "court-1" not in registry and registry.get("court-1") is None
+
+    reloaded = await store.fetch(registry, "court-1")
+    assert reloaded.state == first.state
+    assert "court-2" not in registry and registry.misses == 1
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_matches_a_request_holds_or_waits_for_are_not_evicted():
+    registry = BoundedMatchRegistry(max_matches=2, evict_live=True)
+    busy = registry.create(["Alcaraz", "Sinner"], match_id="busy")
+    waited = registry.create(["Djokovic", "Zverev"], match_id="waited")
+    async with busy.lock:
+        registry.create(["Swiatek", "Gauff"], match_id="free")
+        assert "busy" in registry and "waited" not in registry
+        async with waited.lock:
+            pass
+        # One request scoring "free", another queued behind it
+        await registry.get("free").lock.acquire()
+        queued = asyncio.ensure_future(registry.get("free").lock.acquire())
+        await asyncio.sleep(0)
+        registry.get("free").lock.release()
+        with pytest.raises(RegistryFull):
+            registry.create(["Sabalenka", "Rybakina"])
+        await queued
+        registry.get("free").lock.release()
+    registry.create(["Sabalenka", "Rybakina"], match_id="after")
+    assert [match.match_id for match in registry] == ["free", "after"]
+
+
+@pytest.mark.asyncio
+async def test_an_evicted_match_cannot_be_created_again(tmp_path, monkeypatch):
+    store = SQLiteStore(str(tmp_path / "matches.db"))
+    monkeypatch.setattr(main, "store", store)
+    monkeypatch.setattr(main.registry, "max_matches", 2)
+    monkeypatch.setattr(main.registry, "evict_live", True)
+    main.registry.add_listener(store)
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            await http.post("/matches", json={"players": ["Alcaraz", "Sinner"], "match_id": "court-1"})
+            await http.post("/matches/court-1/points", json={"winners": "AAA"})
+            await http.post("/matches", json={"players": ["Djokovic", "Zverev"], "match_id": "court-2"})
+            assert "court-1" not in main.registry
+            again = await http.post("/matches", json={"players": ["Swiatek", "Gauff"], "match_id": "court-1"})
+            assert again.status_code == 409
+            assert (await http.get("/matches/court-1/players/Alcaraz")).json()["points"] == 40
+    finally:
+        main.registry.listeners.remove(store)
+        await store.close()
+
+
+def test_memory_route_and_metrics():
+    body = client.get("/admin/memory").json()
+    assert body["matches"] >= 1 and body["bytes"] > 0 and set(body["evictions"]) == {"matches", "bytes", "idle"}
+    text = client.get("/metrics").text
+    assert "# TYPE tennis_match_hits_total counter" in text and "tennis_match_bytes " in text
@@ -0,0 +1,173 @@
+"""
+Tests for pushed score updates: deltas per point and reset, non-blocking
+fan-out with snapshot catch-up for slow spectators, and the WebSocket and
+SSE endpoints.
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from tennis_backend.bounded_registry import BoundedMatchRegistry
+from tennis_backend.broadcast import MatchBroadcaster, Subscription
+from tennis_backend import main
+from tennis_backend.main import _sse_events, app, registry
+from tennis_backend.match_registry import MatchRegistry
+
+
+def watched_match(max_pending=64):
+    registry = MatchRegistry()
+    broadcaster = MatchBroadcaster(max_pending=max_pending)
+    registry.add_listener(broadcaster)
+    match = registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    return registry, broadcaster, match
+
+
+def drain(subscription):
+    messages = []
+    while not subscription._queue.empty():
+        message = subscription._queue.get_nowait()
+        messages.append(None if message is None else json.loads(message))
+    return messages
+
+
+def test_point_and_reset_deltas():
+    registry, broadcaster, match = watched_match()
+    subscription = broadcaster.subscribe(match)
+    match.award_points([0, 0, 0, 1, 0])
+    match.reset()
+
+    snapshot, *points, reset = drain(subscription)
+    assert snapshot["type"] == "snapshot" and snapshot["players"][0]["points"] == 0
+    assert [point["player"] for point in points] == ["Alcaraz", "Alcaraz", "Alcaraz", "Sinner", "Alcaraz"]
+    assert points[3]["score"]["points"] == [40, 15]
+    assert points[4]["events"] == ["game"]
+    assert points[4]["score"]["games"] == [1, 0]
+    assert reset == {"type": "reset"}
+
+
+def test_set_and_match_deltas():
+    registry, broadcaster, match = watched_match(max_pending=1000)
+    subscription = broadcaster.subscribe(match)
+    match.award_points([0] * 72)
+
+    points = drain(subscription)[1:]
+    assert points[23]["events"] == ["game", "set"]
+    assert points[23]["set"] == [6, 0]
+    assert points[-1]["events"] == ["game", "set", "match"]
+    assert points[-1]["winner"] == "Alcaraz"
+
+
+def test_unwatched_matches_publish_nothing():
+    registry, broadcaster, match = watched_match()
+    with broadcaster.subscribe(match):
+        assert broadcaster.subscriber_count("court-1") == 1
+    assert broadcaster.subscriber_count("court-1") == 0
+    match.award_point("Alcaraz")
+
+
+def test_slow_spectator_gets_snapshot_instead_of_backlog():
+    registry, broadcaster, match = watched_match(max_pending=4)
+    slow, fast = broadcaster.subscribe(match), broadcaster.subscribe(match)
+    for _ in range(10):
+        match.award_point("Sinner")
+        drain(fast)
+
+    # Scoring never waited; the slow feed collapsed into one catch-up snapshot
+    messages = drain(slow)
+    assert slow.lagged >= 1 and fast.lagged == 0
+    assert len(messages) <= 4
+    assert any(message["type"] == "snapshot" and message["players"][1]["current_set_games"] == 2
+               for message in messages)
+
+
+def test_removed_match_ends_feeds():
+    registry, broadcaster, match = watched_match()
+    subscription = broadcaster.subscribe(match)
+    registry.remove("court-1")
+    assert drain(subscription)[-2:] == [{"type": "removed"}, None]
+    assert broadcaster.subscriber_count("court-1") == 0
+
+
+def test_evicted_match_ends_feeds():
+    registry = BoundedMatchRegistry(max_matches=1, evict_live=True)
+    broadcaster = MatchBroadcaster()
+    registry.add_listener(broadcaster)
+    subscription = broadcaster.subscribe(registry.create(["Alcaraz", "Sinner"], match_id="court-1"))
+    registry.create(["Djokovic", "Zverev"], match_id="court-2")
+    assert drain(subscription)[-2:] == [{"type": "evicted"}, None]
+    assert broadcaster.subscriber_count("court-1") == 0
+
+
+def test_websocket_feed():
+    registry.create(["Alcaraz", "Sinner"], match_id="court-ws")
+    with TestClient(app) as client:
+        with client.websocket_connect("/matches/court-ws/ws") as websocket:
+            assert websocket.receive_json()["type"] == "snapshot"
+            client.post("/matches/court-ws/players/Sinner/increment")
+            delta = websocket.receive_json()
+            assert delta["player"] == "Sinner"
+            assert delta["score"]["points"] == [0, 15]
+
+            client.post("/matches/court-ws/reset")
+            assert websocket.receive_json() == {"type": "reset"}
+
+            client.delete("/matches/court-ws")
+            assert websocket.receive_json() == {"type": "removed"}
+            # The server ends the feed and closes the socket
+            with pytest.raises(WebSocketDisconnect):
+                websocket.receive_json()
+
+
+def test_websocket_feed_errors_are_raised_not_lost(monkeypatch):
+    class Broken(Subscription):
+        async def __anext__(self):
+            message = await super().__anext__()
+            if json.loads(message)["type"] != "snapshot":
+                raise RuntimeError("cannot encode")
+            return message
+
+    def subscribe(match):
+        subscription = Broken(main.broadcaster, match)
+        main.broadcaster._subscribers.setdefault(match.match_id, set()).add(subscription)
+        return subscription
+
+    monkeypatch.setattr(main.broadcaster, "subscribe", subscribe)
+    registry.create(["Alcaraz", "Sinner"], match_id="court-ws")
+    with TestClient(app) as client:
+        with pytest.raises(RuntimeError, match="cannot encode"):
+            with client.websocket_connect("/matches/court-ws/ws") as websocket:
+                assert websocket.receive_json()["type"] == "snapshot"
+                client.post("/matches/court-ws/players/Sinner/increment")
+                websocket.receive_json()
+
+
+def test_websocket_unknown_match():
+    with TestClient(app) as client:
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/matches/nope/ws") as websocket:
+                websocket.receive_json()
+
+
+@pytest.mark.asyncio
+async def test_sse_stream():
+    match = registry.create(["Alcaraz", "Sinner"], match_id="court-sse")
+    events = _sse_events(match)
+    first = await events.__anext__()
+    assert first.startswith("data: ") and first.endswith("\n\n")
+    assert json.loads(first[len("data: "):])["type"] == "snapshot"
+
+    match.award_point("Alcaraz")
+    delta = json.loads((await events.__anext__())[len("data: "):])
+    assert delta["score"]["points"] == [15, 0]
+
+    registry.remove("court-sse")
+    assert json.loads((await events.__anext__())[len("data: "):]) == {"type": "removed"}
+    with pytest.raises(StopAsyncIteration):
+        await events.__anext__()
+
+
+def test_sse_unknown_match():
+    assert TestClient(app).get("/matches/nope/events").status_code == 404
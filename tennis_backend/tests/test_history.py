@@ -0,0 +1,134 @@
+"""
+Tests for undo/redo: stepping through the immutable history restores
+exactly the earlier states, the depth cap holds, and the routes, push feeds
+and point log all follow along.
+"""
+
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from tennis_backend.broadcast import MatchBroadcaster
+from tennis_backend.history import History
+from tennis_backend.main import app, default_match
+from tennis_backend.match_registry import MatchRegistry
+from tennis_backend.point_log import PointLog, recover_registry
+
+client = TestClient(app)
+
+
+def test_undo_and_redo_walk_the_whole_match():
+    match = MatchRegistry().create(["Alcaraz", "Sinner"])
+    rng = random.Random(0)
+    states = [match.state.copy()]
+    for _ in range(300):
+        match.score(rng.randint(0, 1))
+        states.append(match.state.copy())
+
+    for expected in reversed(states[:-1]):
+        assert match.undo()
+        assert match.state == expected
+    assert not match.undo()
+
+    for expected in states[1:]:
+        assert match.redo()
+        assert match.state == expected
+    assert not match.redo()
+
+
+def test_new_point_drops_redo():
+    match = MatchRegistry().create(["Alcaraz", "Sinner"])
+    match.award_points([0, 0])
+    match.undo()
+    match.score(1)
+    assert not match.redo()
+    assert match.player("Alcaraz")["points"] == 15
+    assert match.player("Sinner")["points"] == 15
+
+
+def test_reset_can_be_undone():
+    match = MatchRegistry().create(["Alcaraz", "Sinner"])
+    match.award_points([0] * 30)
+    before = match.state.copy()
+    match.reset()
+    assert match.undo()
+    assert match.state == before
+
+
+def test_depth_cap():
+    match = MatchRegistry(history_depth=5).create(["Alcaraz", "Sinner"])
+    match.award_points([0] * 20)
+    assert match.history.undoable == 5
+    assert sum(match.undo() for _ in range(10)) == 5
+    assert match.player("Alcaraz")["current_set_games"] == 3
+
+
+def test_history_can_be_turned_off():
+    match = MatchRegistry(history_depth=0).create(["Alcaraz", "Sinner"])
+    match.award_point("Alcaraz")
+    assert match.history is None
+    assert not match.undo()
+    with pytest.raises(ValueError):
+        History(0)
+
+
+def test_undo_bumps_version():
+    match = MatchRegistry().create(["Alcaraz", "Sinner"])
+    match.award_point("Alcaraz")
+    match.undo()
+    match.redo()
+    assert match.version == 3
+
+
+def test_undo_redo_routes():
+    client.post("/players/Alcaraz/increment")
+    client.post("/players/Alcaraz/increment")
+    undone = client.post("/players/undo")
+    assert undone.status_code == 200
+    assert undone.json()[0]["points"] == 15
+    assert client.post("/players/redo").json()[0]["points"] == 30
+
+    assert client.post("/players/redo").status_code == 409
+    client.post("/players/undo")
+    client.post("/players/undo")
+    assert client.post("/players/undo").status_code == 409
+    assert default_match.player("Alcaraz")["points"] == 0
+
+
+def test_match_undo_route():
+    client.post("/matches", json={"players": ["Swiatek", "Gauff"], "match_id": "court-1"})
+    client.post("/matches/court-1/players/Gauff/increment")
+    assert client.post("/matches/court-1/undo").json()[1]["points"] == 0
+    assert client.post("/matches/court-1/redo").json()[1]["points"] == 15
+    assert client.post("/matches/nope/undo").status_code == 404
+
+
+def test_point_log_replays_undo_across_snapshots(tmp_path):
+    registry = MatchRegistry()
+    log = PointLog.open(str(tmp_path), registry, snapshot_every=10)
+    match = registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    match.award_points([0, 1, 0, 0, 1, 1, 0, 0, 0])   # a snapshot lands after the 9th point
+    for _ in range(4):
+        match.undo()
+    match.redo()
+    log.close()
+
+    recovered, _ = recover_registry(str(tmp_path))
+    again = recovered.get("court-1")
+    assert again.state == match.state
+    assert again.undo() and match.undo()
+    assert again.state == match.state
+
+
+def test_spectators_see_undo():
+    registry = MatchRegistry()
+    broadcaster = MatchBroadcaster()
+    registry.add_listener(broadcaster)
+    match = registry.create(["Alcaraz", "Sinner"])
+    subscription = broadcaster.subscribe(match)
+    match.award_point("Sinner")
+    match.undo()
+
+    messages = [subscription._queue.get_nowait() for _ in range(3)]
+    assert '"type": "undo"' in messages[-1]
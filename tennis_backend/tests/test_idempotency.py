@@ -0,0 +1,97 @@
+"""
+Tests for Idempotency-Key on the increment and reset routes: a retried key
+scores nothing and returns the first response, concurrent retries score
+once, and the cache forgets keys by age (also of matches gone idle), by
+count and with their match.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from tennis_backend.idempotency import IdempotencyCache, IdempotencyConflict
+from tennis_backend.main import app, registry
+
+client = TestClient(app)
+
+
+def test_retried_increment_scores_once_and_replays_the_response():
+    headers = {"Idempotency-Key": "tablet-1:17"}
+    first = client.post("/players/Alcaraz/increment", headers=headers)
+    retry = client.post("/players/Alcaraz/increment", headers=headers)
+    assert first.json() == retry.json() and first.json()["points"] == 15
+    assert retry.headers["Idempotent-Replayed"] == "true" and "Idempotent-Replayed" not in first.headers
+
+    client.post("/players/Alcaraz/increment", headers={"Idempotency-Key": "tablet-1:18"})
+    client.post("/players/Alcaraz/increment")  # no key: every request scores
+    assert client.get("/players/Alcaraz").json()["points"] == 40
+    # A late retry still gets the response from when it was first answered
+    assert client.post("/players/Alcaraz/increment", headers=headers).json()["points"] == 15
+
+
+def test_a_key_reused_for_another_request_is_rejected():
+    match_id = client.post("/matches", json={"players": ["Alcaraz", "Sinner"]}).json()["id"]
+    url = f"/matches/{match_id}/players/{{}}/increment"
+    assert client.post(url.format("Alcaraz"), headers={"Idempotency-Key": "k"}).status_code == 200
+    assert client.post(url.format("Sinner"), headers={"Idempotency-Key": "k"}).status_code == 422
+    assert client.post(f"/matches/{match_id}/reset", headers={"Idempotency-Key": "k"}).status_code == 422
+    assert client.post(url.format("Alcaraz"), headers={"Idempotency-Key": "x" * 256}).status_code == 422
+    assert client.get(f"/matches/{match_id}/players/Alcaraz").json()["points"] == 15
+
+
+def test_retried_reset_does_not_wipe_points_scored_since():
+    match_id = client.post("/matches", json={"players": ["Alcaraz", "Sinner"]}).json()["id"]
+    client.post(f"/matches/{match_id}/points", json={"winners": "AAA"})
+    headers = {"Idempotency-Key": "reset-1"}
+    first = client.post(f"/matches/{match_id}/reset", headers=headers).json()
+    client.post(f"/matches/{match_id}/players/Sinner/increment")
+    assert client.post(f"/matches/{match_id}/reset", headers=headers).json() == first
+    assert client.get(f"/matches/{match_id}/players/Sinner").json()["points"] == 15
+    # Keys are per match
+    assert client.post("/players/reset", headers=headers).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_concurrent_retries_score_once():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        match_id = (await http.post("/matches", json={"players": ["Alcaraz", "Sinner"]})).json()["id"]
+        url = f"/matches/{match_id}/players/Sinner/increment"
+        responses = await asyncio.gather(*(http.post(url, headers={"Idempotency-Key": "same"}) for _ in range(10)))
+    assert {response.json()["points"] for response in responses} == {15}
+    assert registry.get(match_id).state.to_players()[1]["points"] == 15
+
+
+def test_cache_expires_bounds_and_forgets_removed_matches(clock):
+    cache = IdempotencyCache(keys_per_match=3, ttl=10, clock=clock)
+    cache.put("m", "a", ("reset",), "A")
+    clock.now = 5
+    for key in "bcd":
+        cache.put("m", key, ("reset",), key.upper())
+    assert cache.get("m", "a", ("reset",)) is None          # oldest pushed out by the cap
+    assert cache.get("m", "b", ("reset",)) == "B"
+    with pytest.raises(IdempotencyConflict):
+        cache.get("m", "b", ("increment", "Sinner"))
+    clock.now = 15
+    assert cache.get("m", "b", ("reset",)) is None          # expired
+    cache.put("m", "e", ("reset",), "E")
+    assert len(cache) == 1 and (cache.hits, cache.misses) == (1, 2)
+
+    # Keys of matches nobody looks at again go with the next lookup after ttl
+    cache.put("idle", "k", ("reset",), "K")
+    clock.now = 24
+    assert cache.get("m", "e", ("reset",)) == "E" and len(cache) == 2
+    clock.now = 30
+    assert cache.get("m", "f", ("reset",)) is None
+    assert len(cache) == 0 and cache._matches == {}
+
+    match = registry.create(["Alcaraz", "Sinner"])
+    registry.add_listener(cache)
+    try:
+        cache.put(match.match_id, "k", ("reset",), [])
+        registry.remove(match.match_id)
+        assert cache.get(match.match_id, "k", ("reset",)) is None
+    finally:
+        registry.listeners.remove(cache)
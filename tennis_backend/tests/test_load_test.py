@@ -0,0 +1,46 @@
+"""
+Tests for the load generator, run briefly against the in-process app.
+"""
+
+import httpx
+import pytest
+
+from benchmarks.load_test import Recorder, run
+from tennis_backend.main import app, registry
+
+
+def client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load")
+
+
+@pytest.mark.asyncio
+async def test_scorers_and_spectators_hit_every_route():
+    async with client() as http:
+        stats = await run(http, scorers=4, matches=2, spectators=4, rate=400, poll_rate=50, duration=0.5)
+    by_route = {row.route: row for row in stats}
+    # Resets only show up once a match is won, which a short run may not reach
+    assert set(by_route) >= {"/matches/{match}/players", "/matches/{match}/players/{player}/increment"}
+    assert all(row.errors == 0 and row.requests > 0 for row in stats)
+    assert by_route["/matches/{match}/players"].p50 <= by_route["/matches/{match}/players"].p99
+    # Its matches are cleaned up afterwards
+    assert [match.match_id for match in registry] == ["default"]
+
+
+@pytest.mark.asyncio
+async def test_legacy_routes_and_etags():
+    async with client() as http:
+        stats = await run(http, scorers=1, matches=0, spectators=2, rate=20, poll_rate=40, duration=0.3,
+                          legacy=True, etag=True)
+    assert {row.route for row in stats} >= {"/players", "/players/{player}/increment"}
+    assert all(row.errors == 0 for row in stats)
+
+
+@pytest.mark.asyncio
+async def test_errors_are_counted_per_route():
+    recorder = Recorder()
+    async with client() as http:
+        await recorder.call(http, "/matches/{match}/players", "GET", "/matches/missing/players")
+        await recorder.call(http, "/players", "GET", "/players")
+    stats = {row.route: row for row in recorder.report(1.0)}
+    assert stats["/matches/{match}/players"].error_rate == 1.0
+    assert stats["/players"].error_rate == 0.0
@@ -0,0 +1,185 @@
+"""
+Tests for match formats: the default format scores exactly like the
+original functions, every preset's compiled table agrees with its rules, and
+each format's own rules (best of three, no-ad, match tiebreak, short sets).
+"""
+
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from tennis_backend.main import app
+from tennis_backend.match_format import DEFAULT_FORMAT, FORMATS, MatchFormat, parse_format
+from tennis_backend.match_registry import Match, MatchRegistry
+from tennis_backend.match_state import (
+    GAME_WON, MATCH_WON, NO_PLAYER, SET_WON, TIEBREAK_STARTED, MatchState, score_point,
+)
+from tennis_backend.tennis_game import award_point_to_player
+from tennis_backend.transition_table import TRANSITIONS, CompiledFormat, compile_format, score_point_table
+
+client = TestClient(app)
+
+
+def play(match_format, winners):
+    """(state, events per point) after scoring winners from 0-0 in match_format"""
+    state = MatchState(("Alcaraz", "Sinner"))
+    engine = compile_format(parse_format(match_format)).score_point
+    return state, [engine(state, winner) for winner in winners]
+
+
+def game(winner):
+    return [winner] * 4
+
+
+# Default format parity
+
+def test_default_format_compiles_to_the_existing_table():
+    assert CompiledFormat(DEFAULT_FORMAT).transitions == TRANSITIONS
+    assert compile_format(DEFAULT_FORMAT).score_point is score_point_table
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_default_format_matches_the_original_functions(seed):
+    rng = random.Random(seed)
+    compiled = CompiledFormat(DEFAULT_FORMAT).score_point
+    state, compact = MatchState(("Alcaraz", "Sinner")), MatchState(("Alcaraz", "Sinner"))
+    players = state.to_players()
+    for _ in range(600):
+        winner = rng.randint(0, 1)
+        assert compiled(state, winner) == score_point(compact, winner)
+        players[winner], players[1 - winner] = award_point_to_player(players[winner], players[1 - winner])
+        assert state.to_players() == players
+
+
+def test_default_matches_keep_their_engine():
+    assert Match("m", ["Alcaraz", "Sinner"]).score_point is score_point
+    assert Match("m", ["Alcaraz", "Sinner"], engine="table").score_point is score_point_table
+    assert Match("m", ["Alcaraz", "Sinner"], match_format="best_of_5").format == DEFAULT_FORMAT
+
+
+# Every preset's table agrees with its rules
+
+@pytest.mark.parametrize("name", sorted(FORMATS))
+def test_table_agrees_with_the_rules(name):
+    compiled = compile_format(FORMATS[name])
+    rng = random.Random(name)
+    for _ in range(20):
+        table_state, rules_state = MatchState(("A", "B")), MatchState(("A", "B"))
+        while table_state.winner == NO_PLAYER:
+            winner = rng.randint(0, 1)
+            index = compiled.state_index(table_state)
+            assert compiled.transitions[2 * index + winner] is not None
+            assert compiled.score_point(table_state, winner) == compiled._score_by_rules(rules_state, winner)
+            assert table_state.to_players() == rules_state.to_players()
+        assert table_state.sets_won(table_state.winner) == compiled.sets_to_win
+
+
+# Each format's rules
+
+def test_best_of_three_ends_after_two_sets():
+    state, events = play("best_of_3", game(0) * 12)
+    assert events[-1] == GAME_WON | SET_WON | MATCH_WON
+    assert state.set_scores(0) == [6, 6] and state.winner == 0
+
+
+def test_no_ad_deciding_point():
+    deuce = [0, 1, 0, 1, 0, 1]
+    state, events = play("best_of_3_no_ad", deuce + [1])
+    assert events[-1] == GAME_WON and state.score[3] == 1 and state.advantage == NO_PLAYER
+
+    # With advantage the same point only gives advantage
+    state, events = play("best_of_3", deuce + [1])
+    assert events[-1] == 0 and state.advantage == 1
+
+
+def test_match_tiebreak_replaces_the_deciding_set():
+    state, events = play("best_of_3_match_tiebreak", game(0) * 6 + game(1) * 6)
+    assert events[-1] == GAME_WON | SET_WON | TIEBREAK_STARTED
+    assert state.tiebreak and state.score == [0, 0, 0, 0, 0, 0]
+    assert state.to_player(0)["tiebreak"]
+
+    # First to 10 by two: 9-9, then 10-10, 11-10, 12-10
+    compiled = compile_format(FORMATS["best_of_3_match_tiebreak"])
+    for winner in [0, 1] * 10 + [1]:
+        assert compiled.score_point(state, winner) == 0
+    assert state.to_player(1)["tiebreak_points"] == 11
+    assert compiled.score_point(state, 1) == GAME_WON | SET_WON | MATCH_WON
+    assert state.set_scores(0) == [6, 0, 0] and state.set_scores(1) == [0, 6, 1]
+    assert state.winner == 1 and not state.tiebreak
+
+
+def test_match_tiebreak_won_to_ten():
+    state, events = play("doubles", game(0) * 6 + game(1) * 6 + [0] * 10)
+    assert events[-1] == GAME_WON | SET_WON | MATCH_WON
+    assert state.winner == 0 and state.sets[-2:] == bytes([1, 0])
+
+
+def test_short_sets_to_four_with_a_tiebreak_at_four_all():
+    state, events = play("short_sets", game(0) * 4)
+    assert events[-1] == GAME_WON | SET_WON and state.set_scores(0) == [4]
+
+    state, events = play("short_sets", (game(0) + game(1)) * 4)
+    assert state.score[2:4] == [4, 4] and not state.tiebreak
+    compiled = compile_format(FORMATS["short_sets"])
+    assert compiled.score_point(state, 0) == TIEBREAK_STARTED
+    for _ in range(6):
+        compiled.score_point(state, 0)
+    assert state.set_scores(0) == [5] and state.set_scores(1) == [4]
+
+
+def test_registry_matches_use_their_format():
+    registry = MatchRegistry()
+    match = registry.create(["Alcaraz", "Sinner"], match_format="best_of_3")
+    assert match.award_points([0] * 50) == 48  # the last two come after the match is won
+    assert match.state.winner == 0
+    assert registry.create(["Alcaraz", "Sinner"]).format == DEFAULT_FORMAT
+
+
+# Format definitions
+
+def test_parse_presets_fields_and_keys():
+    assert parse_format(None) is DEFAULT_FORMAT
+    assert parse_format("doubles").no_ad
+    assert parse_format({"name": "best_of_3", "games_per_set": 4}).name == "short_sets"
+    custom = parse_format({"sets_to_win": 1, "games_per_set": 8, "no_ad": True})
+    assert custom.name is None
+    assert parse_format(custom.key) == custom
+
+    for bad in ("best_of_7", {"sets_to_win": 0}, {"sets_to_win": 1, "match_tiebreak_points": 10}, {"lets": 0},
+                {"sets_to_win": "3"}, 5, "custom:3", "custom:2:6:7:0:0:9", "custom:2:6:7:2:0", "custom:2:x:7:0:0",
+                "custom:2:6:-7:0:0", "custom:9:6:7:0:0"):
+        with pytest.raises(ValueError):
+            parse_format(bad)
+    with pytest.raises(ValueError):
+        Match("m", ["Alcaraz", "Sinner"], match_format=MatchFormat(games_per_set=0))
+
+
+def test_custom_format_scores_by_its_table():
+    # One long set to 8, no-ad, one set wins the match
+    match = Match("m", ["Alcaraz", "Sinner"], match_format={"sets_to_win": 1, "games_per_set": 8, "no_ad": True})
+    match.award_points(game(0) * 7 + game(1) * 7 + game(0) * 2)
+    assert match.state.set_scores(0) == [9] and match.state.winner == 0
+
+
+# API
+
+def test_create_match_with_a_format():
+    response = client.post("/matches", json={"players": ["Alcaraz", "Sinner"], "format": "best_of_3_match_tiebreak"})
+    assert response.status_code == 201
+    body = response.json()
+    assert body["format"]["name"] == "best_of_3_match_tiebreak" and body["format"]["match_tiebreak_points"] == 10
+
+    custom = client.post("/matches", json={"players": ["Alcaraz", "Sinner"],
+                                           "format": {"name": "best_of_3", "no_ad": True}}).json()
+    assert custom["format"]["name"] == "best_of_3_no_ad"
+    assert client.post(f"/matches/{body['id']}/points", json={"winners": "A" * 48}).json()["players"][0]["winner"]
+
+    assert client.get(f"/matches/{body['id']}/win-probability").status_code == 422
+    assert client.post("/matches", json={"players": ["A", "B"], "format": "best_of_7"}).status_code == 422
+    assert client.post("/matches", json={"players": ["A", "B"], "format": {"sets_to_win": 9}}).status_code == 422
+    for fields in ("custom:3", "custom:2:6:7:0:0:9"):  # too few and too many fields
+        assert client.post("/matches", json={"players": ["A", "B"], "format": fields}).status_code == 422
+    assert client.post("/matches", json={"players": ["A", "B"], "format": "custom:1:8:7:1:0"}).status_code == 201
+    assert set(client.get("/formats").json()) == set(FORMATS)
+    assert client.get("/matches/default").json()["format"]["name"] == "best_of_5"
@@ -0,0 +1,142 @@
+"""
+Tests for the match indexes behind GET /matches: after any mix of points,
+resets, undos, redos and removals every filter returns exactly what a scan
+of the registry would, newest change first, and cursor pages cover the
+listing without repeats.
+"""
+
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from tennis_backend.main import app
+from tennis_backend.match_index import MatchIndex
+from tennis_backend.match_registry import MatchRegistry
+from tennis_backend.match_store import SQLiteStore
+
+client = TestClient(app)
+
+PLAYERS = ["Alcaraz", "Sinner", "Djokovic", "Medvedev", "Zverev", "Rune"]
+
+
+def scanned(registry, index, status=None, player=None, tiebreak=None, updated_since=None):
+    """The expected listing, the slow way: every match checked, sorted by latest change"""
+    matches = [match for match in registry
+               if (status is None or (match.state.winner == -1) == (status == "live"))
+               and (player is None or player in match.state.names)
+               and (tiebreak is None or match.state.tiebreak == tiebreak)
+               and (updated_since is None or index.updated[match.match_id] >= updated_since)]
+    return [match.match_id for match in sorted(matches, key=lambda match: -index.seq[match.match_id])]
+
+
+def paged(index, limit, **filters):
+    ids, cursor = [], None
+    while True:
+        matches, cursor = index.page(before=cursor, limit=limit, **filters)
+        ids += [match.match_id for match in matches]
+        if cursor is None:
+            return ids
+
+
+def test_filters_match_a_full_scan_through_random_play(clock):
+    rng = random.Random(1)
+    registry = MatchRegistry()
+    clock.tick = 1
+    index = MatchIndex(clock=clock)
+    registry.add_listener(index)
+    # Short sets finish (and reach tiebreaks) within a few dozen points
+    for number in range(30):
+        registry.create(rng.sample(PLAYERS, 2), match_id=f"m{number}", match_format=rng.choice([None, "short_sets"]))
+    seen = set()
+
+    for step in range(6000):
+        match = rng.choice(list(registry))
+        action = rng.random()
+        if action < 0.93:
+            # Tight matches, so plenty of tiebreaks
+            match.score(rng.randint(0, 1))
+        elif action < 0.96:
+            match.undo()
+        elif action < 0.98:
+            match.redo()
+        elif action < 0.99:
+            match.reset()
+        else:
+            registry.remove(match.match_id)
+            registry.create(rng.sample(PLAYERS, 2), match_id=f"new{step}", match_format="short_sets")
+
+        seen |= {"finished"} if index.finished else set()
+        seen |= {"tiebreak"} if index.tiebreak else set()
+        if step % 500 == 0:
+            since = index.clock.now - 40
+            for filters in [{}, {"status": "live"}, {"status": "finished"}, {"tiebreak": True},
+                            {"tiebreak": False}, {"player": "Rune"}, {"player": "Nadal"},
+                            {"status": "live", "player": "Sinner", "tiebreak": False},
+                            {"updated_since": since}, {"status": "finished", "updated_since": since}]:
+                expected = scanned(registry, index, **filters)
+                assert paged(index, 7, **filters) == expected
+                assert [match.match_id for match in index.page(limit=500, **filters)[0]] == expected
+    assert seen == {"finished", "tiebreak"}  # the run did cover both
+    assert len(index._log) <= 2 * len(index.seq) + 64
+
+
+def test_changes_between_pages_never_repeat_a_match():
+    registry = MatchRegistry()
+    index = MatchIndex()
+    registry.add_listener(index)
+    matches = [registry.create(["Alcaraz", "Sinner"], match_id=f"m{number}") for number in range(10)]
+    first, cursor = index.page(limit=4)
+    assert [match.match_id for match in first] == ["m9", "m8", "m7", "m6"]
+    matches[9].score(0)   # already listed: moves to the front
+    matches[2].score(1)   # not listed yet: moves past the cursor
+    rest, cursor = index.page(before=cursor, limit=10)
+    assert [match.match_id for match in rest] == ["m5", "m4", "m3", "m1", "m0"] and cursor is None
+    with pytest.raises(ValueError):
+        index.page(status="paused")
+
+
+@pytest.mark.asyncio
+async def test_a_match_fetched_from_the_store_is_indexed_at_its_stored_score(tmp_path, clock):
+    path = str(tmp_path / "matches.db")
+    source = MatchRegistry()
+    store = SQLiteStore(path)
+    source.add_listener(store)
+    won = source.create(["Alcaraz", "Sinner"], match_id="won", match_format="short_sets")
+    won.award_points([0] * 32)
+    assert won.state.winner == 0
+    source.create(["Djokovic", "Medvedev"], match_id="live")
+    await store.close()
+
+    registry = MatchRegistry()
+    index = MatchIndex(clock=clock)
+    registry.add_listener(index)
+    store = SQLiteStore(path)
+    for match_id in ("won", "live"):
+        assert await store.fetch(registry, match_id) is not None
+    await store.close()
+    assert [match.match_id for match in index.page(status="finished")[0]] == ["won"]
+    assert [match.match_id for match in index.page(status="live")[0]] == ["live"]
+
+
+def test_list_route():
+    ids = [client.post("/matches", json={"players": ["Ruud", f"Player {number}"]}).json()["id"]
+           for number in range(5)]
+    client.post(f"/matches/{ids[1]}/points", json={"winners": "A" * 72})                      # won 6-0 6-0 6-0
+    client.post(f"/matches/{ids[3]}/points", json={"winners": "AAAABBBB" * 6 + "A"})         # 6-6, in the tiebreak
+
+    body = client.get("/matches", params={"player": "Ruud", "limit": 2}).json()
+    assert [match["id"] for match in body["matches"]] == [ids[3], ids[1]]
+    rest = client.get("/matches", params={"player": "Ruud", "cursor": body["next_cursor"]}).json()
+    assert [match["id"] for match in rest["matches"]] == [ids[4], ids[2], ids[0]] and rest["next_cursor"] is None
+
+    finished = client.get("/matches", params={"status": "finished"}).json()["matches"]
+    assert [match["id"] for match in finished] == [ids[1]] and finished[0]["status"] == "finished"
+    in_tiebreak = client.get("/matches", params={"tiebreak": True}).json()["matches"]
+    assert [match["id"] for match in in_tiebreak] == [ids[3]] and in_tiebreak[0]["tiebreak"]
+    assert len(client.get("/matches", params={"updated_within": 3600}).json()["matches"]) == 6  # with the default
+
+    client.delete(f"/matches/{ids[3]}")
+    assert client.get("/matches", params={"tiebreak": True}).json()["matches"] == []
+    assert client.get("/matches", params={"status": "paused"}).status_code == 422
+    assert client.get("/matches", params={"cursor": 0}).status_code == 422
@@ -0,0 +1,117 @@
+"""
+Tests for the multi-match registry and the /matches routes.
+Each court is its own match with its own lock.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from tennis_backend.main import app
+from tennis_backend.match_registry import Match, MatchRegistry
+
+client = TestClient(app)
+
+
+def test_player_lookup():
+    """Each player maps straight to their slot in the match state"""
+    match = Match("court-1", ["Alcaraz", "Sinner"])
+    assert match.player_index == {"Alcaraz": 0, "Sinner": 1}
+    assert match.player("Sinner")["name"] == "Sinner"
+
+
+def test_match_needs_two_different_players():
+    with pytest.raises(ValueError):
+        Match("court-1", ["Alcaraz"])
+    with pytest.raises(ValueError):
+        Match("court-1", ["Alcaraz", "Alcaraz"])
+
+
+def test_registry_keeps_matches_apart():
+    """Scoring one match never touches another"""
+    registry = MatchRegistry()
+    court_1 = registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    court_2 = registry.create(["Djokovic", "Medvedev"], match_id="court-2")
+
+    court_1.award_point("Alcaraz")
+
+    assert court_1.player("Alcaraz")["points"] == 15
+    assert court_2.player("Djokovic")["points"] == 0
+    assert registry.get("court-2") is court_2
+    assert len(registry) == 2
+
+
+def test_registry_rejects_duplicate_ids():
+    registry = MatchRegistry()
+    registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    with pytest.raises(ValueError):
+        registry.create(["Djokovic", "Medvedev"], match_id="court-1")
+
+
+def test_create_and_score_match():
+    """A new match can be created and scored through its own routes"""
+    response = client.post("/matches", json={"players": ["Djokovic", "Medvedev"], "match_id": "court-7"})
+    assert response.status_code == 201
+    assert response.json()["id"] == "court-7"
+
+    client.post("/matches/court-7/players/Djokovic/increment")
+    djokovic = client.get("/matches/court-7/players/Djokovic").json()
+    assert djokovic["points"] == 15
+
+    # The default match used by /players is untouched
+    alcaraz = client.get("/players/Alcaraz").json()
+    assert alcaraz["points"] == 0
+
+
+def test_create_match_generates_id():
+    response = client.post("/matches", json={"players": ["Djokovic", "Medvedev"]})
+    assert response.status_code == 201
+    match_id = response.json()["id"]
+    assert client.get(f"/matches/{match_id}").status_code == 200
+
+
+def test_create_match_errors():
+    response = client.post("/matches", json={"players": ["Djokovic", "Djokovic"]})
+    assert response.status_code == 422
+
+    client.post("/matches", json={"players": ["Djokovic", "Medvedev"], "match_id": "court-7"})
+    response = client.post("/matches", json={"players": ["Ruud", "Fritz"], "match_id": "court-7"})
+    assert response.status_code == 409
+
+
+def test_unknown_match_and_player():
+    assert client.get("/matches/nope").status_code == 404
+    assert client.post("/matches/nope/players/Alcaraz/increment").status_code == 404
+    assert client.post("/matches/default/players/Federer/increment").status_code == 404
+
+
+def test_reset_and_delete_match():
+    client.post("/matches", json={"players": ["Djokovic", "Medvedev"], "match_id": "court-7"})
+    client.post("/matches/court-7/players/Djokovic/increment")
+
+    players = client.post("/matches/court-7/reset").json()
+    assert all(player["points"] == 0 for player in players)
+
+    assert client.delete("/matches/court-7").status_code == 204
+    assert client.get("/matches/court-7").status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_concurrent_increments_on_many_courts():
+    """Concurrent points on the same court are applied one at a time, none are lost"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        for court in range(5):
+            await http.post("/matches", json={"players": ["A", "B"], "match_id": f"court-{court}"})
+
+        # Three points each: every court should end up at 40-0
+        await asyncio.gather(*[
+            http.post(f"/matches/court-{court}/players/A/increment")
+            for court in range(5) for _ in range(3)
+        ])
+
+        for court in range(5):
+            player = (await http.get(f"/matches/court-{court}/players/A")).json()
+            assert player["points"] == 40
@@ -0,0 +1,104 @@
+"""
+Unit tests for the compact MatchState and its native scoring engine.
+The engine must produce exactly what award_point_to_player produces.
+"""
+
+import random
+
+import pytest
+
+from tennis_backend.match_state import (
+    GAME_WON, MATCH_WON, NO_PLAYER, SET_WON, TIEBREAK_STARTED, MatchState, score_point,
+)
+from tennis_backend.tennis_game import award_point_to_player
+
+
+def create_fresh_player(name="Player"):
+    """Helper to create a fresh player state"""
+    return {
+        "name": name, "points": 0, "current_set_games": 0, "sets": [],
+        "tiebreak": False, "tiebreak_points": 0, "advantage": False, "winner": False
+    }
+
+
+def play_dicts(winners):
+    """Replay point winners (0 or 1) through award_point_to_player"""
+    players = [create_fresh_player("Alcaraz"), create_fresh_player("Sinner")]
+    for winner in winners:
+        players[winner], players[1 - winner] = award_point_to_player(players[winner], players[1 - winner])
+    return players
+
+
+def test_fresh_state_matches_fresh_players():
+    state = MatchState(("Alcaraz", "Sinner"))
+    assert state.to_players() == [create_fresh_player("Alcaraz"), create_fresh_player("Sinner")]
+
+
+def test_basic_score_progression():
+    state = MatchState(("Alcaraz", "Sinner"))
+    for expected in (15, 30, 40):
+        score_point(state, 0)
+        assert state.to_player(0)["points"] == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_parity_with_dict_engine(seed):
+    """Random full matches score identically in both representations"""
+    rng = random.Random(seed)
+    winners = [rng.randint(0, 1) for _ in range(400)]
+    state = MatchState(("Alcaraz", "Sinner"))
+
+    for played, winner in enumerate(winners, start=1):
+        score_point(state, winner)
+        if played % 37 == 0:
+            assert state.to_players() == play_dicts(winners[:played])
+    assert state.to_players() == play_dicts(winners)
+
+
+def test_round_trip_through_players():
+    rng = random.Random(7)
+    players = play_dicts([rng.randint(0, 1) for _ in range(250)])
+    state = MatchState.from_players(*players)
+    assert state.to_players() == players
+    assert MatchState.from_players(*state.to_players()) == state
+
+
+def test_from_players_rejects_inconsistent_state():
+    player, opponent = create_fresh_player("Alcaraz"), create_fresh_player("Sinner")
+    player["sets"] = [6]
+    with pytest.raises(ValueError):
+        MatchState.from_players(player, opponent)
+
+
+def test_event_flags():
+    state = MatchState(("Alcaraz", "Sinner"))
+    assert [score_point(state, 0) for _ in range(4)] == [0, 0, 0, GAME_WON]
+
+    state.score = [3, 0, 5, 0, 0, 0]
+    assert score_point(state, 0) == GAME_WON | SET_WON
+    assert state.sets == bytes((6, 0))
+
+    state.score = [0, 0, 6, 6, 0, 0]
+    assert score_point(state, 1) == TIEBREAK_STARTED
+    assert state.tiebreak
+
+
+def test_match_won_once():
+    state = MatchState(("Alcaraz", "Sinner"))
+    events = [score_point(state, 0) for _ in range(3 * 6 * 4)]
+    assert events[-1] == GAME_WON | SET_WON | MATCH_WON
+    assert events.count(GAME_WON | SET_WON | MATCH_WON) == 1
+    assert state.winner == 0
+    assert state.sets_won(0) == 3
+
+    # Like award_point_to_player, further points are still counted
+    assert score_point(state, 1) == 0
+    assert state.winner == 0 and state.advantage == NO_PLAYER
+
+
+def test_copy_is_independent():
+    state = MatchState(("Alcaraz", "Sinner"))
+    clone = state.copy()
+    score_point(clone, 0)
+    assert state.to_player(0)["points"] == 0
+    assert clone.to_player(0)["points"] == 15
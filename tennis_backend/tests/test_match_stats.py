@@ -0,0 +1,164 @@
+"""
+Tests for live match stats: after every point they equal the same stats
+recomputed from the whole point history, and undo, redo, reset and the
+point log keep them exact.
+"""
+
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from tennis_backend.main import app
+from tennis_backend.match_registry import MatchRegistry
+from tennis_backend.match_state import GAME_WON, SET_WON, MatchState
+from tennis_backend.point_log import PointLog, recover_registry
+
+client = TestClient(app)
+
+
+def recompute(match, winners):
+    """The stats dict rebuilt from scratch from every point, the O(points) way"""
+    state = MatchState(match.state.names)
+    players = [dict(points_won=0, break_points_faced=0, break_points_converted=0, longest_point_streak=0,
+                    longest_game_streak=0, tiebreaks_won=0) for _ in range(2)]
+    deuces = 0
+    sets = [[0, 0]]
+    point_winners, game_winners = [], []
+    for winner in winners:
+        server = state.server(match.first_server)
+        returner = 1 - server
+        before = state.to_players()
+        break_point = not state.tiebreak and (
+            before[returner]["advantage"]
+            or (before[returner]["points"] == 40 and before[server]["points"] < 40)
+            or (match.format.no_ad and before[0]["points"] == before[1]["points"] == 40
+                and state.advantage == -1))
+        tiebreak = state.tiebreak
+        events = match.score_point(state, winner)
+
+        players[winner]["points_won"] += 1
+        sets[-1][winner] += 1
+        point_winners.append(winner)
+        if break_point:
+            players[server]["break_points_faced"] += 1
+            players[winner]["break_points_converted"] += winner == returner
+        if events & GAME_WON:
+            game_winners.append(winner)
+        if events & SET_WON:
+            players[winner]["tiebreaks_won"] += tiebreak
+            sets.append([0, 0])
+        after = state.to_players()
+        if not events & GAME_WON and not state.tiebreak and after[0]["points"] == after[1]["points"] == 40 \
+                and not after[0]["advantage"] and not after[1]["advantage"]:
+            deuces += 1
+
+    for player in (0, 1):
+        players[player]["longest_point_streak"] = longest_run(point_winners, player)
+        players[player]["longest_game_streak"] = longest_run(game_winners, player)
+    if sets[-1] == [0, 0] and len(sets) > 1:
+        sets.pop()
+    return players, deuces, sets
+
+
+def longest_run(winners, player):
+    best = run = 0
+    for winner in winners:
+        run = run + 1 if winner == player else 0
+        best = max(best, run)
+    return best
+
+
+def check(match, winners):
+    players, deuces, sets = recompute(match, winners)
+    stats = match.stats.to_dict(match.state.names)
+    for expected, actual in zip(players, stats["players"]):
+        assert {key: actual[key] for key in expected} == expected
+    assert stats["deuces"] == deuces
+    assert stats["points_per_set"] == sets
+
+
+@pytest.mark.parametrize("match_format, first_server", [
+    (None, "Alcaraz"), (None, "Sinner"), ("best_of_3_no_ad", "Alcaraz"), ("doubles", "Sinner"),
+])
+def test_stats_equal_a_full_recomputation_after_every_point(match_format, first_server):
+    rng = random.Random(first_server)
+    match = MatchRegistry().create(["Alcaraz", "Sinner"], first_server=first_server, match_format=match_format)
+    winners = []
+    while match.state.winner == -1:
+        # Serve wins most points, so there are breaks, deuces and tiebreaks to count
+        server = match.state.server(match.first_server)
+        winner = server if rng.random() < 0.62 else 1 - server
+        match.score(winner)
+        winners.append(winner)
+        check(match, winners)
+    assert sum(player["tiebreaks_won"] for player in match.stats.to_dict(match.state.names)["players"]) == \
+        sum(1 for i in range(0, len(match.state.sets), 2) if abs(match.state.sets[i] - match.state.sets[i + 1]) == 1)
+
+
+def test_break_points_deuces_and_streaks():
+    match = MatchRegistry().create(["Alcaraz", "Sinner"])  # Alcaraz serves first
+    match.award_points([1, 1, 1])           # 0-40: three break points in a row
+    match.award_points([0, 0, 0])           # saved all three: deuce
+    match.award_points([1, 0, 1, 1])        # advantage Sinner, deuce, advantage, broken
+    stats = match.stats.to_dict(match.state.names)
+    alcaraz, sinner = stats["players"]
+    assert alcaraz["break_points_faced"] == 5 and alcaraz["break_points_saved"] == 4
+    assert sinner["break_point_chances"] == 5 and sinner["break_points_converted"] == 1
+    assert stats["deuces"] == 2
+    assert sinner["longest_point_streak"] == 3 and alcaraz["longest_point_streak"] == 3
+    assert stats["point_streak"] == {"player": "Sinner", "length": 2}
+    assert stats["game_streak"] == {"player": "Sinner", "length": 1}
+    assert stats["points_per_set"] == [[4, 6]]
+
+
+def test_undo_redo_and_reset_restore_the_stats():
+    match = MatchRegistry().create(["Alcaraz", "Sinner"])
+    rng = random.Random(1)
+    snapshots = [match.stats.to_dict(match.state.names)]
+    for _ in range(200):
+        match.score(rng.randint(0, 1))
+        snapshots.append(match.stats.to_dict(match.state.names))
+
+    for expected in reversed(snapshots[:-1]):
+        assert match.undo()
+        assert match.stats.to_dict(match.state.names) == expected
+    for expected in snapshots[1:]:
+        assert match.redo()
+        assert match.stats.to_dict(match.state.names) == expected
+
+    match.reset()
+    assert match.stats.to_dict(match.state.names) == snapshots[0]
+    assert match.undo()
+    assert match.stats.to_dict(match.state.names) == snapshots[-1]
+
+
+def test_stats_survive_point_log_recovery(tmp_path):
+    registry = MatchRegistry()
+    log = PointLog.open(str(tmp_path), registry)
+    match = registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    rng = random.Random(2)
+    match.award_points([rng.randint(0, 1) for _ in range(150)])
+    log.snapshot()
+    match.award_points([rng.randint(0, 1) for _ in range(50)])
+    match.undo()
+    log.close()
+
+    recovered, _ = recover_registry(str(tmp_path))
+    restored = recovered.get("court-1")
+    assert restored.stats.to_dict(restored.state.names) == match.stats.to_dict(match.state.names)
+    assert restored.undo() and match.undo()
+    assert restored.stats.to_dict(restored.state.names) == match.stats.to_dict(match.state.names)
+
+
+def test_stats_route():
+    match_id = client.post("/matches", json={"players": ["Alcaraz", "Sinner"]}).json()["id"]
+    client.post(f"/matches/{match_id}/points", json={"winners": "BBBAAABABB"})
+    body = client.get(f"/matches/{match_id}/stats").json()
+    assert body["match_id"] == match_id and body["version"] == 10
+    assert [player["name"] for player in body["players"]] == ["Alcaraz", "Sinner"]
+    assert body["players"][1]["break_points_converted"] == 1 and body["deuces"] == 2
+
+    client.post(f"/matches/{match_id}/undo")
+    assert client.get(f"/matches/{match_id}/stats").json()["players"][1]["break_points_converted"] == 0
+    assert client.get("/matches/nope/stats").status_code == 404
@@ -0,0 +1,255 @@
+"""
+Tests for the durable match stores: SQLite rows match the in-memory state,
+group commit folds concurrent requests into few transactions, and a fresh
+store loads everything back.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+
+import httpx
+import pytest
+
+from tennis_backend import main
+from tennis_backend.archive import MatchArchive, MatchArchiver
+from tennis_backend.bounded_registry import BoundedMatchRegistry
+from tennis_backend.match_index import MatchIndex
+from tennis_backend.match_registry import MatchListener, MatchRegistry
+from tennis_backend.match_state import MatchState, score_point
+from tennis_backend.match_store import SQLiteStore, decode_state, encode_state
+from tennis_backend.point_log import PointLog
+
+
+def test_state_encoding_round_trip():
+    rng = random.Random(0)
+    state = MatchState(("Alcaraz", "Sinner"))
+    for _ in range(400):
+        score_point(state, rng.randint(0, 1))
+        copy = MatchState(state.names)
+        decode_state(copy, encode_state(state))
+        assert copy == state
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("group_commit", [True, False])
+async def test_changes_survive_reopening(tmp_path, group_commit):
+    path = str(tmp_path / "matches.db")
+    registry = MatchRegistry()
+    store = SQLiteStore(path, group_commit=group_commit)
+    store.load(registry)
+    first = registry.create(["Alcaraz", "Sinner"], match_id="court-1", first_server="Sinner")
+    second = registry.create(["Swiatek", "Gauff"], match_id="court-2")
+    first.award_points([0, 1, 1, 0, 0, 0, 0])
+    await store.persist(first)
+    await store.persist(second)
+    registry.remove("court-2")
+    await store.persist(second)
+    await store.close()
+
+    reopened = MatchRegistry()
+    store = SQLiteStore(path)
+    assert store.load(reopened) == 1
+    recovered = reopened.get("court-1")
+    assert recovered.state == first.state
+    assert (recovered.number, recovered.first_server) == (first.number, 1)
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_group_commit_batches_concurrent_scorers(tmp_path):
+    registry = MatchRegistry()
+    store = SQLiteStore(str(tmp_path / "matches.db"))
+    store.load(registry)
+    matches = [registry.create(["Alcaraz", "Sinner"]) for _ in range(50)]
+
+    async def scorer(match):
+        for _ in range(4):
+            match.score(0)
+            await store.persist(match)
+
+    await asyncio.gather(*[scorer(match) for match in matches])
+    # 200 persisted points, but scorers in flight together share a transaction
+    assert store.commits <= 8
+    assert sorted(store.stored_ids()) == sorted(match.match_id for match in matches)
+    await store.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("group_commit", [True, False])
+async def test_a_failed_commit_keeps_its_changes(tmp_path, group_commit):
+    registry = MatchRegistry()
+    store = SQLiteStore(str(tmp_path / "matches.db"), group_commit=group_commit)
+    store.load(registry)
+    match = registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    write = store._write
+
+    def fail_once(*rows):
+        store._write = write
+        raise sqlite3.OperationalError("disk I/O error")
+
+    store._write = fail_once
+    with pytest.raises(sqlite3.OperationalError):
+        await store.persist(match)
+    assert store.stored_ids() == []
+    await store.persist(match)
+    assert store.stored_ids() == ["court-1"]
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_loads_match_stored_by_another_process(tmp_path):
+    path = str(tmp_path / "matches.db")
+    writer_registry = MatchRegistry()
+    writer = SQLiteStore(path)
+    writer.load(writer_registry)
+    match = writer_registry.create(["Alcaraz", "Sinner"], match_id="court-9")
+    match.award_points([1, 1])
+    await writer.persist(match)
+
+    registry = MatchRegistry()
+    reader = SQLiteStore(path)
+    reader.load(registry)
+    assert await reader.fetch(registry, "missing") is None
+    fetched = await reader.fetch(registry, "court-9")
+    assert fetched is registry.get("court-9")
+    assert fetched.state == match.state
+    await writer.close()
+    await reader.close()
+
+
+@pytest.mark.asyncio
+async def test_endpoints_persist_before_answering(tmp_path, monkeypatch):
+    store = SQLiteStore(str(tmp_path / "matches.db"))
+    monkeypatch.setattr(main, "store", store)
+    main.registry.add_listener(store)
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/matches", json={"players": ["Alcaraz", "Sinner"], "match_id": "court-1"})
+            assert response.status_code == 201
+            await asyncio.gather(*[client.post("/matches/court-1/players/Alcaraz/increment") for _ in range(3)])
+            assert "court-1" in store.stored_ids()
+
+            reloaded, reopened = MatchRegistry(), SQLiteStore(store.path)
+            reopened.load(reloaded)
+            assert reloaded.get("court-1").player("Alcaraz")["points"] == 40
+            await reopened.close()
+
+            assert (await client.delete("/matches/court-1")).status_code == 204
+            assert "court-1" not in store.stored_ids()
+    finally:
+        main.registry.listeners.remove(store)
+        await store.close()
+
+
+@pytest.mark.asyncio
+async def test_match_format_is_stored(tmp_path):
+    path = str(tmp_path / "matches.db")
+    registry = MatchRegistry()
+    store = SQLiteStore(path)
+    store.load(registry)
+    match = registry.create(["Alcaraz", "Sinner"], match_id="court-1", match_format="best_of_3_match_tiebreak")
+    match.award_points([0] * 24 + [1] * 24 + [0] * 3)
+    await store.persist(match)
+    await store.close()
+
+    reopened = MatchRegistry()
+    store = SQLiteStore(path)
+    store.load(reopened)
+    recovered = reopened.get("court-1")
+    assert recovered.format == match.format and recovered.state == match.state
+    # Still in the match tiebreak, scored by its own rules
+    recovered.award_points([0] * 7)
+    assert recovered.state.winner == 0
+    await store.close()
+
+
+RESTART_SCRIPT = """
+import json, sys
+from fastapi.testclient import TestClient
+from tennis_backend.main import app
+client = TestClient(app)
+if sys.argv[1] == "score":
+    client.post("/matches", json={"players": ["Alcaraz", "Sinner"], "match_id": "court-1"})
+    client.post("/matches/court-1/points", json={"winners": "AAAB"})
+    client.post("/players/Sinner/increment")
+print(json.dumps([client.get("/matches/court-1/players").json(), client.get("/players").json()]))
+"""
+
+
+def test_restart_with_point_log_and_sqlite(tmp_path):
+    env = {**os.environ, "POINT_LOG_DIR": str(tmp_path / "log"), "SQLITE_PATH": str(tmp_path / "matches.db")}
+
+    def run(*args):
+        result = subprocess.run([sys.executable, "-c", RESTART_SCRIPT, *args], env=env, capture_output=True,
+                                text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        return json.loads(result.stdout.splitlines()[-1])
+
+    before = run("score")
+    # Both recover the same matches: the point log's copy is kept, the database's is not loaded again
+    assert run("read") == before
+    assert before[0][0]["points"] == 40 and before[1][1]["points"] == 15
+
+
+class Won(MatchListener):
+    """Records each match's winner as listeners first hear of it"""
+
+    def __init__(self):
+        self.created = {}
+
+    def match_created(self, match):
+        self.created[match.match_id] = match.state.winner
+
+
+@pytest.mark.asyncio
+async def test_loaded_matches_are_announced_at_their_stored_score(tmp_path):
+    path = str(tmp_path / "matches.db")
+    registry = MatchRegistry()
+    store = SQLiteStore(path)
+    store.load(registry)
+    won = registry.create(["Alcaraz", "Sinner"], match_id="won", match_format="short_sets")
+    won.award_points([0] * 32)
+    live = registry.create(["Djokovic", "Zverev"], match_id="live")
+    await store.persist(won)
+    await store.persist(live)
+    await store.close()
+
+    followers = {}
+    loaded, fetched = BoundedMatchRegistry(max_matches=2, evict_live=True), BoundedMatchRegistry(max_matches=2)
+    for target in (loaded, fetched):
+        followers[target] = (Won(), MatchIndex(), MatchArchiver(MatchArchive(), target, after=0))
+        for listener in followers[target]:
+            target.add_listener(listener)
+    store = SQLiteStore(path)
+    store.load(loaded)
+    await store.fetch(fetched, "live")
+    await store.fetch(fetched, "won")
+    for target in (loaded, fetched):
+        created, index, archiver = followers[target]
+        assert created.created == {"live": -1, "won": 0}
+        assert index.finished == {"won"} and index.live == {"live"}
+        assert archiver.due() and [match.match_id for match in archiver.sweep()] == ["won"]
+    # Finished matches are evicted first, so loading a finished one never pushes out a live one
+    target = BoundedMatchRegistry(max_matches=2)
+    await store.fetch(target, "won")
+    await store.fetch(target, "live")
+    target.create(["Swiatek", "Gauff"], match_id="new")
+    assert [match.match_id for match in target] == ["live", "new"]
+    await store.close()
+
+    log_registry = MatchRegistry()
+    log = PointLog.open(str(tmp_path / "log"), log_registry)
+    log_registry.create(["Alcaraz", "Sinner"], match_id="won", match_format="short_sets").award_points([0] * 32)
+    log.snapshot()
+    log.close()
+    recovered = MatchRegistry()
+    announced = Won()
+    recovered.add_listener(announced)
+    PointLog(str(tmp_path / "log"), recovered).recover()
+    assert announced.created == {"won": 0}
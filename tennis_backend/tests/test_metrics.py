@@ -0,0 +1,101 @@
+"""
+Tests for the metrics subsystem: histograms, scoring counters, the ASGI
+middleware and the /metrics endpoint.
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from tennis_backend.main import app, metrics
+from tennis_backend.match_registry import Match
+from tennis_backend.metrics import UNMATCHED, Histogram, Metrics, MetricsMiddleware
+
+client = TestClient(app)
+
+
+def scrape():
+    """Sample name (with labels) -> value"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_histogram_buckets_are_upper_bounds():
+    histogram = Histogram((0.001, 0.01))
+    for value in (0.0005, 0.001, 0.005, 2.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4 and abs(histogram.sum - 2.0065) < 1e-12
+
+
+def test_engine_events_drive_the_counters():
+    counters = Metrics().scoring
+    match = Match("m", ["Alcaraz", "Sinner"], listeners=[counters])
+    # 6-6 in games, then a 7-0 tiebreak (its first point starts it) and a straight-sets win
+    for _ in range(6):
+        match.award_points([0] * 4 + [1] * 4)
+    assert counters.tiebreaks == 0 and counters.games == 12
+    match.award_points([0] * 7)
+    assert counters.tiebreaks == 1 and counters.sets == 1 and counters.games == 13
+    match.award_points([0] * 48)
+    assert (counters.points, counters.sets, counters.matches_won) == (103, 3, 1)
+
+    match.undo()
+    match.redo()
+    match.reset()
+    assert (counters.undos, counters.redos, counters.resets) == (1, 1, 1)
+
+
+def test_requests_are_timed_per_route_template():
+    before = scrape()
+    client.post("/players/Alcaraz/increment")
+    created = client.post("/matches", json={"players": ["Alcaraz", "Sinner"]}).json()["id"]
+    client.get(f"/matches/{created}/players")
+    client.get("/matches/missing/players")
+    client.get("/no/such/route")
+    after = scrape()
+
+    def delta(sample):
+        return after.get(sample, 0) - before.get(sample, 0)
+
+    count = "http_request_duration_seconds_count"
+    assert delta(f'{count}{{method="POST",route="/players/{{player_name}}/increment",status="200"}}') == 1
+    assert delta(f'{count}{{method="GET",route="/matches/{{match_id}}/players",status="200"}}') == 1
+    assert delta(f'{count}{{method="GET",route="/matches/{{match_id}}/players",status="404"}}') == 1
+    assert delta(f'{count}{{method="GET",route="{UNMATCHED}",status="404"}}') == 1
+    assert f'http_request_duration_seconds_bucket{{method="GET",route="/matches/{{match_id}}/players",' \
+           f'status="200",le="+Inf"}}' in after
+    assert delta("tennis_points_total") == 1
+    assert after["tennis_matches"] == 2 and after["tennis_live_matches"] == 2
+
+
+def test_middleware_records_failures_as_500():
+    async def broken(scope, receive, send):
+        raise RuntimeError("boom")
+
+    collected = Metrics()
+    middleware = MetricsMiddleware(broken, collected)
+
+    async def call():
+        try:
+            await middleware({"type": "http", "method": "GET", "path": "/"}, None, None)
+        except RuntimeError:
+            pass
+
+    asyncio.run(call())
+    assert list(collected.requests) == [("GET", UNMATCHED, 500)]
+
+
+def test_gauges_are_read_on_scrape():
+    values = iter([1, 2])
+    collected = Metrics()
+    collected.gauge("things", "Things", lambda: next(values))
+    assert "things 1" in collected.render() and "things 2" in collected.render()
+    assert metrics is not None
@@ -0,0 +1,64 @@
+"""
+Tests for batch point ingestion: a buffered rally log applied in one request.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from tennis_backend.main import app
+from tennis_backend.match_registry import Match
+
+client = TestClient(app)
+
+
+def test_parse_winners_formats():
+    match = Match("court-1", ["Alcaraz", "Sinner"])
+    assert match.parse_winners("AABAB") == [0, 0, 1, 0, 1]
+    assert match.parse_winners(["Sinner", "A", 1, 0]) == [1, 0, 1, 0]
+
+
+@pytest.mark.parametrize("winners", ["AAC", ["Federer"], [2], [True]])
+def test_parse_winners_rejects_unknown(winners):
+    match = Match("court-1", ["Alcaraz", "Sinner"])
+    with pytest.raises(ValueError, match="unknown point winner"):
+        match.parse_winners(winners)
+
+
+def test_batch_matches_single_increments():
+    """A batch ends in the same state as the same points sent one by one"""
+    rally_log = "AAABBBABAABBBBAAAA"
+    client.post("/matches", json={"players": ["Alcaraz", "Sinner"], "match_id": "court-2"})
+    for letter in rally_log:
+        client.post(f"/matches/court-2/players/{'Alcaraz' if letter == 'A' else 'Sinner'}/increment")
+
+    response = client.post("/players/points", json={"winners": rally_log})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["applied"] == len(rally_log)
+    assert body["rejected_index"] is None
+    assert body["players"] == client.get("/matches/court-2/players").json()
+
+
+def test_batch_rejects_points_after_match_won():
+    client.post("/matches", json={"players": ["Alcaraz", "Sinner"], "match_id": "court-2"})
+    straight_sets = ["Alcaraz"] * (3 * 6 * 4)
+
+    response = client.post("/matches/court-2/points", json={"winners": straight_sets + ["Sinner", "Sinner"]})
+    body = response.json()
+    assert body["applied"] == len(straight_sets)
+    assert body["rejected_index"] == len(straight_sets)
+    assert body["players"][0]["winner"] is True
+    assert body["players"][1]["points"] == 0
+
+    # Anything sent after that is rejected from the first point
+    body = client.post("/matches/court-2/points", json={"winners": "B"}).json()
+    assert body == {**body, "applied": 0, "rejected_index": 0}
+
+
+def test_batch_errors():
+    response = client.post("/players/points", json={"winners": "ABX"})
+    assert response.status_code == 422
+    assert "Point 2" in response.json()["detail"]
+
+    assert client.post("/matches/nope/points", json={"winners": "A"}).status_code == 404
+    assert client.post("/players/points", json={"winners": "A" * 10_001}).status_code == 413
@@ -0,0 +1,123 @@
+"""
+Tests for the append-only point log: every change is recorded, and reopening
+the directory rebuilds exactly the same matches, with or without snapshots.
+"""
+
+import os
+import random
+
+from tennis_backend.match_registry import MatchRegistry
+from tennis_backend.point_log import RECORD, SEGMENT_PREFIX, SNAPSHOT_PREFIX, PointLog, recover_registry
+
+
+def play(registry, rng, points):
+    matches = list(registry)
+    for _ in range(points):
+        rng.choice(matches).score(rng.randint(0, 1))
+
+
+def states(registry):
+    return {match.match_id: (match.number, match.first_server, match.state) for match in registry}
+
+
+def test_reopen_rebuilds_every_match(tmp_path):
+    registry = MatchRegistry()
+    log = PointLog.open(str(tmp_path), registry)
+    registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    registry.create(["Swiatek", "Gauff"], match_id="court-2", first_server="Gauff")
+    play(registry, random.Random(0), 600)
+    log.close()
+
+    recovered, replayed = recover_registry(str(tmp_path))
+    assert replayed == 602
+    assert states(recovered) == states(registry)
+
+
+def test_resets_and_removals_are_replayed(tmp_path):
+    registry = MatchRegistry()
+    log = PointLog.open(str(tmp_path), registry)
+    kept = registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    registry.create(["Swiatek", "Gauff"], match_id="court-2")
+    kept.award_points([0, 0, 0, 0, 1])
+    kept.reset()
+    kept.award_points([1, 1])
+    registry.remove("court-2")
+    log.close()
+
+    recovered, _ = recover_registry(str(tmp_path))
+    assert "court-2" not in recovered
+    assert recovered.get("court-1").state == kept.state
+
+
+def test_snapshot_then_tail(tmp_path):
+    registry = MatchRegistry()
+    log = PointLog.open(str(tmp_path), registry, snapshot_every=100)
+    registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    registry.create(["Swiatek", "Gauff"], match_id="court-2")
+    play(registry, random.Random(1), 450)
+    log.close()
+
+    # Only the newest snapshot and the segment after it are kept
+    names = sorted(os.listdir(tmp_path))
+    assert [name for name in names if name.startswith(SNAPSHOT_PREFIX)] == [f"{SNAPSHOT_PREFIX}{400:020d}.bin"]
+    assert [name for name in names if name.startswith(SEGMENT_PREFIX)] == [f"{SEGMENT_PREFIX}{401:020d}.log"]
+
+    recovered, replayed = recover_registry(str(tmp_path))
+    assert replayed == 52
+    assert states(recovered) == states(registry)
+
+
+def test_keeps_logging_after_recovery(tmp_path):
+    registry = MatchRegistry()
+    log = PointLog.open(str(tmp_path), registry, snapshot_every=50)
+    match = registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    play(registry, random.Random(2), 120)
+    log.close()
+
+    reopened = MatchRegistry()
+    log = PointLog.open(str(tmp_path), reopened, snapshot_every=50)
+    assert log.seq == 121
+    again = reopened.get("court-1")
+    for winner in (0, 1, 1, 0):
+        match.score(winner)
+        again.score(winner)
+    created = reopened.create(["Swiatek", "Gauff"])
+    log.close()
+
+    recovered, _ = recover_registry(str(tmp_path))
+    assert recovered.get("court-1").state == match.state
+    assert recovered.get(created.match_id).number == created.number != again.number
+
+
+def test_torn_trailing_record_is_ignored(tmp_path):
+    registry = MatchRegistry()
+    log = PointLog.open(str(tmp_path), registry)
+    match = registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    match.award_points([0, 0, 1])
+    log.close()
+
+    segment = next(name for name in os.listdir(tmp_path) if name.startswith(SEGMENT_PREFIX))
+    with open(tmp_path / segment, "ab") as handle:
+        handle.write(RECORD.pack(5, match.number, 2, 0)[:7])
+
+    recovered, replayed = recover_registry(str(tmp_path))
+    assert replayed == 4
+    assert recovered.get("court-1").state == match.state
+
+
+def test_match_formats_survive_replay_and_snapshots(tmp_path):
+    registry = MatchRegistry()
+    log = PointLog.open(str(tmp_path), registry)
+    doubles = registry.create(["Alcaraz", "Sinner"], match_id="court-1", match_format="doubles")
+    custom = registry.create(["Swiatek", "Gauff"], match_id="court-2", match_format={"sets_to_win": 1, "no_ad": True})
+    play(registry, random.Random(3), 200)
+    log.snapshot()
+    registry.create(["Rune", "Fritz"], match_id="court-3", match_format="short_sets")
+    play(registry, random.Random(4), 200)
+    log.close()
+
+    recovered, _ = recover_registry(str(tmp_path))
+    assert recovered.get("court-1").format == doubles.format
+    assert recovered.get("court-2").format == custom.format
+    assert recovered.get("court-3").format.name == "short_sets"
+    assert states(recovered) == states(registry)
@@ -0,0 +1,95 @@
+"""
+Tests for the on-demand sampling profiler and its admin endpoint.
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import tennis_backend.main as main
+from tennis_backend.profiler import Profile, Profiler, ProfilerMiddleware
+from tennis_backend.tennis_game import award_point_to_player
+
+client = TestClient(main.app)
+
+
+async def score_for(seconds):
+    """Keep the loop thread busy in the scoring engine, yielding every 20 ms"""
+    # Yielding more often lets the sampler land mostly in the loop's select(), where the GIL is free
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        slice_end = min(deadline, time.perf_counter() + 0.02)
+        while time.perf_counter() < slice_end:
+            a = {"name": "A", "points": 0, "current_set_games": 0, "sets": [], "tiebreak": False,
+                 "tiebreak_points": 0, "advantage": False}
+            b = dict(a, name="B", sets=[])
+            for _ in range(4):
+                a, b = award_point_to_player(a, b)
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_samples_show_the_scoring_engine():
+    profile, _ = await asyncio.gather(Profiler().run(0.3, interval=0.001), score_for(0.3))
+    assert profile.samples > 0
+    assert any("tennis_backend/tennis_game.py:award_point_to_player" in stack for stack in profile.stacks)
+
+    for line in profile.collapsed().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and ";" in stack
+    hottest = profile.hot_functions(top=50)
+    assert all(row["self"] <= row["total"] for row in hottest)
+    assert any(row["function"].endswith("award_point_to_player") for row in hottest)
+
+
+def test_hot_functions_split_self_and_total():
+    stacks = {("main", "handler", "score"): 3, ("main", "handler"): 1, ("main", "other"): 1}
+    profile = Profile(stacks, idle=0, elapsed=1.0, interval=0.001, requests=0)
+    rows = {row["function"]: row for row in profile.hot_functions()}
+    assert (rows["score"]["self"], rows["score"]["total"]) == (3, 3)
+    assert (rows["handler"]["self"], rows["handler"]["total"]) == (1, 4)
+    assert (rows["main"]["self"], rows["main"]["total"], rows["main"]["total_percent"]) == (0, 5, 100.0)
+    assert profile.collapsed() == "main;handler 1\nmain;handler;score 3\nmain;other 1\n"
+
+
+@pytest.mark.asyncio
+async def test_stops_after_n_requests():
+    async def app(scope, receive, send):
+        pass
+
+    profiler = Profiler()
+    middleware = ProfilerMiddleware(app, profiler)
+
+    async def three_requests():
+        await asyncio.sleep(0.01)
+        for _ in range(3):
+            await middleware({"type": "http"}, None, None)
+
+    start = time.perf_counter()
+    profile, _ = await asyncio.gather(profiler.run(5.0, requests=3), three_requests())
+    assert profile.requests == 3 and time.perf_counter() - start < 1.0
+    assert not profiler.active
+
+    with pytest.raises(RuntimeError):
+        profiler.active = True
+        await profiler.run(0.01)
+
+
+def test_endpoint_is_off_by_default():
+    assert main.profiler is None
+    assert client.post("/admin/profile?seconds=0.01").status_code == 404
+
+
+def test_endpoint_returns_stats_and_collapsed_stacks(monkeypatch):
+    monkeypatch.setattr(main, "profiler", Profiler())
+    response = client.post("/admin/profile?seconds=0.05&top=5")
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body) == {"seconds", "interval", "requests", "samples", "idle_samples", "functions", "collapsed"}
+    assert len(body["functions"]) <= 5
+
+    response = client.post("/admin/profile?seconds=0.05&format=collapsed")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+    assert client.post("/admin/profile?seconds=0.05&format=svg").status_code == 422
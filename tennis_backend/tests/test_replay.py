@@ -0,0 +1,156 @@
+"""
+Tests for bulk replay: pbp strings score exactly like award_point_to_player,
+corrupt and impossible sequences are reported where they go wrong, and files
+stream through one process or a pool with results in file order.
+"""
+
+import csv
+import json
+import random
+
+import pytest
+
+from tennis_backend.match_format import FORMATS
+from tennis_backend.match_state import NO_PLAYER, MatchState, score_point
+from tennis_backend.replay import ReplayError, format_points, main, replay_file, replay_points, replay_record
+from tennis_backend.tennis_game import award_point_to_player
+from tennis_backend.transition_table import compile_format
+
+
+def random_winners(seed, points=1000):
+    rng = random.Random(seed)
+    return [rng.randint(0, 1) for _ in range(points)]
+
+
+def game(server_won=True):
+    return "SSSS" if server_won else "RRRR"
+
+
+# server1 wins every point: a 6-0 set
+BAGEL = ";".join([game(), game(False)] * 3)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_replay_matches_award_point_to_player(seed):
+    winners = random_winners(seed)
+    pbp = format_points(winners)
+    players = MatchState(("Alcaraz", "Sinner")).to_players()
+    for winner in winners:
+        if players[0]["winner"] or players[1]["winner"]:
+            break
+        players[winner], players[1 - winner] = award_point_to_player(players[winner], players[1 - winner])
+    assert replay_points(pbp, score_point, ("Alcaraz", "Sinner")).to_players() == players
+
+    result = replay_record({"id": "m1", "server1": "Alcaraz", "server2": "Sinner", "pbp": pbp})
+    assert result.status == "complete" and result.error is None
+    assert [list(games) for games in result.sets] == [list(pair) for pair in zip(players[0]["sets"],
+                                                                                  players[1]["sets"])]
+
+
+def test_scoreline_with_serve_and_tiebreaks():
+    # Holds to 6-6, then a tiebreak won 7-5 by server1, who served the first point of it
+    holds = ";".join([game()] * 12)
+    tiebreak = "S/SR/RS/SR/RS/SR/S"
+    result = replay_record({"server1": "Alcaraz", "server2": "Sinner", "pbp": f"{holds};{tiebreak}."})
+    assert result.sets == [(7, 6)] and result.tiebreaks == [5]
+    assert result.score == "7-6(5)" and result.status == "unfinished"
+
+    # Breaks of serve: server2 wins every point, so wins each set 6-0
+    breaks = ".".join(";".join(["RRRR", "SSSS"] * 3) for _ in range(3))
+    result = replay_record({"server1": "Alcaraz", "server2": "Sinner", "pbp": breaks})
+    assert result.to_dict()["winner"] == "Sinner" and result.score == "0-6 0-6 0-6"
+
+    # Aces count for the server and double faults for the returner: server1 holds, then breaks
+    assert replay_points("AAAA;DDDD", score_point).to_players()[0]["current_set_games"] == 2
+
+
+@pytest.mark.parametrize("pbp, message, position", [
+    (".".join([BAGEL] * 3) + ".S", "already won the match", 90),
+    ("SSSSS", "Missing ';'", 4),
+    ("SSS;S", "';' in the middle of a game", 3),
+    ("SSSS.", "'.' after a finished game", 4),
+    (BAGEL + ";", "';' after a finished set", 29),
+    ("SS/SS", "'/' outside a tiebreak", 2),
+    ("SSX", "Unexpected character 'X'", 2),
+])
+def test_impossible_sequences_are_reported(pbp, message, position):
+    result = replay_record({"id": "bad", "pbp": pbp})
+    assert result.status == "invalid" and message in result.error and result.position == position
+    with pytest.raises(ReplayError):
+        replay_points(pbp, score_point)
+
+
+def test_tiebreak_switch_must_change_server():
+    holds = ";".join([game()] * 12)
+    assert replay_record({"pbp": f"{holds};S/R"}).error is None
+    assert "does not change" in replay_record({"pbp": f"{holds};S/R/S"}).error
+
+
+def test_record_formats():
+    short = format_points([0] * 32, compile_format(FORMATS["short_sets"]).score_point)
+    result = replay_record({"pbp": short, "format": "short_sets"})
+    assert result.status == "complete" and result.score == "4-0 4-0"
+    assert "'.' after a finished game" in replay_record({"pbp": short}).error  # 4-0 is no set in best of five
+    assert replay_record({"pbp": short}, match_format="short_sets").status == "complete"
+    assert "Unknown match format" in replay_record({"pbp": short, "format": "best_of_7"}).error
+    assert replay_record({"id": 7}).error == "No pbp string"
+
+
+def write_jsonl(path, count):
+    with open(path, "w", encoding="utf-8") as out:
+        for number in range(count):
+            out.write(json.dumps({"id": number, "server1": "A", "server2": "B",
+                                  "pbp": format_points(random_winners(number))}) + "\n")
+        out.write("{not json\n")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_replay_file_streams_in_order(tmp_path, workers):
+    path = str(tmp_path / "matches.jsonl")
+    write_jsonl(path, 25)
+    results = list(replay_file(path, workers=workers, chunk_size=4))
+    assert [result.id for result in results[:-1]] == [str(number) for number in range(25)]
+    assert all(result.status == "complete" for result in results[:-1])
+    assert results[-1].id == "line 26" and results[-1].error.startswith("Bad JSON")
+
+
+def test_malformed_records_are_reported_in_a_pooled_run(tmp_path):
+    path = str(tmp_path / "matches.jsonl")
+    good = format_points(random_winners(0))
+    records = [{"id": "good", "pbp": good}, {"id": "few", "pbp": good, "format": "custom:3"},
+               {"id": "many", "pbp": good, "format": "custom:2:6:7:0:0:9"}, {"id": "number", "pbp": good, "format": 5},
+               {"id": "object", "pbp": good, "format": {"sets_to_win": "x"}}, {"id": "last", "pbp": good}]
+    with open(path, "w", encoding="utf-8") as out:
+        out.writelines(json.dumps(record) + "\n" for record in records)
+    results = list(replay_file(path, workers=2, chunk_size=2))
+    assert [result.id for result in results] == [record["id"] for record in records]
+    assert [result.status for result in results] == ["complete"] + ["invalid"] * 4 + ["complete"]
+    assert "format must be" in results[3].error
+
+
+def test_csv_files_and_cli(tmp_path, capsys):
+    path = str(tmp_path / "matches.csv")
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        writer = csv.DictWriter(out, ["pbp_id", "server1", "server2", "pbp"])
+        writer.writeheader()
+        writer.writerow({"pbp_id": 1, "server1": "A", "server2": "B", "pbp": format_points(random_winners(1))})
+        writer.writerow({"pbp_id": 2, "server1": "A", "server2": "B", "pbp": "SSSS;SSSS;S"})
+        writer.writerow({"pbp_id": 3, "server1": "A", "server2": "B", "pbp": "SSSS;RRRR."})
+
+    output = str(tmp_path / "results.jsonl")
+    assert main([path, "--workers", "1", "--output", output]) == 0
+    with open(output, encoding="utf-8") as results:
+        rows = [json.loads(line) for line in results]
+    assert [row["status"] for row in rows] == ["complete", "unfinished", "invalid"]
+    assert rows[2]["position"] == 9 and rows[2]["points"] == 8
+    assert "3 matches (1 complete, 1 unfinished, 1 invalid)" in capsys.readouterr().err
+
+    assert main([path, "--workers", "1", "--invalid-only"]) == 0
+    assert [json.loads(line)["id"] for line in capsys.readouterr().out.splitlines()] == ["3"]
+
+
+def test_format_points_stops_at_the_winner():
+    pbp = format_points([0] * 100)
+    assert pbp.count(".") == 2 and not pbp.endswith(".")
+    assert replay_points(pbp, score_point).winner == 0
+    assert replay_points("", score_point).winner == NO_PLAYER
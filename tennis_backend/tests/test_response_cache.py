@@ -0,0 +1,73 @@
+"""
+Tests for the pre-encoded player response cache.
+"""
+
+import json
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from tennis_backend.main import app, default_match, registry, response_cache
+from tennis_backend.match_registry import Match
+from tennis_backend.response_cache import ResponseCache, encode
+
+client = TestClient(app)
+
+
+def test_encoding_matches_fastapi():
+    match = Match("m", ["Ålcaraz", "Sinner"])
+    match.award_points([0, 1, 0])
+    players = match.player_list()
+    expected = json.dumps(jsonable_encoder(players), ensure_ascii=False, separators=(",", ":")).encode()
+    assert encode(players) == expected
+
+
+def test_bytes_are_reused_until_the_version_moves():
+    cache = ResponseCache()
+    match = Match("m", ["Alcaraz", "Sinner"])
+    first = cache.players(match)
+    assert cache.players(match) is first and (cache.hits, cache.misses) == (1, 1)
+
+    for change in (lambda: match.score(0), match.reset, match.undo, match.redo):
+        change()
+        body = cache.players(match)
+        assert json.loads(body) == match.player_list()
+    assert json.loads(cache.player(match, "Sinner")) == match.player("Sinner")
+    assert cache.player(match, "Sinner") is cache.player(match, "Sinner")
+
+
+def test_a_recreated_match_is_not_served_old_bytes():
+    cache = ResponseCache()
+    old = Match("court-1", ["Alcaraz", "Sinner"])
+    old.award_points([0, 0])
+    cache.players(old)
+    cache.match_removed(old)
+    assert len(cache) == 0
+
+    # Same ID and version as the cached entry, but a different match
+    cache.players(old)
+    new = Match("court-1", ["Djokovic", "Rune"])
+    new.version = old.version
+    assert json.loads(cache.players(new))[0]["name"] == "Djokovic"
+
+
+def test_routes_serve_cached_bytes_and_refresh_after_a_point():
+    assert response_cache is not None
+    first = client.get("/players")
+    hits = response_cache.hits
+    assert client.get("/players").content == first.content
+    assert response_cache.hits == hits + 1
+    assert first.headers["content-type"] == "application/json"
+
+    client.post("/players/Alcaraz/increment")
+    assert client.get("/players").json()[0]["points"] == 15
+    assert client.get("/players/Alcaraz").json() == default_match.player("Alcaraz")
+    assert client.get("/players/Nobody").status_code == 404
+
+    created = client.post("/matches", json={"players": ["Alcaraz", "Sinner"], "match_id": "cached"}).json()
+    client.get("/matches/cached/players")
+    client.delete("/matches/cached")
+    assert "cached" not in registry
+    client.post("/matches", json={"players": ["Djokovic", "Rune"], "match_id": "cached"})
+    assert client.get("/matches/cached/players").json()[0]["name"] == "Djokovic"
+    assert created["id"] == "cached"
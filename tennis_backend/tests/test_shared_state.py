@@ -0,0 +1,143 @@
+"""
+Tests for the shared-memory match backend: registries attached to the same
+segment (as separate workers would be) see and score the same matches, and
+concurrent processes never lose a point.
+"""
+
+import multiprocessing
+import random
+import uuid
+
+import pytest
+
+from tennis_backend.match_state import MatchState, score_point
+from tennis_backend.shared_state import SharedMatchRegistry
+from tennis_backend.win_probability import win_probabilities
+
+
+@pytest.fixture
+def segment(tmp_path):
+    name = f"tennis-test-{uuid.uuid4().hex[:8]}"
+    registries = []
+
+    def attach(capacity=16):
+        registry = SharedMatchRegistry(name, capacity, lock_dir=str(tmp_path))
+        registries.append(registry)
+        return registry
+
+    yield attach
+    for registry in registries[1:]:
+        registry.table.close()
+    registries[0].table.unlink()
+    registries[0].table.close()
+
+
+def test_workers_share_matches(segment):
+    first, second = segment(), segment()
+    match = first.create(["Alcaraz", "Sinner"], match_id="court-1", first_server="Sinner")
+
+    other = second.get("court-1")
+    assert other is not None and "court-1" in second
+    assert other.first_server == 1
+    match.award_point("Alcaraz")
+    other.award_point("Alcaraz")
+    assert match.player("Alcaraz")["points"] == 30
+    assert other.version == match.version == 2
+    assert other.incarnation == match.incarnation  # so every worker tags the same ETag
+
+
+def test_state_round_trips_through_the_record(segment):
+    registry = segment()
+    match = registry.create(["Alcaraz", "Sinner"])
+    expected = MatchState(("Alcaraz", "Sinner"))
+    rng = random.Random(3)
+    winners = [rng.randint(0, 1) for _ in range(150)]
+    for winner in winners:
+        score_point(expected, winner)
+    assert match.award_points(winners) is None
+
+    fresh = segment().get(match.match_id)
+    fresh.pull()
+    assert fresh.state == expected
+
+
+def test_ids_are_unique_across_workers(segment):
+    first, second = segment(), segment()
+    first.create(["Alcaraz", "Sinner"], match_id="court-1")
+    with pytest.raises(ValueError):
+        second.create(["Swiatek", "Gauff"], match_id="court-1")
+
+
+def test_remove_is_seen_everywhere(segment):
+    first, second = segment(), segment()
+    first.create(["Alcaraz", "Sinner"], match_id="court-1")
+    assert second.get("court-1") is not None
+    first.remove("court-1")
+    assert second.get("court-1") is None
+    assert len(second) == 0
+
+    # The slot is reused by a new match, which old handles must not see
+    second.create(["Swiatek", "Gauff"], match_id="court-2")
+    assert [match.match_id for match in first] == ["court-2"]
+
+
+def test_capacity_and_field_limits(segment):
+    registry = segment(capacity=2)
+    registry.create(["Alcaraz", "Sinner"])
+    registry.create(["Alcaraz", "Sinner"])
+    with pytest.raises(ValueError):
+        registry.create(["Alcaraz", "Sinner"])
+    with pytest.raises(ValueError):
+        segment(capacity=2).create(["A" * 49, "Sinner"], match_id="x")
+
+
+def _score_in_worker(name, lock_dir, points):
+    registry = SharedMatchRegistry(name, 16, lock_dir=lock_dir)
+    match = registry.get("court-1")
+    for _ in range(points):
+        match.award_point("Alcaraz")
+    registry.table.close()
+
+
+def test_concurrent_processes_never_lose_points(segment, tmp_path):
+    registry = segment()
+    match = registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_score_in_worker, args=(registry.table.name, str(tmp_path), 20))
+               for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    # 80 straight points: three 6-0 sets (72 points), then two more games
+    assert match.player("Alcaraz")["sets"] == [6, 6, 6]
+    assert match.player("Alcaraz")["current_set_games"] == 2
+    assert match.version == 80
+
+
+def test_preset_formats_are_shared_and_custom_ones_refused(segment):
+    first, second = segment(), segment()
+    match = first.create(["Alcaraz", "Sinner"], match_id="court-1", match_format="doubles")
+    match.award_points([0] * 24 + [1] * 24)
+    assert match.state.tiebreak
+    with pytest.raises(ValueError):
+        first.create(["Alcaraz", "Sinner"], match_format={"sets_to_win": 1})
+
+    mirrored = second.get("court-1")
+    assert mirrored.format.name == "doubles"
+    assert mirrored.state.to_players() == match.state.to_players()
+
+
+def test_state_reads_see_other_workers_points(segment):
+    first, second = segment(), segment()
+    match = first.create(["Alcaraz", "Sinner"], match_id="court-1")
+    other = second.get("court-1")
+    match.award_points([0] * 24)
+    # No player()/pull() in between: the state itself is read through the record
+    assert other.state.to_players()[0]["sets"] == [6]
+    assert win_probabilities(other.state, [0.64, 0.64], other.first_server)["match"] > 0.5
+    assert [held.state.winner for held in second] == [-1]
+
+    first.remove("court-1")
+    assert other.state.to_players()[0]["sets"] == [6]  # the last state seen
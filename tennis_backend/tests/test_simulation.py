@@ -0,0 +1,67 @@
+"""
+Tests for the vectorized Monte Carlo simulator.
+Skipped when NumPy is not installed (pip install -e .[sim]).
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from tennis_backend.match_state import MatchState, score_point
+from tennis_backend.simulation import serve_point_probabilities, simulate_match, simulate_match_loop
+
+
+def state_after(winners):
+    state = MatchState(("Alcaraz", "Sinner"))
+    for winner in winners:
+        score_point(state, winner)
+    return state
+
+
+def test_even_players_from_love_all():
+    result = simulate_match(MatchState(("Alcaraz", "Sinner")), (0.62, 0.62), matches=100_000, seed=1)
+    assert result.win_probability == pytest.approx(0.5, abs=0.01)
+    assert sum(result.set_scores.values()) == pytest.approx(1.0)
+    assert set(result.set_scores) <= {"3-0", "3-1", "3-2", "0-3", "1-3", "2-3"}
+
+
+def test_stronger_server_is_favoured():
+    result = simulate_match(MatchState(("Alcaraz", "Sinner")), (0.68, 0.60), matches=50_000, seed=2)
+    assert 0.75 < result.win_probability < 0.95
+
+
+def test_finished_match_is_certain():
+    state = state_after([1] * (3 * 6 * 4))
+    result = simulate_match(state, (0.6, 0.6), matches=10)
+    assert result.win_probability == 0.0
+    assert result.set_scores == {"0-3": 1.0}
+
+
+def test_match_point_up_two_sets():
+    # Two sets to love, 5-0 and 40-0 on serve
+    state = state_after([0] * (2 * 6 * 4 + 5 * 4 + 3))
+    result = simulate_match(state, (0.6, 0.6), matches=20_000, seed=3)
+    assert result.win_probability > 0.99
+    assert result.set_scores["3-0"] > 0.99
+
+
+@pytest.mark.parametrize("winners", [
+    [0, 1, 1, 0, 0, 1, 1, 0, 1],                    # deuce with advantage in the first game
+    [0] * 24 + [1] * 24 + [0] * 2 + [1] * 3,        # 6-6, into the tiebreak
+])
+def test_agrees_with_point_by_point_loop(winners):
+    state = state_after(winners)
+    vectorized = simulate_match(state, (0.64, 0.6), first_server=1, matches=60_000, seed=4)
+    looped = simulate_match_loop(state, (0.64, 0.6), first_server=1, matches=6_000, seed=5)
+    assert vectorized.win_probability == pytest.approx(looped.win_probability, abs=0.03)
+
+
+def test_return_probabilities_are_blended():
+    probabilities = serve_point_probabilities((0.7, 0.6), return_win=(0.4, 0.3))
+    assert probabilities.tolist() == pytest.approx([0.7, 0.6])
+
+
+@pytest.mark.parametrize("serve_win", [(1.0, 0.6), (0.6, 0.0), (0.6,)])
+def test_rejects_degenerate_probabilities(serve_win):
+    with pytest.raises(ValueError):
+        serve_point_probabilities(serve_win)
@@ -0,0 +1,144 @@
+"""
+Tests for the match timeline: the score at any earlier point equals a replay
+from 0-0, whatever the checkpoint spacing, and undo, redo, reset and the
+persistence backends keep the timeline in step with the match.
+"""
+
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from tennis_backend.main import app
+from tennis_backend.match_registry import Match, MatchRegistry
+from tennis_backend.match_state import MatchState, score_point
+from tennis_backend.match_store import SQLiteStore
+from tennis_backend.point_log import PointLog, recover_registry
+from tennis_backend.timeline import Timeline
+
+client = TestClient(app)
+
+
+def replayed(winners, names=("Alcaraz", "Sinner")):
+    state = MatchState(names)
+    for winner in winners:
+        score_point(state, winner)
+    return state
+
+
+@pytest.mark.parametrize("every", [1, 7, 32, 1000])
+def test_score_at_every_point_matches_a_full_replay(every):
+    rng = random.Random(every)
+    match = MatchRegistry(checkpoint_every=every).create(["Alcaraz", "Sinner"])
+    winners = [rng.randint(0, 1) for _ in range(300)]
+    match.award_points(winners)
+    played = match.timeline.length
+    assert match.timeline.winners() == bytes(winners[:played])
+    assert len(match.timeline.buffers[1]) == played // every + 1
+    for point in range(played + 1):
+        assert match.state_at(point) == replayed(winners[:point])
+    assert match.state_at(played) == match.state
+
+    for point in (-1, played + 1):
+        with pytest.raises(ValueError):
+            match.state_at(point)
+
+
+def test_undo_redo_and_new_points_keep_the_timeline_in_step():
+    rng = random.Random(3)
+    match = MatchRegistry(checkpoint_every=5).create(["Alcaraz", "Sinner"])
+    winners = [rng.randint(0, 1) for _ in range(40)]
+    match.award_points(winners)
+
+    for _ in range(12):
+        match.undo()
+    assert match.timeline.length == 28 and match.state_at(28) == match.state
+    match.redo()
+    assert match.timeline.length == 29 and match.state_at(29) == replayed(winners[:29])
+
+    # A new point replaces everything that could have been redone
+    match.score(1 - winners[29])
+    assert not match.redo()
+    branch = winners[:29] + [1 - winners[29]]
+    assert match.timeline.winners() == bytes(branch)
+    assert all(match.state_at(point) == replayed(branch[:point]) for point in range(31))
+
+
+def test_reset_starts_a_new_timeline_and_undoing_it_brings_the_old_one_back():
+    match = MatchRegistry(checkpoint_every=4).create(["Alcaraz", "Sinner"])
+    match.award_points([0] * 30)
+    before = match.state.copy()
+    match.reset()
+    assert match.timeline.length == 0 and match.state_at(0) == MatchState(match.state.names)
+    match.award_points([1] * 3)
+
+    for _ in range(4):
+        match.undo()
+    assert match.timeline.length == 30 and match.state == before
+    assert match.state_at(25) == replayed([0] * 25)
+
+
+def test_matches_without_a_timeline():
+    match = Match("m", ["Alcaraz", "Sinner"], checkpoint_every=0)
+    match.award_points([0, 1, 0])
+    assert match.timeline is None
+    with pytest.raises(ValueError):
+        match.state_at(1)
+    with pytest.raises(ValueError):
+        Timeline(0)
+
+
+def test_point_log_recovery_keeps_the_timeline(tmp_path):
+    registry = MatchRegistry(checkpoint_every=8)
+    log = PointLog.open(str(tmp_path), registry)
+    match = registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    rng = random.Random(4)
+    winners = [rng.randint(0, 1) for _ in range(100)]
+    match.award_points(winners[:60])
+    log.snapshot()
+    match.award_points(winners[60:])
+    match.undo()
+    log.close()
+
+    recovered, _ = recover_registry(str(tmp_path))
+    restored = recovered.get("court-1")
+    assert restored.timeline.length == 99
+    assert all(restored.state_at(point) == replayed(winners[:point]) for point in range(0, 100, 9))
+    assert restored.redo() and restored.timeline.length == 100
+
+
+@pytest.mark.asyncio
+async def test_sqlite_matches_record_from_the_stored_score(tmp_path):
+    path = str(tmp_path / "matches.db")
+    registry = MatchRegistry()
+    store = SQLiteStore(path)
+    store.load(registry)
+    match = registry.create(["Alcaraz", "Sinner"], match_id="court-1")
+    match.award_points([0] * 10)
+    await store.persist(match)
+    await store.close()
+
+    reopened = MatchRegistry()
+    store = SQLiteStore(path)
+    store.load(reopened)
+    restored = reopened.get("court-1")
+    restored.award_points([1] * 4)
+    # Points before the stored score are unknown: the timeline starts there
+    assert restored.timeline.length == 4
+    assert restored.state_at(0) == match.state and restored.state_at(4) == restored.state
+    await store.close()
+
+
+def test_state_route():
+    match_id = client.post("/matches", json={"players": ["Alcaraz", "Sinner"], "first_server": "Sinner"}).json()["id"]
+    client.post(f"/matches/{match_id}/points", json={"winners": "AAAAB"})
+    body = client.get(f"/matches/{match_id}/state", params={"at": 4}).json()
+    assert body["at"] == 4 and body["points"] == 5
+    assert body["players"][0]["current_set_games"] == 1 and body["players"][1]["points"] == 0
+    assert body["server"] == "Alcaraz"
+    assert client.get(f"/matches/{match_id}/state", params={"at": 0}).json()["server"] == "Sinner"
+
+    assert client.get(f"/matches/{match_id}/state", params={"at": 6}).status_code == 404
+    assert client.get(f"/matches/{match_id}/state", params={"at": -1}).status_code == 422
+    assert client.get(f"/matches/{match_id}/state").status_code == 422
+    assert client.get("/matches/nope/state", params={"at": 0}).status_code == 404
@@ -0,0 +1,110 @@
+"""
+Parity tests for the transition-table engine.
+Every reachable in-set state and exhaustive point sequences must score exactly
+like award_point_to_player (and return the same events as score_point).
+"""
+
+import itertools
+import random
+
+import pytest
+
+from tennis_backend.match_registry import MatchRegistry
+from tennis_backend.match_state import MatchState, score_point
+from tennis_backend.tennis_game import award_point_to_player
+from tennis_backend.transition_table import TRANSITIONS, score_point_table, state_index
+
+
+def award_with_dicts(state, winner):
+    """Score one point with award_point_to_player on the state's JSON shape"""
+    players = state.to_players()
+    players[winner], players[1 - winner] = award_point_to_player(players[winner], players[1 - winner])
+    return players
+
+
+def reachable_states():
+    """Every in-set state the table engine can reach, walked with score_point"""
+    start = MatchState(("Alcaraz", "Sinner"))
+    seen = {state_index(start): start}
+    pending = [start]
+    while pending:
+        state = pending.pop()
+        for winner in (0, 1):
+            after = state.copy()
+            score_point(after, winner)
+            index = state_index(after)
+            if index not in seen and not after.sets:
+                seen[index] = after
+                pending.append(after)
+    return list(seen.values())
+
+
+def test_table_covers_every_reachable_state():
+    states = reachable_states()
+    assert len(states) > 500
+    for state in states:
+        for winner in (0, 1):
+            assert TRANSITIONS[2 * state_index(state) + winner] is not None
+
+
+@pytest.mark.parametrize("winner", [0, 1])
+def test_every_transition_matches_dict_engine(winner):
+    for state in reachable_states():
+        table_state, compact_state = state.copy(), state.copy()
+        events = score_point_table(table_state, winner)
+
+        assert table_state.to_players() == award_with_dicts(state, winner)
+        assert events == score_point(compact_state, winner)
+
+
+@pytest.mark.parametrize("start_score", [
+    [0, 0, 0, 0, 0, 0],   # start of a set
+    [0, 0, 5, 5, 0, 0],   # heading for a tiebreak
+    [2, 2, 6, 5, 0, 0],   # 30-30 serving for the set
+])
+def test_exhaustive_point_sequences(start_score):
+    """Every sequence of 12 points from the start score ends in the same place"""
+    for winners in itertools.product((0, 1), repeat=12):
+        table_state = MatchState(("Alcaraz", "Sinner"))
+        table_state.score = start_score[:]
+        players = table_state.to_players()
+
+        for winner in winners:
+            score_point_table(table_state, winner)
+            players[winner], players[1 - winner] = award_point_to_player(players[winner], players[1 - winner])
+        assert table_state.to_players() == players
+
+
+def test_long_tiebreak():
+    """Tiebreaks keep going past the normalized range"""
+    state = MatchState(("Alcaraz", "Sinner"))
+    state.score = [0, 0, 6, 6, 0, 0]
+    for _ in range(20):
+        score_point_table(state, 0)
+        score_point_table(state, 1)
+    assert state.to_player(0)["tiebreak_points"] == 20
+    score_point_table(state, 1)
+    score_point_table(state, 1)
+    assert state.set_scores(1) == [7]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_full_matches(seed):
+    rng = random.Random(seed)
+    table_state = MatchState(("Alcaraz", "Sinner"))
+    compact_state = MatchState(("Alcaraz", "Sinner"))
+    for _ in range(500):
+        winner = rng.randint(0, 1)
+        assert score_point_table(table_state, winner) == score_point(compact_state, winner)
+    assert table_state == compact_state
+
+
+def test_registry_engine_selection():
+    registry = MatchRegistry(engine="table")
+    match = registry.create(["Alcaraz", "Sinner"])
+    assert match.score_point is score_point_table
+    match.award_point("Alcaraz")
+    assert match.player("Alcaraz")["points"] == 15
+
+    with pytest.raises(ValueError):
+        MatchRegistry(engine="abacus")
@@ -0,0 +1,105 @@
+"""
+Tests for match versions: ETag / If-None-Match on the players routes and
+the ?since=&wait= long-poll.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from tennis_backend.main import app, default_match, registry
+
+client = TestClient(app)
+
+
+def test_version_bumps_on_points_and_reset():
+    match = registry.create(["Alcaraz", "Sinner"])
+    assert match.version == 0
+    match.award_point("Alcaraz")
+    match.award_points([0, 1, 1])
+    assert match.version == 4
+    match.reset()
+    assert match.version == 5
+
+
+def test_etag_and_not_modified():
+    first = client.get("/players")
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert first.headers["x-match-version"] == str(default_match.version)
+
+    unchanged = client.get("/players", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    assert unchanged.headers["etag"] == etag
+
+    client.post("/players/Alcaraz/increment")
+    changed = client.get("/players", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()[0]["points"] == 15
+
+
+def test_player_route_etag():
+    etag = client.get("/players/Sinner").headers["etag"]
+    assert client.get("/players/Sinner", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get("/players/Nobody", headers={"If-None-Match": etag}).status_code == 404
+
+    client.post("/players/reset")
+    assert client.get("/players/Sinner", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_match_routes_are_versioned_too():
+    client.post("/matches", json={"players": ["Swiatek", "Gauff"], "match_id": "court-1"})
+    etag = client.get("/matches/court-1/players").headers["etag"]
+    assert client.get("/matches/court-1/players", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/matches/court-1/players/Gauff", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_a_re_created_match_does_not_match_old_etags():
+    client.post("/matches", json={"players": ["Swiatek", "Gauff"], "match_id": "court-1"})
+    client.post("/matches/court-1/points", json={"winners": "AAA"})
+    etag = client.get("/matches/court-1/players").headers["etag"]
+    client.delete("/matches/court-1")
+    client.post("/matches", json={"players": ["Alcaraz", "Sinner"], "match_id": "court-1"})
+    client.post("/matches/court-1/points", json={"winners": "BBB"})
+    response = client.get("/matches/court-1/players", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["x-match-version"] == "3"
+    assert response.json()[0]["name"] == "Alcaraz"
+
+
+def test_long_poll_returns_at_once_when_already_newer():
+    client.post("/players/Alcaraz/increment")
+    start = time.perf_counter()
+    response = client.get("/players", params={"since": 0, "wait": 10})
+    assert time.perf_counter() - start < 1
+    assert response.json()[0]["points"] == 15
+
+
+def test_long_poll_times_out():
+    version = default_match.version
+    response = client.get("/players", params={"since": version, "wait": 0.05})
+    assert response.status_code == 200
+    assert response.headers["x-match-version"] == str(version)
+
+
+def test_long_poll_wait_is_capped():
+    assert client.get("/players", params={"since": 0, "wait": 3600}).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_long_poll_wakes_on_point():
+    version = default_match.version
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        poll = asyncio.ensure_future(async_client.get("/players", params={"since": version, "wait": 10}))
+        await asyncio.sleep(0.05)
+        assert not poll.done()
+
+        await async_client.post("/players/Sinner/increment")
+        response = await asyncio.wait_for(poll, 2)
+        assert response.headers["x-match-version"] == str(version + 1)
+        assert response.json()[1]["points"] == 15
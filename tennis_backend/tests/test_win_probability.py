@@ -0,0 +1,97 @@
+"""
+Tests for the exact (Markov chain) win probability engine and its endpoint.
+"""
+
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from tennis_backend.main import app
+from tennis_backend.match_state import MatchState, score_point
+from tennis_backend.win_probability import cache_info, game_win, tiebreak_win, win_probabilities
+
+client = TestClient(app)
+
+
+def test_game_win_known_values():
+    assert game_win(0.5, 0, 0) == pytest.approx(0.5)
+    assert game_win(0.6, 0, 0) == pytest.approx(0.735729, abs=1e-6)
+    assert game_win(0.6, 3, 3) == pytest.approx(0.36 / 0.52)   # deuce
+    assert game_win(0.6, 4, 2) == 1.0
+
+
+def test_tiebreak_symmetry():
+    assert tiebreak_win(0.65, 0.65, 0, 0, 0) == pytest.approx(0.5)
+    assert tiebreak_win(0.65, 0.65, 12, 12, 1) == pytest.approx(0.5)
+
+
+def test_even_players_from_love_all():
+    probabilities = win_probabilities(MatchState(("Alcaraz", "Sinner")), (0.62, 0.62))
+    assert probabilities["set"] == pytest.approx(0.5)
+    assert probabilities["match"] == pytest.approx(0.5)
+    assert probabilities["tiebreak"] is None
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_each_point_is_a_weighted_average_of_the_next(seed):
+    """P(state) = p * P(after winning the point) + (1 - p) * P(after losing it)"""
+    rng = random.Random(seed)
+    serve_win, first_server = (0.66, 0.61), seed % 2
+    state = MatchState(("Alcaraz", "Sinner"))
+
+    while state.winner == -1:
+        server = state.server(first_server)
+        p_0 = serve_win[0] if server == 0 else 1 - serve_win[1]
+        won, lost = state.copy(), state.copy()
+        score_point(won, 0)
+        score_point(lost, 1)
+
+        expected = p_0 * win_probabilities(won, serve_win, first_server)["match"] \
+            + (1 - p_0) * win_probabilities(lost, serve_win, first_server)["match"]
+        assert win_probabilities(state, serve_win, first_server)["match"] == pytest.approx(expected)
+
+        score_point(state, 0 if rng.random() < p_0 else 1)
+
+
+def test_finished_match():
+    state = MatchState(("Alcaraz", "Sinner"))
+    for _ in range(3 * 6 * 4):
+        score_point(state, 0)
+    assert win_probabilities(state, (0.6, 0.6)) == {"game": 1.0, "tiebreak": None, "set": 1.0, "match": 1.0}
+
+
+def test_repeated_queries_hit_the_cache():
+    state = MatchState(("Alcaraz", "Sinner"))
+    win_probabilities(state, (0.6123, 0.6321))
+    before = cache_info()
+    win_probabilities(state, (0.6123, 0.6321))
+    after = cache_info()
+    assert after["misses"] == before["misses"]
+    assert after["hits"] > before["hits"]
+
+
+def test_rejects_bad_probabilities():
+    with pytest.raises(ValueError):
+        win_probabilities(MatchState(("Alcaraz", "Sinner")), (1.0, 0.6))
+
+
+def test_win_probability_endpoint():
+    client.post("/matches", json={"players": ["Alcaraz", "Sinner"], "match_id": "court-3", "first_server": "Sinner"})
+    client.post("/matches/court-3/players/Alcaraz/increment")
+
+    response = client.get("/matches/court-3/win-probability?serve_win=0.66&serve_win=0.64")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["server"] == "Sinner"
+    assert body["tiebreak"] is None
+    for level in ("game", "set", "match"):
+        assert body[level]["Alcaraz"] + body[level]["Sinner"] == pytest.approx(1.0)
+    # 0-15 down on serve: better than the usual ~24% chance of a break
+    assert body["game"]["Alcaraz"] > 1 - game_win(0.64, 0, 0)
+
+
+def test_win_probability_endpoint_errors():
+    assert client.get("/matches/nope/win-probability").status_code == 404
+    assert client.get("/matches/default/win-probability?serve_win=1.5&serve_win=0.6").status_code == 422
+    assert client.post("/matches", json={"players": ["A", "B"], "first_server": "C"}).status_code == 422
@@ -0,0 +1,88 @@
+"""
+Random access to any earlier score of a match.
+
+A Timeline records the winner of every point since the match started (one
+byte each) and a MatchState.snapshot() every `every` points. The score after
+point n is the checkpoint at or before n plus at most every - 1 replayed
+points, so a query costs O(every) however long the match has run, instead of
+a replay from 0-0. Larger `every` means fewer checkpoints and slower queries.
+
+The winners and checkpoints of one line of play are shared by every
+snapshot() of the timeline, which is just those buffers and a length. Undo
+moves the length back; a new point after an undo cuts off what came after
+it. A reset starts fresh buffers, so the old ones stay intact for an undo of
+the reset.
+"""
+
+from typing import Callable, List, Sequence, Tuple
+
+from tennis_backend.match_state import MatchState
+
+# Points between checkpoints: a query replays at most this many
+DEFAULT_CHECKPOINT_EVERY = 32
+
+_START = MatchState(("", "")).snapshot()
+
+
+class Timeline:
+    """Point winners since the start of the match, with a state checkpoint every `every` points"""
+
+    __slots__ = ("every", "buffers", "length")
+
+    def __init__(self, every: int = DEFAULT_CHECKPOINT_EVERY):
+        if every < 1:
+            raise ValueError("Checkpoints must be at least one point apart")
+        self.every = every
+        self.reset()
+
+    def reset(self) -> None:
+        """Start recording a new line of play from 0-0"""
+        self.restart(None)
+
+    def restart(self, state) -> None:
+        """Start recording from state (a MatchState, or None for 0-0): points before it are not known"""
+        # (point winners, checkpoints[i] = state after i * every points, every)
+        self.buffers: Tuple[bytearray, List[Tuple], int] = (
+            bytearray(), [_START if state is None else state.snapshot()], self.every)
+        self.length = 0
+
+    def record(self, winner: int, state: MatchState) -> None:
+        """Append a point won by player index winner; state is the score after it"""
+        winners, checkpoints, every = self.buffers
+        length = self.length
+        if len(winners) > length:
+            # Points were undone and this one replaces them
+            del winners[length:]
+            del checkpoints[length // every + 1:]
+        winners.append(winner)
+        self.length = length = length + 1
+        if length % every == 0:
+            checkpoints.append(state.snapshot())
+
+    def snapshot(self) -> Tuple:
+        return self.buffers, self.length
+
+    def restore(self, snapshot: Tuple) -> None:
+        self.buffers, self.length = snapshot
+
+    @property
+    def from_start(self) -> bool:
+        """Were the recorded points played from 0-0 (not from a restart mid-match)"""
+        return self.buffers[1][0] == _START
+
+    def winners(self) -> bytes:
+        """Every recorded point's winner, in order"""
+        return bytes(self.buffers[0][:self.length])
+
+    def state_at(self, point: int, names: Sequence[str],
+                 score_point: Callable[[MatchState, int], int]) -> MatchState:
+        """The score after the first `point` recorded points (0: the start), scored with score_point"""
+        if not 0 <= point <= self.length:
+            raise ValueError(f"Point {point} is outside the {self.length} points recorded")
+        winners, checkpoints, every = self.buffers
+        index = point // every
+        state = MatchState(names)
+        state.restore(checkpoints[index])
+        for winner in winners[index * every:point]:
+            score_point(state, winner)
+        return state
@@ -0,0 +1,252 @@
+"""
+Transition-table scoring engine.
+
+Within a set the score can only be in a small, finite number of states:
+points and advantage in the current game, games in the set, and (during a
+tiebreak) the tiebreak points. Tiebreak points are unbounded, but once both
+players are one point short of winning only the lead matters, so they are
+normalized back to a bounded range. All of those states are enumerated once
+into a table indexed by (state, point winner). Each row also names the row
+of the state it leads to, which is cached on the MatchState, so scoring a
+point is one table lookup plus appending the set and checking the match when
+the point finishes a set.
+
+A table is compiled per match format (compile_format): the format's set
+length, tiebreak length, no-ad games and match tiebreak are all baked into
+the rows, so every format scores with the same lookup. A match tiebreak is
+played as a tiebreak at 0-0 in games, which no regular set can reach, so its
+states get their own block of rows.
+
+score_point_table is the default (best-of-five) format's engine, a drop-in
+alternative to match_state.score_point that returns the same event flags.
+"""
+
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from tennis_backend.match_format import DEFAULT_FORMAT, MatchFormat
+from tennis_backend.match_state import (
+    GAME_POINT, GAME_WON, GAMES, MATCH_WON, NO_PLAYER, POINTS, SET_WON, TIEBREAK_POINTS, TIEBREAK_STARTED,
+    MatchState,
+)
+
+# A state within a set: (points 0, points 1, games 0, games 1, tiebreak 0, tiebreak 1, advantage, tiebreak)
+SetState = Tuple[int, int, int, int, int, int, int, bool]
+
+# (row of the next state, score after the point or None to just add one
+#  tiebreak point, advantage after, tiebreak after, events, finished set's games or None)
+Transition = Tuple[int, Optional[Tuple[int, ...]], int, bool, int, Optional[bytes]]
+
+_GAME_STATES = 4 * 4 * 3   # points 0, points 1, advantage
+
+
+class CompiledFormat:
+    """A match format compiled into a transition table and a scoring function over it"""
+
+    def __init__(self, match_format: MatchFormat = DEFAULT_FORMAT):
+        self.format = match_format.validate()
+        self.sets_to_win = match_format.sets_to_win
+        self.games_per_set = match_format.games_per_set
+        self.tiebreak_points = match_format.tiebreak_points
+        self.no_ad = match_format.no_ad
+        self.match_tiebreak_points = match_format.match_tiebreak_points
+
+        self.max_games = self.games_per_set + 1
+        self.regular_states = self.max_games * self.max_games * _GAME_STATES
+        self.tiebreak_range = self.tiebreak_points + 1
+        self.match_tiebreak_base = self.regular_states + self.max_games ** 2 * self.tiebreak_range ** 2
+        self.match_tiebreak_range = self.match_tiebreak_points + 1
+        self.size = self.match_tiebreak_base + (self.match_tiebreak_range ** 2 if self.match_tiebreak_points else 0)
+
+        self.transitions = self.build_transitions()
+        # Row a match tiebreak starts from, -1 without one
+        self.match_tiebreak_index = self._key(self._match_tiebreak_start()) if self.match_tiebreak_points else -1
+        self.score_point: Callable[[MatchState, int], int] = self._scorer()
+
+    def state_index(self, state: MatchState) -> int:
+        """Position of the state's in-set score in the table"""
+        score = state.score
+        if state.tiebreak:
+            first, second = score[TIEBREAK_POINTS], score[TIEBREAK_POINTS + 1]
+            if self.match_tiebreak_points and score[GAMES] == score[GAMES + 1] == 0:
+                shift = min(first, second) - (self.match_tiebreak_points - 1)
+                if shift > 0:
+                    first -= shift
+                    second -= shift
+                return self.match_tiebreak_base + first * self.match_tiebreak_range + second
+            shift = min(first, second) - (self.tiebreak_points - 1)
+            if shift > 0:
+                first -= shift
+                second -= shift
+            games = score[GAMES] * self.max_games + score[GAMES + 1]
+            return self.regular_states + (games * self.tiebreak_range + first) * self.tiebreak_range + second
+        games = score[GAMES] * self.max_games + score[GAMES + 1]
+        return ((games * 4 + score[POINTS]) * 4 + score[POINTS + 1]) * 3 + state.advantage + 1
+
+    def _key(self, s: SetState) -> int:
+        scratch = MatchState(("", ""))
+        scratch.score = list(s[:6])
+        scratch.advantage = s[6]
+        scratch.tiebreak = s[7]
+        return self.state_index(scratch)
+
+    @staticmethod
+    def _match_tiebreak_start() -> SetState:
+        return (0, 0, 0, 0, 0, 0, NO_PLAYER, True)
+
+    def _in_match_tiebreak(self, score) -> bool:
+        return bool(self.match_tiebreak_points) and score[GAMES] == score[GAMES + 1] == 0
+
+    def next_state(self, s: SetState, winner: int) -> Tuple[SetState, int, Optional[bytes]]:
+        """The format's rules on a single in-set state: (next state, events, finished set's games)"""
+        loser = 1 - winner
+        score = list(s[:6])
+        advantage, tiebreak = s[6], s[7]
+
+        if tiebreak:
+            to_win = self.match_tiebreak_points if self._in_match_tiebreak(score) else self.tiebreak_points
+            score[TIEBREAK_POINTS + winner] += 1
+            won = score[TIEBREAK_POINTS + winner]
+            if won >= to_win and won - score[TIEBREAK_POINTS + loser] >= 2:
+                games = [score[GAMES], score[GAMES + 1]]
+                games[winner] += 1
+                return s, GAME_WON | SET_WON, bytes(games)
+            return (*score, advantage, True), 0, None
+
+        if score[GAMES + winner] == self.games_per_set and score[GAMES + loser] == self.games_per_set:
+            score[TIEBREAK_POINTS + winner] = 1
+            score[TIEBREAK_POINTS + loser] = 0
+            return (*score, advantage, True), TIEBREAK_STARTED, None
+
+        deuce = score[POINTS + winner] == GAME_POINT and score[POINTS + loser] == GAME_POINT
+        if deuce and not self.no_ad and advantage == NO_PLAYER:
+            return (*score, winner, False), 0, None
+        if deuce and not self.no_ad and advantage == loser:
+            return (*score, NO_PLAYER, False), 0, None
+        if deuce or score[POINTS + winner] == GAME_POINT or advantage == winner:
+            score[GAMES + winner] += 1
+            score[POINTS] = score[POINTS + 1] = 0
+            won = score[GAMES + winner]
+            if won >= self.games_per_set and won - score[GAMES + loser] >= 2:
+                return s, GAME_WON | SET_WON, bytes(score[GAMES:GAMES + 2])
+            return (*score, NO_PLAYER, False), GAME_WON, None
+
+        score[POINTS + winner] += 1
+        return (*score, advantage, False), 0, None
+
+    def _normalize(self, s: SetState) -> SetState:
+        """Long tiebreaks folded back the same way state_index does"""
+        to_win = self.match_tiebreak_points if self._in_match_tiebreak(s) else self.tiebreak_points
+        shift = min(s[4], s[5]) - (to_win - 1)
+        if shift > 0:
+            return (*s[:4], s[4] - shift, s[5] - shift, *s[6:])
+        return s
+
+    def build_transitions(self) -> List[Optional[Transition]]:
+        """Enumerate every state reachable within a set (and a match tiebreak) and its two transitions"""
+        table: List[Optional[Transition]] = [None] * 2 * self.size
+        start: SetState = (0, 0, 0, 0, 0, 0, NO_PLAYER, False)
+        start_index = self._key(start)
+        starts = [start] + ([self._match_tiebreak_start()] if self.match_tiebreak_points else [])
+        seen = {self._key(s) for s in starts}
+        pending = deque(starts)
+
+        while pending:
+            s = pending.popleft()
+            index = self._key(s)
+            for winner in (0, 1):
+                after, events, set_games = self.next_state(s, winner)
+                if events & SET_WON:
+                    table[2 * index + winner] = (start_index, None, NO_PLAYER, False, events, set_games)
+                    continue
+                # Tiebreak points keep counting past the normalized range, so only the step is stored
+                score_after = None if s[7] and after[7] else after[:6]
+                if after[7]:
+                    after = self._normalize(after)
+                key = self._key(after)
+                table[2 * index + winner] = (key, score_after, after[6], after[7], events, None)
+                if key not in seen:
+                    seen.add(key)
+                    pending.append(after)
+        return table
+
+    def _roll_over_set(self, state: MatchState, winner: int, set_games: bytes) -> int:
+        state.sets += set_games
+        state.score[:] = (0, 0, 0, 0, 0, 0)
+        state.advantage = NO_PLAYER
+        state.tiebreak = False
+        won = state.sets_won(winner)
+        if won >= self.sets_to_win:
+            events = 0 if state.winner == winner else MATCH_WON
+            state.winner = winner
+            return events
+        if self.match_tiebreak_points and won == self.sets_to_win - 1 == state.sets_won(1 - winner):
+            # One set all (or two all): the deciding set is a match tiebreak
+            state.tiebreak = True
+            state.table_index = self.match_tiebreak_index
+            return TIEBREAK_STARTED
+        return 0
+
+    def _score_by_rules(self, state: MatchState, winner: int) -> int:
+        """Score a state outside the table (e.g. a hand-edited one) straight from the rules"""
+        s = (*state.score, state.advantage, state.tiebreak)
+        after, events, set_games = self.next_state(s, winner)
+        state.table_index = -1
+        if set_games is not None:
+            return events | self._roll_over_set(state, winner, set_games)
+        state.score[:] = after[:6]
+        state.advantage = after[6]
+        state.tiebreak = after[7]
+        return events
+
+    def _scorer(self) -> Callable[[MatchState, int], int]:
+        transitions, state_index = self.transitions, self.state_index
+        roll_over, by_rules = self._roll_over_set, self._score_by_rules
+
+        def score_point_table(state: MatchState, winner: int) -> int:
+            """
+            Award a point to player index winner (0 or 1) by table lookup.
+            Same rules and event flags as match_state.score_point in the default format.
+            """
+            index = state.table_index
+            if index < 0:
+                index = state_index(state)
+            transition = transitions[2 * index + winner]
+            if transition is None:
+                # Not reachable by play from 0-0 (e.g. a hand-edited state)
+                return by_rules(state, winner)
+
+            state.table_index, score_after, advantage, tiebreak, events, set_games = transition
+            if set_games is not None:
+                return events | roll_over(state, winner, set_games)
+            if score_after is None:
+                state.score[TIEBREAK_POINTS + winner] += 1
+            else:
+                state.score[:] = score_after
+            state.advantage = advantage
+            state.tiebreak = tiebreak
+            return events
+
+        return score_point_table
+
+
+_COMPILED: Dict[MatchFormat, CompiledFormat] = {}
+
+
+def compile_format(match_format: MatchFormat) -> CompiledFormat:
+    """The format's compiled table, built on first use and shared by every match in that format"""
+    compiled = _COMPILED.get(match_format)
+    if compiled is None:
+        compiled = _COMPILED[match_format] = CompiledFormat(match_format)
+    return compiled
+
+
+DEFAULT_TABLE = compile_format(DEFAULT_FORMAT)
+TRANSITIONS = DEFAULT_TABLE.transitions
+state_index = DEFAULT_TABLE.state_index
+score_point_table = DEFAULT_TABLE.score_point
+
+
+def build_transitions() -> List[Optional[Transition]]:
+    """The default format's table, built afresh"""
+    return CompiledFormat(DEFAULT_FORMAT).build_transitions()
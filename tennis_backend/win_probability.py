@@ -0,0 +1,155 @@
+"""
+Exact live win probabilities by memoized recursion over game, tiebreak, set
+and match states (a Markov chain on points), using the rules in tennis_game.py.
+
+The only inputs besides the score are each player's point-win probability on
+serve. Every recursion level is an lru_cache keyed by those probabilities, so
+all matches with the same probabilities share one bounded cache and repeated
+queries on the same score are dictionary hits.
+"""
+
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+
+from tennis_backend.match_state import (
+    GAMES, GAMES_PER_SET, NO_PLAYER, POINTS, SETS_TO_WIN, TIEBREAK_POINTS, TIEBREAK_POINTS_TO_WIN, MatchState,
+)
+
+# Points needed to win a regular game (0, 15, 30, 40, game)
+GAME_POINTS_TO_WIN = 4
+
+# Entries per recursion level; a full match tree for one pair of
+# probabilities needs a few hundred, so this holds many pairs at once
+CACHE_SIZE = 1 << 16
+
+# Probabilities are rounded so near-identical inputs share cache entries
+PRECISION = 4
+
+# (player 0 wins and player 0 serves next, player 0 wins and player 1 serves next,
+#  player 1 wins and player 0 serves next, player 1 wins and player 1 serves next)
+SetOutcomes = Tuple[float, float, float, float]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def game_win(p: float, server_points: int, returner_points: int) -> float:
+    """P(server holds) from a raw point score, p = server's point-win probability"""
+    if server_points >= GAME_POINTS_TO_WIN and server_points - returner_points >= 2:
+        return 1.0
+    if returner_points >= GAME_POINTS_TO_WIN and returner_points - server_points >= 2:
+        return 0.0
+    if server_points == returner_points >= GAME_POINTS_TO_WIN - 1:
+        # Deuce: win two points in a row before losing two in a row
+        return p * p / (p * p + (1 - p) * (1 - p))
+    return p * game_win(p, server_points + 1, returner_points) + (1 - p) * game_win(p, server_points, returner_points + 1)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def tiebreak_win(serve_0: float, serve_1: float, points_0: int, points_1: int, first_server: int) -> float:
+    """P(player 0 wins the tiebreak) from points_0-points_1, given who served its first point"""
+    if points_0 >= TIEBREAK_POINTS_TO_WIN and points_0 - points_1 >= 2:
+        return 1.0
+    if points_1 >= TIEBREAK_POINTS_TO_WIN and points_1 - points_0 >= 2:
+        return 0.0
+    if points_0 == points_1 >= TIEBREAK_POINTS_TO_WIN - 1:
+        # Level at 6-6 or later: each player serves one of the next two points
+        won_both = serve_0 * (1 - serve_1)
+        lost_both = (1 - serve_0) * serve_1
+        return won_both / (won_both + lost_both)
+
+    played = points_0 + points_1
+    server = first_server ^ (((played + 1) >> 1) & 1)
+    p = serve_0 if server == 0 else 1 - serve_1
+    return (p * tiebreak_win(serve_0, serve_1, points_0 + 1, points_1, first_server)
+            + (1 - p) * tiebreak_win(serve_0, serve_1, points_0, points_1 + 1, first_server))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def set_outcomes(serve_0: float, serve_1: float, games_0: int, games_1: int, server: int) -> SetOutcomes:
+    """Who wins the set and who serves first in the next one, from the start of a game"""
+    if games_0 >= GAMES_PER_SET and games_0 - games_1 >= 2:
+        return (1.0, 0.0, 0.0, 0.0) if server == 0 else (0.0, 1.0, 0.0, 0.0)
+    if games_1 >= GAMES_PER_SET and games_1 - games_0 >= 2:
+        return (0.0, 0.0, 1.0, 0.0) if server == 0 else (0.0, 0.0, 0.0, 1.0)
+    if games_0 == games_1 == GAMES_PER_SET:
+        won = tiebreak_win(serve_0, serve_1, 0, 0, server)
+        # The player who received first in the tiebreak serves first next set
+        return (0.0, won, 0.0, 1 - won) if server == 0 else (won, 0.0, 1 - won, 0.0)
+
+    hold = game_win(serve_0 if server == 0 else serve_1, 0, 0)
+    player_0_wins_game = hold if server == 0 else 1 - hold
+    return _mix(player_0_wins_game,
+                set_outcomes(serve_0, serve_1, games_0 + 1, games_1, 1 - server),
+                set_outcomes(serve_0, serve_1, games_0, games_1 + 1, 1 - server))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def match_win(serve_0: float, serve_1: float, sets_0: int, sets_1: int, server: int) -> float:
+    """P(player 0 wins the match) from the start of a set"""
+    if sets_0 >= SETS_TO_WIN:
+        return 1.0
+    if sets_1 >= SETS_TO_WIN:
+        return 0.0
+    return _after_set(serve_0, serve_1, sets_0, sets_1, set_outcomes(serve_0, serve_1, 0, 0, server))
+
+
+def _mix(p: float, first: SetOutcomes, second: SetOutcomes) -> SetOutcomes:
+    return tuple(p * a + (1 - p) * b for a, b in zip(first, second))  # type: ignore[return-value]
+
+
+def _after_set(serve_0: float, serve_1: float, sets_0: int, sets_1: int, outcomes: SetOutcomes) -> float:
+    won_0_next_0, won_0_next_1, won_1_next_0, won_1_next_1 = outcomes
+    return (won_0_next_0 * match_win(serve_0, serve_1, sets_0 + 1, sets_1, 0)
+            + won_0_next_1 * match_win(serve_0, serve_1, sets_0 + 1, sets_1, 1)
+            + won_1_next_0 * match_win(serve_0, serve_1, sets_0, sets_1 + 1, 0)
+            + won_1_next_1 * match_win(serve_0, serve_1, sets_0, sets_1 + 1, 1))
+
+
+def win_probabilities(state: MatchState, serve_win: Sequence[float], first_server: int = 0) -> Dict[str, Optional[float]]:
+    """
+    Player 0's probability of winning the current game, tiebreak (None
+    outside one), set and match. serve_win[i] is player i's point-win
+    probability on serve, strictly between 0 and 1.
+    """
+    if len(serve_win) != 2 or not all(0 < p < 1 for p in serve_win):
+        raise ValueError("Point-win probabilities must be strictly between 0 and 1, one per player")
+    serve_0, serve_1 = (round(p, PRECISION) for p in serve_win)
+    sets_0, sets_1 = state.sets_won(0), state.sets_won(1)
+
+    if state.winner != NO_PLAYER:
+        done = 1.0 if state.winner == 0 else 0.0
+        return {"game": done, "tiebreak": None, "set": done, "match": done}
+
+    score = state.score
+    games_0, games_1 = score[GAMES], score[GAMES + 1]
+    server = (first_server + state.games_played()) % 2
+
+    if state.tiebreak or games_0 == games_1 == GAMES_PER_SET:
+        # server is who serves (or served) the tiebreak's first point
+        won = tiebreak_win(serve_0, serve_1, score[TIEBREAK_POINTS], score[TIEBREAK_POINTS + 1], server)
+        outcomes = (0.0, won, 0.0, 1 - won) if server == 0 else (won, 0.0, 1 - won, 0.0)
+        match = _after_set(serve_0, serve_1, sets_0, sets_1, outcomes)
+        return {"game": won, "tiebreak": won, "set": won, "match": match}
+
+    # Current game in raw points from the server's side; advantage is 4-3
+    raw = [score[POINTS], score[POINTS + 1]]
+    if state.advantage != NO_PLAYER:
+        raw[state.advantage] += 1
+    hold = game_win(serve_0 if server == 0 else serve_1, raw[server], raw[1 - server])
+    game = hold if server == 0 else 1 - hold
+
+    outcomes = _mix(game,
+                    set_outcomes(serve_0, serve_1, games_0 + 1, games_1, 1 - server),
+                    set_outcomes(serve_0, serve_1, games_0, games_1 + 1, 1 - server))
+    match = _after_set(serve_0, serve_1, sets_0, sets_1, outcomes)
+    return {"game": game, "tiebreak": None, "set": outcomes[0] + outcomes[1], "match": match}
+
+
+def cache_info() -> Dict[str, int]:
+    """Hits, misses and current size summed over every recursion level"""
+    infos = [f.cache_info() for f in (game_win, tiebreak_win, set_outcomes, match_win)]
+    return {
+        "hits": sum(info.hits for info in infos),
+        "misses": sum(info.misses for info in infos),
+        "size": sum(info.currsize for info in infos),
+        "max_size": sum(info.maxsize for info in infos),
+    }